@@ -1,27 +1,54 @@
 """
 SWMM Uncertainty Quantification
-Latin Hypercube Sampling
-Peak Depth on surface nodes only
+Latin Hypercube Sampling (or adaptive scrambled Sobol' batches, or a Saltelli design for Sobol' indices)
+Peak depth, peak volume, flooding volume / duration and peak inflow on surface nodes only
 Outputs: uq_results.csv, uq_uncertainty.csv, uq_sensitivity.csv
+(+ uq_convergence.csv in adaptive mode, uq_sobol.csv in Saltelli mode)
+Timing: uq_timings.jsonl (per run) and uq_timings.csv (per stage, whole campaign)
 """
 
 import argparse
+import contextlib
+import hashlib
+import json
 import os
+import re
+import shutil
+import sys
 import tempfile
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from multiprocessing.util import Finalize
 
 import numpy as np
 import pandas as pd
-from scipy.stats import qmc, spearmanr
+from scipy.stats import qmc
 
 from swmm_api import SwmmInput
-from pyswmm import Simulation, Nodes
+from pyswmm import Simulation
+
+# run as a file (python scripts/BSEC_SWMM_UQ.py) only scripts/ is on sys.path; scripts.* imports need the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bootstrap import bootstrap_ci
+from scripts.config import input_dir, uq_output_dir, uq_results_path, uq_sensitivity_path, uq_sobol_path
+from scripts.columnar import FORMATS, output_path, write_table
+from scripts.inp_index import InpIndex
+from scripts.node_stats import METRICS, NodeStatsExtractor, stat_columns
+from scripts.profiling import TIMER, TimingLog, count, profiled, stage, start_worker_profile
+from scripts.sim_cache import SimulationCache
+from scripts.sensitivity import StreamingSpearman, sensitivity_table, spearman_matrix
+from scripts.sobol import saltelli_design, sobol_indices, sobol_table
 
 # ---------------------------------------------------------------------------
 # 1. CONFIGURATION & PARAMETERS
 # ---------------------------------------------------------------------------
 
 SURFACE_NODES: list[str] = []
+SIM_CACHE: SimulationCache | None = None  # set by run_uq, None disables caching
+_EXTRACTOR: NodeStatsExtractor | None = None  # statistics reader for SURFACE_NODES, see _stats_extractor
 
 PARAM_DEFS = [
     {"label": "SubcatchWidth", "param": "width", "mode": "multiplier", "low": 0.50, "high": 1.50},
@@ -34,101 +61,405 @@ PARAM_DEFS = [
     {"label": "IMD", "param": "imd", "mode": "absolute", "low": 0.05, "high": 0.25},
 ]
 
+# Where each sampled parameter lives in the .inp: (section, token column, clamp low, clamp high)
+PARAM_TARGETS = {
+    "width": ("SUBCATCHMENTS", 5, 0.1, np.inf),
+    "imperv": ("SUBCATCHMENTS", 4, 0.0, 100.0),
+    "slope": ("SUBCATCHMENTS", 6, 0.0001, np.inf),
+    "N_imperv": ("SUBAREAS", 1, 0.01, np.inf),
+    "N_perv": ("SUBAREAS", 2, 0.01, np.inf),
+    "dstore_imperv": ("SUBAREAS", 3, 0.0, np.inf),
+    "dstore_perv": ("SUBAREAS", 4, 0.0, np.inf),
+    "imd": ("INFILTRATION", 3, 0.0, 1.0),
+}
+
+# [REPORT] overrides for UQ runs: only the in-memory node statistics are used
+REPORT_OVERRIDES = {"INPUT": "NO", "CONTROLS": "NO", "SUBCATCHMENTS": "NONE", "NODES": "NONE", "LINKS": "NONE"}
+
 
 # ---------------------------------------------------------------------------
 # 2. LHS & INP EDITING
 # ---------------------------------------------------------------------------
 
-def build_lhs_samples(n_samples: int, seed: int = 42) -> pd.DataFrame:
-    sampler = qmc.LatinHypercube(d=len(PARAM_DEFS), seed=seed)
-    raw = sampler.random(n=n_samples)
+def _scale_samples(raw: np.ndarray) -> pd.DataFrame:
     lows = np.array([p["low"] for p in PARAM_DEFS])
     highs = np.array([p["high"] for p in PARAM_DEFS])
     return pd.DataFrame(qmc.scale(raw, lows, highs), columns=[p["label"] for p in PARAM_DEFS])
 
 
-def _resolve(pdef: dict, sampled: float, base_val: float) -> float:
-    return base_val * sampled if pdef["mode"] == "multiplier" else sampled
-
-
-def apply_sample(base_inp: SwmmInput, sample: dict) -> SwmmInput:
-    inp = base_inp.copy()
-    param_lookup = {p["param"]: (p, sample[p["label"]]) for p in PARAM_DEFS}
-    subcatch_names = list(inp.SUBCATCHMENTS.keys()) if inp.SUBCATCHMENTS else []
-
-    for name in subcatch_names:
-        sc = inp.SUBCATCHMENTS[name]
-        if "width" in param_lookup:
-            sc.width = max(_resolve(*param_lookup["width"], sc.width), 0.1)
-        if "imperv" in param_lookup:
-            sc.imperviousness = min(max(_resolve(*param_lookup["imperv"], sc.imperviousness), 0.0), 100.0)
-        if "slope" in param_lookup:
-            sc.slope = max(_resolve(*param_lookup["slope"], sc.slope), 0.0001)
-
-        if inp.SUBAREAS and name in inp.SUBAREAS:
-            sa = inp.SUBAREAS[name]
-            if "N_perv" in param_lookup:
-                sa.n_perv = max(_resolve(*param_lookup["N_perv"], sa.n_perv), 0.01)
-            if "N_imperv" in param_lookup:
-                sa.n_imperv = max(_resolve(*param_lookup["N_imperv"], sa.n_imperv), 0.01)
-            if "dstore_imperv" in param_lookup:
-                sa.storage_imperv = max(_resolve(*param_lookup["dstore_imperv"], sa.storage_imperv), 0.0)
-            if "dstore_perv" in param_lookup:
-                sa.storage_perv = max(_resolve(*param_lookup["dstore_perv"], sa.storage_perv), 0.0)
-
-        if inp.INFILTRATION and name in inp.INFILTRATION:
-            inf = inp.INFILTRATION[name]
-            if "imd" in param_lookup:
-                inf.moisture_deficit_init = min(max(_resolve(*param_lookup["imd"], inf.moisture_deficit_init), 0.0),
-                                                1.0)
-    return inp
+def build_lhs_samples(n_samples: int, seed: int = 42) -> pd.DataFrame:
+    sampler = qmc.LatinHypercube(d=len(PARAM_DEFS), seed=seed)
+    return _scale_samples(sampler.random(n=n_samples))
+
+
+def build_sobol_samples(n_samples: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Scrambled Sobol' design for adaptive runs. Unlike LHS the sequence is extensible:
+    every prefix is itself space-filling, so batches can be added until convergence.
+    Batch sizes that are powers of 2 keep each prefix balanced.
+    """
+    sampler = qmc.Sobol(d=len(PARAM_DEFS), scramble=True, seed=seed)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*balance properties.*")
+        return _scale_samples(sampler.random(n=n_samples))
+
+
+def build_saltelli_samples(n_base: int, seed: int = 42) -> pd.DataFrame:
+    """n_base * (len(PARAM_DEFS) + 2) samples in Saltelli block order [A; B; AB_1; ...], see sobol.py."""
+    return _scale_samples(saltelli_design(n_base, len(PARAM_DEFS), seed=seed))
+
+
+class ParamTemplate:
+    """
+    Base model compiled once for fast per-sample rewriting.
+
+    The sampled SUBCATCHMENTS/SUBAREAS/INFILTRATION values are held as one flat
+    NumPy array, and the .inp is kept as pre-rendered bytes with a %r placeholder
+    at every sampled token. A sample is then one vectorized resolve + clamp and
+    one bytes format per changed section; all other sections are reused as-is.
+    """
+
+    def __init__(self, inp_path: str):
+        index = InpIndex.of(inp_path)
+
+        targets_by_section = {}
+        for pdef in PARAM_DEFS:
+            section, col, lo, hi = PARAM_TARGETS[pdef["param"]]
+            targets_by_section.setdefault(section, []).append((col, pdef, lo, hi))
+
+        if "imd" in {p["param"] for p in PARAM_DEFS}:
+            options = index.read_section("OPTIONS").decode("utf-8", errors="surrogateescape") \
+                if "OPTIONS" in index else ""
+            infiltration = re.search(r"^\s*INFILTRATION\s+(\S+)", options, flags=re.MULTILINE | re.IGNORECASE)
+            if infiltration and "GREEN_AMPT" not in infiltration.group(1).upper():
+                raise ValueError(f"IMD sampling needs Green-Ampt infiltration, model uses {infiltration.group(1)}")
+
+        # [SECTION] blocks from the section index, keeping every byte of the original file
+        self._chunks: list[bytes | str] = []
+        self._formats: dict[str, bytes] = {}
+        base, col_of_cell, lows, highs = [], [], [], []
+
+        for section, raw in index.blocks():
+            block = raw.decode("utf-8", errors="surrogateescape")
+            if section == "REPORT":
+                block = self._render_report(block)
+            if section not in targets_by_section:
+                self._chunks.append(block.encode("utf-8", errors="surrogateescape"))
+                continue
+
+            targets = sorted(targets_by_section[section], key=lambda t: t[0])
+            lines = []
+            for line in block.splitlines(keepends=True):
+                data = line.split(";", 1)[0]
+                spans = [m.span() for m in re.finditer(r"\S+", data)]
+                if line.lstrip().startswith(("[", ";")) or not spans:
+                    lines.append(line.replace("%", "%%"))
+                    continue
+
+                # replace only the sampled tokens, keep the original column layout
+                pieces, pos = [], 0
+                for col, pdef, lo, hi in targets:
+                    start, stop = spans[col]
+                    pieces.append(line[pos:start].replace("%", "%%") + "%r")
+                    pos = stop
+                    base.append(float(line[start:stop]))
+                    col_of_cell.append(PARAM_DEFS.index(pdef))
+                    lows.append(lo)
+                    highs.append(hi)
+                pieces.append(line[pos:].replace("%", "%%"))
+                lines.append("".join(pieces))
+
+            self._formats[section] = "".join(lines).encode("utf-8", errors="surrogateescape")
+            self._chunks.append(section)
+
+        self.sections = list(self._formats)
+        self._base = np.array(base)
+        self._col = np.array(col_of_cell, dtype=np.intp)
+        self._is_multiplier = np.array([PARAM_DEFS[c]["mode"] == "multiplier" for c in col_of_cell])
+        self._low = np.array(lows)
+        self._high = np.array(highs)
+        self._cells = {section: self._formats[section].count(b"%r") for section in self.sections}
+
+    @staticmethod
+    def _render_report(block: str) -> str:
+        lines = block.splitlines(keepends=True)
+        keys_seen = set()
+        for i, line in enumerate(lines):
+            parts = line.split()
+            if parts and parts[0].upper() in REPORT_OVERRIDES:
+                keys_seen.add(parts[0].upper())
+                lines[i] = f"{parts[0]:<14} {REPORT_OVERRIDES[parts[0].upper()]}\n"
+        insert_at = len(lines)
+        while insert_at > 1 and not lines[insert_at - 1].strip():
+            insert_at -= 1
+        missing = [f"{k:<14} {v}\n" for k, v in REPORT_OVERRIDES.items() if k not in keys_seen]
+        return "".join(lines[:insert_at] + missing + lines[insert_at:])
+
+    def resolve(self, sample: dict) -> np.ndarray:
+        """Sampled value for every templated cell, clamped to the PARAM_TARGETS bounds."""
+        sampled = np.array([sample[p["label"]] for p in PARAM_DEFS])[self._col]
+        values = np.where(self._is_multiplier, self._base * sampled, sampled)
+        return np.clip(values, self._low, self._high)
+
+    def render(self, sample: dict) -> bytes:
+        values = self.resolve(sample).tolist()
+        out, pos = [], 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                out.append(chunk)
+            else:
+                n_cells = self._cells[chunk]
+                out.append(self._formats[chunk] % tuple(values[pos:pos + n_cells]))
+                pos += n_cells
+        return b"".join(out)
+
+
+@TIMER.timed("render_inp")
+def apply_sample(template: ParamTemplate, sample: dict) -> bytes:
+    return template.render(sample)
 
 
 # ---------------------------------------------------------------------------
 # 3. SIMULATION WITH NATIVE STATISTICS EXTRACTOR
 # ---------------------------------------------------------------------------
 
-def run_simulation(inp: SwmmInput) -> dict:
-    results = {}
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".inp", delete=False) as tmp:
+def _stats_extractor() -> NodeStatsExtractor:
+    # one preallocated extractor per process, rebuilt only if the surface node list changes
+    global _EXTRACTOR
+    if _EXTRACTOR is None or _EXTRACTOR.node_ids != SURFACE_NODES:
+        _EXTRACTOR = NodeStatsExtractor(SURFACE_NODES)
+    return _EXTRACTOR
+
+
+def run_simulation(inp_bytes: bytes) -> dict:
+    """Every METRICS statistic per surface node ('{metric}_{node}' keys)."""
+    key = None
+    if SIM_CACHE is not None:
+        with stage("cache_lookup"):
+            key = SIM_CACHE.key(inp_bytes, {"nodes": SURFACE_NODES, "metrics": list(METRICS)})
+            cached = SIM_CACHE.get(key)
+        if cached is not None:
+            count("cache_hits")
+            return dict(zip(cached["names"].tolist(), cached["values"].tolist()))
+        count("cache_misses")
+
+    with stage("write_inp"), tempfile.NamedTemporaryFile(mode="wb", suffix=".inp", delete=False) as tmp:
+        tmp.write(inp_bytes)
         tmp_path = tmp.name
 
     try:
-        if inp.REPORT:
-            inp.REPORT.update(
-                {'INPUT': 'NO', 'CONTROLS': 'NO', 'SUBCATCHMENTS': 'NONE', 'NODES': 'NONE', 'LINKS': 'NONE'})
-
-        inp.write_file(tmp_path)
-
-        with Simulation(tmp_path, reportfile='', outputfile='') as sim:
-            # 1. Initialize node objects
-            node_obj = Nodes(sim)
+        with stage("parse"):
+            sim = Simulation(tmp_path, reportfile='', outputfile='')
+        with sim:
+            # 1. Resolve the surface node indices in this project
+            extractor = _stats_extractor().bind()
 
             # 2. Run the simulation natively (replaces sim.execute())
-            for step in sim:
-                pass
+            with stage("step"):
+                for step in sim:
+                    pass
 
             # 3. Extract statistics BEFORE the 'with' block closes the simulation
-            for name in SURFACE_NODES:
-                try:
-                    results[f"max_depth_{name}"] = node_obj[name].statistics.get('max_depth', 0.0)
-                except Exception:
-                    results[f"max_depth_{name}"] = np.nan
+            with stage("statistics"):
+                results = extractor.as_row(extractor.extract())
 
     finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-
+        # pyswmm writes the (empty) report and output files next to the .inp
+        stem = os.path.splitext(tmp_path)[0]
+        for path in (tmp_path, stem + ".rpt", stem + ".out"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    if key is not None:
+        with stage("cache_store"):
+            SIM_CACHE.put(key, {"names": np.array(list(results)),
+                                "values": np.array(list(results.values()), dtype=float)})
     return results
 
 
 # ---------------------------------------------------------------------------
-# 4. MAIN UQ & ANALYSIS
+# 4. CHECKPOINT JOURNAL
+# ---------------------------------------------------------------------------
+
+# all under outputdata/UQ of the repo, whatever the working directory
+RESULTS_PATH = uq_results_path
+JOURNAL_PATH = os.path.join(uq_output_dir, "uq_results.journal.jsonl")
+UNCERTAINTY_PATH = os.path.join(uq_output_dir, "uq_uncertainty.csv")
+SENSITIVITY_PATH = uq_sensitivity_path
+CONVERGENCE_PATH = os.path.join(uq_output_dir, "uq_convergence.csv")
+SOBOL_PATH = uq_sobol_path
+TIMING_LOG_PATH = os.path.join(uq_output_dir, "uq_timings.jsonl")
+TIMING_PATH = os.path.join(uq_output_dir, "uq_timings.csv")
+
+
+def campaign_key(inp_path: str, n_samples: int, seed: int, design: str = "lhs") -> dict:
+    """Identifies a campaign: same base model bytes + same design => same samples per run_id."""
+    with open(inp_path, "rb") as f:
+        inp_sha256 = hashlib.sha256(f.read()).hexdigest()
+    key = {"inp_sha256": inp_sha256, "n_samples": n_samples, "seed": seed}
+    if design != "lhs":  # LHS keys stay as before so existing journals still resume
+        key["design"] = design
+    return key
+
+
+def load_journal(journal_path: str, key: dict) -> dict[int, dict]:
+    """Latest journaled row per run_id for this campaign. A torn last line (crash mid-write) is ignored."""
+    rows = {}
+    if not os.path.isfile(journal_path):
+        return rows
+
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if all(record.get(k) == v for k, v in key.items()):
+                rows[record["run_id"]] = record["row"]
+    return rows
+
+
+def open_journal(journal_path: str):
+    """Open for appending, terminating a torn last line so the next record starts on its own line."""
+    journal = open(journal_path, "a+b")
+    if journal.tell() > 0:
+        journal.seek(-1, os.SEEK_END)
+        if journal.read(1) != b"\n":
+            journal.write(b"\n")
+    return journal
+
+
+def append_journal(journal, key: dict, row: dict):
+    journal.write((json.dumps({**key, "run_id": row["run_id"], "row": row}) + "\n").encode())
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
 # ---------------------------------------------------------------------------
+# 5. MAIN UQ & ANALYSIS
+# ---------------------------------------------------------------------------
+
+def _run_sample(template: ParamTemplate, run_id: int, sample: dict) -> dict:
+    """Result row for one sample; its stage timings ride along under "_timings" and are popped by run_uq."""
+    TIMER.start_run()
+    start = time.perf_counter()
+    try:
+        modified_inp = apply_sample(template, sample)
+        sim_results = run_simulation(modified_inp)
+        status = "OK"
+    except Exception as exc:
+        sim_results = {}
+        status = f"ERROR: {exc}"
+    timings = {**TIMER.end_run(), "pid": os.getpid(), "wall_s": time.perf_counter() - start}
+    return {"run_id": run_id, "status": status, **sample, **sim_results, "_timings": timings}
+
+
+# Per-process state for --workers > 1: every worker compiles the base model once,
+# owns its own SWMM engine and writes its temp .inp files to a private directory.
+_WORKER_TEMPLATE: ParamTemplate | None = None
+
 
-def run_uq(inp_path: str, n_samples: int, seed: int):
-    global SURFACE_NODES
-    base_inp = SwmmInput.read_file(inp_path)
+def _init_worker(inp_path: str, surface_nodes: list[str], use_cache: bool, profile_path: str | None = None):
+    global SURFACE_NODES, SIM_CACHE, _WORKER_TEMPLATE
+    start_worker_profile(profile_path)
+    SURFACE_NODES = surface_nodes
+    SIM_CACHE = SimulationCache() if use_cache else None
+    _WORKER_TEMPLATE = ParamTemplate(inp_path)
+
+    tmp_dir = tempfile.mkdtemp(prefix=f"swmm_uq_{os.getpid()}_")
+    tempfile.tempdir = tmp_dir
+    Finalize(None, shutil.rmtree, args=(tmp_dir,), kwargs={"ignore_errors": True}, exitpriority=10)
+
+
+def _run_worker_sample(run_id: int, sample: dict) -> dict:
+    return _run_sample(_WORKER_TEMPLATE, run_id, sample)
+
+
+def _iter_serial(template: ParamTemplate, pending: list[tuple[int, dict]], n_samples: int):
+    for run_id, sample in pending:
+        print(f"[UQ] Run {run_id:>4d}/{n_samples} ...", end=" ", flush=True)
+        result = _run_sample(template, run_id, sample)
+        print(result["status"])
+        yield result
+
+
+def _make_pool(inp_path: str, workers: int, profile_path: str | None = None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(inp_path, SURFACE_NODES, SIM_CACHE is not None, profile_path))
+
+
+def _iter_parallel(pool: ProcessPoolExecutor, pending: list[tuple[int, dict]], n_samples: int):
+    futures = {pool.submit(_run_worker_sample, run_id, sample): (run_id, sample)
+               for run_id, sample in pending}
+
+    # rows stream back in completion order, run_id restores the sample order
+    for done, future in enumerate(as_completed(futures), start=1):
+        run_id, sample = futures[future]
+        try:
+            result = future.result()
+        except Exception as exc:  # worker died (e.g. engine crash)
+            result = {"run_id": run_id, "status": f"ERROR: {exc}", **sample}
+        print(f"[UQ] Run {run_id:>4d}/{n_samples} ({done}/{len(pending)} done) ... {result['status']}")
+        yield result
+
+
+def convergence_stats(rows: list[dict], n_bootstrap: int = 500, seed: int = 42) -> dict:
+    """Per-node mean, CV and relative 95 % bootstrap CI half-width of max depth over the OK runs so far."""
+    # run_id order, so the bootstrap does not depend on the order parallel runs finished in
+    df = pd.DataFrame(sorted((r for r in rows if r["status"] == "OK"), key=lambda r: r["run_id"]))
+    cols = [f"max_depth_{n}" for n in SURFACE_NODES if f"max_depth_{n}" in df.columns]
+    data = df[cols].to_numpy(dtype=np.float64) if len(df) else np.empty((0, len(cols)))
+
+    mean = np.nanmean(data, axis=0) if len(data) else np.full(len(cols), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.nanstd(data, axis=0, ddof=1) / mean
+        ci_rel = np.full(len(cols), np.inf)
+        if len(data) > 1:
+            _, low, high = bootstrap_ci(data, n_bootstrap=n_bootstrap, seed=seed)
+            ci_rel = (high - low) / 2 / mean
+    return {"n_runs": len(data), "mean": mean, "cv": cv, "ci_rel": ci_rel}
+
+
+def check_convergence(stats: dict, prev: dict | None, tol: float) -> tuple[dict, bool]:
+    """
+    Converged when, over all nodes that flood (mean > 0), the relative CI half-width of the mean,
+    the relative change of the mean and the change of the CV since the previous batch are all <= tol.
+    """
+    active = stats["mean"] > 0
+    summary = {"n_runs": stats["n_runs"], "active_nodes": int(active.sum()),
+               "max_ci_rel_halfwidth": np.nan, "max_rel_mean_change": np.nan, "max_cv_change": np.nan}
+    if not active.any():
+        return summary, False
+
+    summary["max_ci_rel_halfwidth"] = float(np.max(stats["ci_rel"][active]))
+    if prev is not None:
+        summary["max_rel_mean_change"] = float(np.max(np.abs(stats["mean"] - prev["mean"])[active]
+                                                      / stats["mean"][active]))
+        summary["max_cv_change"] = float(np.nanmax(np.abs(stats["cv"] - prev["cv"])[active]))
+
+    values = [summary["max_ci_rel_halfwidth"], summary["max_rel_mean_change"], summary["max_cv_change"]]
+    return summary, all(np.isfinite(v) and v <= tol for v in values)
+
+
+def run_uq(inp_path: str, n_samples: int, seed: int, workers: int = 1, resume: bool = False,
+           use_cache: bool = True, fmt: str = "csv", sensitivity_every: int = 0,
+           adaptive: bool = False, batch_size: int = 64, tol: float = 0.05, saltelli: bool = False,
+           profile: str | None = None):
+    """
+    Fixed mode runs all n_samples LHS samples. Adaptive mode runs scrambled Sobol' samples in batches
+    of batch_size and stops once check_convergence meets tol, or after n_samples runs.
+    Saltelli mode treats n_samples as the base sample size N, runs N * (params + 2) samples and
+    adds first-order / total Sobol' indices.
+    Stage timings of every run go to TIMING_LOG_PATH and the campaign breakdown to TIMING_PATH;
+    with profile set, each worker process also writes cProfile stats to {profile}.{pid}.
+    """
+    global SURFACE_NODES, SIM_CACHE
+    TIMER.reset()
+    campaign_start = time.perf_counter()
+    os.makedirs(uq_output_dir, exist_ok=True)
+    SIM_CACHE = SimulationCache() if use_cache else None
+    with stage("read_base_inp"):
+        base_inp = SwmmInput.read_file(inp_path)
 
     if base_inp.STORAGE:
         SURFACE_NODES = [name for name in base_inp.STORAGE.keys() if name.endswith("-S")]
@@ -137,52 +468,145 @@ def run_uq(inp_path: str, n_samples: int, seed: int):
     if not SURFACE_NODES:
         warnings.warn("No storage nodes ending in '-S' found.")
 
-    samples_df = build_lhs_samples(n_samples=n_samples, seed=seed)
-    all_rows = []
-
-    for i, row in samples_df.iterrows():
-        sample = row.to_dict()
-        print(f"[UQ] Run {i + 1:>4d}/{n_samples} ...", end=" ", flush=True)
-        try:
-            modified_inp = apply_sample(base_inp, sample)
-            sim_results = run_simulation(modified_inp)
-            status = "OK"
-        except Exception as exc:
-            sim_results = {}
-            status = f"ERROR: {exc}"
-
-        all_rows.append({"run_id": i + 1, "status": status, **sample, **sim_results})
-        print(status)
+    n_base = n_samples
+    if saltelli:
+        samples_df = build_saltelli_samples(n_base=n_base, seed=seed)
+        n_samples = len(samples_df)
+        print(f"[UQ] Saltelli design: {n_base} base samples x {len(PARAM_DEFS) + 2} blocks = {n_samples} runs")
+        key = campaign_key(inp_path, n_samples, seed, design="saltelli")
+        batches = [range(n_samples)]
+    elif adaptive:
+        samples_df = build_sobol_samples(n_samples=n_samples, seed=seed)
+        key = campaign_key(inp_path, n_samples, seed, design="sobol")
+        batches = [range(start, min(start + batch_size, n_samples)) for start in range(0, n_samples, batch_size)]
+    else:
+        samples_df = build_lhs_samples(n_samples=n_samples, seed=seed)
+        key = campaign_key(inp_path, n_samples, seed)
+        batches = [range(n_samples)]
+
+    # finished runs are kept, failed runs are queued again
+    finished = {}
+    if resume:
+        finished = {run_id: row for run_id, row in load_journal(JOURNAL_PATH, key).items()
+                    if row["status"] == "OK"}
+        print(f"[UQ] Resuming: {len(finished)}/{n_samples} runs already finished")
+    elif os.path.isfile(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
 
+    all_rows = []
+    samples = samples_df.to_dict("records")
+
+    # live sensitivity: refresh uq_sensitivity.csv every `sensitivity_every` new runs
+    live = None
+    if sensitivity_every > 0:
+        live = StreamingSpearman([p["label"] for p in PARAM_DEFS], stat_columns(SURFACE_NODES))
+    n_new = 0
+
+    prev_stats, history = None, []
+    with contextlib.ExitStack() as stack:
+        journal = stack.enter_context(open_journal(JOURNAL_PATH))
+        timing_log = stack.enter_context(TimingLog(TIMING_LOG_PATH))
+
+        # one pool (or one compiled template) serves every batch
+        if workers > 1:
+            print(f"[UQ] Running on {workers} worker processes")
+            pool = stack.enter_context(_make_pool(inp_path, workers, profile))
+            run_batch = partial(_iter_parallel, pool, n_samples=n_samples)
+        else:
+            with stage("compile_template"):
+                template = ParamTemplate(inp_path)
+            run_batch = partial(_iter_serial, template, n_samples=n_samples)
+
+        for b, batch in enumerate(batches, start=1):
+            pending = []
+            for i in batch:
+                if i + 1 in finished:
+                    all_rows.append(finished[i + 1])
+                    if live is not None:
+                        live.update(finished[i + 1])
+                else:
+                    pending.append((i + 1, samples[i]))
+
+            for result in run_batch(pending):
+                timings = result.pop("_timings", {})
+                TIMER.merge(timings)
+                timing_log.write(result["run_id"], timings, pid=timings.get("pid"), status=result["status"])
+                with stage("journal"):
+                    append_journal(journal, key, result)
+                all_rows.append(result)
+                if live is not None:
+                    with stage("live_sensitivity"):
+                        live.update(result)
+                        n_new += 1
+                        if n_new % sensitivity_every == 0 and live.n_runs > 2:
+                            # optional live view: a failed refresh must never abort the campaign
+                            try:
+                                live.result().to_csv(SENSITIVITY_PATH, index=False)
+                            except Exception as exc:
+                                print(f"[UQ] Live sensitivity refresh failed: {exc}")
+
+            if adaptive:
+                with stage("convergence_check"):
+                    stats = convergence_stats(all_rows, seed=seed)
+                summary, converged = check_convergence(stats, prev_stats, tol)
+                history.append({"batch": b, **summary, "converged": converged})
+                pd.DataFrame(history).to_csv(CONVERGENCE_PATH, index=False)
+                print(f"[UQ] Batch {b}: {summary['n_runs']} OK runs, "
+                      f"CI half-width {summary['max_ci_rel_halfwidth']:.4f}, "
+                      f"mean change {summary['max_rel_mean_change']:.4f}, "
+                      f"CV change {summary['max_cv_change']:.4f} (tol {tol})")
+                if converged:
+                    print(f"[UQ] Converged after {len(all_rows)} runs")
+                    break
+                prev_stats = stats
+
+    all_rows.sort(key=lambda r: r["run_id"])
     results_df = pd.DataFrame(all_rows)
-    results_df.to_csv("outputdata/UQ/uq_results.csv", index=False)
+    with stage("write_results"):
+        write_table(results_df, output_path(RESULTS_PATH, fmt), fmt)
 
-    aggregated_uncertainty(results_df)
-    sensitivity_analysis(results_df)
+    # the Sobol' indices are the point of a Saltelli campaign: written first, independent of the other tables
+    if saltelli:
+        with stage("sobol"):
+            sobol_analysis(results_df, n_base, seed=seed)
+    with stage("uncertainty"):
+        aggregated_uncertainty(results_df)
+    with stage("sensitivity"):
+        sensitivity_analysis(results_df)
+
+    # run stages are summed over workers, so with workers > 1 their total exceeds the wall time
+    TIMER.table().to_csv(TIMING_PATH, index=False)
+    print(TIMER.report("UQ timing"))
+    print(f"[UQ timing] campaign wall time {time.perf_counter() - campaign_start:.1f} s")
 
 
 def aggregated_uncertainty(df: pd.DataFrame):
     df = df[df["status"] == "OK"]
     if df.empty: return
 
-    cvs = []
-    for node in SURFACE_NODES:
-        col = f"max_depth_{node}"
-        if col in df.columns:
-            series = df[col].dropna()
-            if len(series) > 1 and series.mean() > 0:
-                cvs.append(series.std() / series.mean())
-
-    if cvs:
-        agg_df = pd.DataFrame([{
-            "group": "surface_nodes",
-            "metric": "max_depth",
-            "mean_CV": round(np.mean(cvs), 4),
-            "max_CV": round(np.max(cvs), 4),
-            "min_CV": round(np.min(cvs), 4),
-            "node_count": len(cvs),
-        }])
-        agg_df.to_csv("outputdata/UQ/uq_uncertainty.csv", index=False)
+    # one row per metric
+    rows = []
+    for metric in METRICS:
+        cvs = []
+        for node in SURFACE_NODES:
+            col = f"{metric}_{node}"
+            if col in df.columns:
+                series = df[col].dropna()
+                if len(series) > 1 and series.mean() > 0:
+                    cvs.append(series.std() / series.mean())
+
+        if cvs:
+            rows.append({
+                "group": "surface_nodes",
+                "metric": metric,
+                "mean_CV": round(np.mean(cvs), 4),
+                "max_CV": round(np.max(cvs), 4),
+                "min_CV": round(np.min(cvs), 4),
+                "node_count": len(cvs),
+            })
+
+    if rows:
+        pd.DataFrame(rows).to_csv(UNCERTAINTY_PATH, index=False)
 
 
 def sensitivity_analysis(df: pd.DataFrame):
@@ -190,33 +614,66 @@ def sensitivity_analysis(df: pd.DataFrame):
     if df.empty: return
 
     param_cols = [p["label"] for p in PARAM_DEFS]
-    output_cols = [c for c in df.columns if c.startswith("max_depth_")]
-    rows = []
+    output_cols = [c for c in df.columns if c.startswith(tuple(f"{m}_" for m in METRICS))]
 
-    for param in param_cols:
-        for output in output_cols:
-            valid = df[[param, output]].dropna()
-            if len(valid) > 2 and valid[param].nunique() > 1 and valid[output].nunique() > 1:
-                rho, pval = spearmanr(valid[param], valid[output])
-                rows.append({
-                    "parameter": param,
-                    "output": output,
-                    "spearman_rho": round(rho, 4),
-                    "p_value": round(pval, 4),
-                })
+    # all parameter x output pairs at once; NaN runs are dropped per pair as with dropna()
+    rho, p_value, _ = spearman_matrix(df[param_cols].to_numpy(dtype=np.float64),
+                                      df[output_cols].to_numpy(dtype=np.float64))
+    sens_df = sensitivity_table(rho, p_value, param_cols, output_cols)
+    if not sens_df.empty:
+        sens_df.to_csv(SENSITIVITY_PATH, index=False)
 
-    if rows:
-        sens_df = pd.DataFrame(rows)
-        sens_df["abs_rho"] = sens_df["spearman_rho"].abs()
-        sens_df = sens_df.sort_values(["output", "abs_rho"], ascending=[True, False]).drop(columns="abs_rho")
-        sens_df.to_csv("../outputdata/UQ/uq_sensitivity.csv", index=False)
+
+def sobol_analysis(df: pd.DataFrame, n_base: int, seed: int = 42):
+    """First-order / total Sobol' indices with 95 % bootstrap CIs from a Saltelli-mode results table."""
+    param_cols = [p["label"] for p in PARAM_DEFS]
+    output_cols = [c for c in df.columns if c.startswith(tuple(f"{m}_" for m in METRICS))]
+    n_runs = n_base * (len(param_cols) + 2)
+
+    # failed runs become NaN rows; their whole A/B/AB_i group is dropped by sobol_indices
+    results = df[df["status"] == "OK"].set_index("run_id")[output_cols].reindex(range(1, n_runs + 1))
+    indices = sobol_indices(results.to_numpy(dtype=np.float64), n_base, len(param_cols), seed=seed)
+    if indices["n_base_used"] < n_base:
+        print(f"[UQ] Sobol: {n_base - indices['n_base_used']}/{n_base} base samples dropped (failed runs)")
+    if indices["n_base_used"] > 1:
+        sobol_table(indices, param_cols, output_cols).to_csv(SOBOL_PATH, index=False)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="SWMM UQ")
-    parser.add_argument("--inp", required=True, help="Path to base SWMM .inp file")
-    parser.add_argument("--n", type=int, default=500, help="LHS samples")
+    parser.add_argument("--inp", required=True,
+                        help="Path to base SWMM .inp file (a bare file name is also looked up in inputdata/)")
+    parser.add_argument("--n", type=int, default=500, help="LHS samples (upper limit with --adaptive)")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for the SWMM runs (1 = serial, 0 = all cores)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip runs already finished in the journal of an interrupted campaign")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always run SWMM instead of reusing cached results for identical inp files")
+    parser.add_argument("--format", default="csv", choices=FORMATS,
+                        help="uq_results file format (parquet is typed and compressed)")
+    parser.add_argument("--sensitivity-every", type=int, default=0,
+                        help="Refresh uq_sensitivity.csv every N finished runs during the campaign (0 = only at the end)")
+    design = parser.add_mutually_exclusive_group()
+    design.add_argument("--adaptive", action="store_true",
+                        help="Run scrambled Sobol' batches and stop once the statistics converge")
+    design.add_argument("--saltelli", action="store_true",
+                        help="Run a Saltelli design with --n base samples (n x (params + 2) runs) and write uq_sobol.csv")
+    parser.add_argument("--batch", type=int, default=64,
+                        help="Runs per adaptive batch (a power of 2 keeps the Sobol' design balanced)")
+    parser.add_argument("--tol", type=float, default=0.05,
+                        help="Adaptive stopping tolerance for the CI half-width and batch-to-batch change")
+    parser.add_argument("--profile", default=None,
+                        help="Write cProfile stats of the campaign to this file (workers add .<pid> files)")
     args = parser.parse_args()
 
-    run_uq(inp_path=args.inp, n_samples=args.n, seed=args.seed)
\ No newline at end of file
+    inp_path = args.inp
+    if not os.path.isfile(inp_path) and os.path.isfile(os.path.join(input_dir, inp_path)):
+        inp_path = os.path.join(input_dir, inp_path)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    with profiled(args.profile):
+        run_uq(inp_path=inp_path, n_samples=args.n, seed=args.seed, workers=workers, resume=args.resume,
+               use_cache=not args.no_cache, fmt=args.format, sensitivity_every=args.sensitivity_every,
+               adaptive=args.adaptive, batch_size=args.batch, tol=args.tol, saltelli=args.saltelli,
+               profile=args.profile if workers > 1 else None)
\ No newline at end of file
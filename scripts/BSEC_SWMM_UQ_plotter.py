@@ -1,5 +1,15 @@
+import argparse
+import hashlib
+import inspect
+import json
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import matplotlib
+
+matplotlib.use("Agg")  # figures are only written to files; set before pyplot so serial and pool runs match
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import matplotlib.patheffects as pe
@@ -7,13 +17,54 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 
+# run as a file (python scripts/BSEC_SWMM_UQ_plotter.py) only scripts/ is on sys.path; scripts.* imports need the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bootstrap import bootstrap_ci, convergence_envelope
+from scripts.columnar import FORMATS, existing_output, read_table, table_columns
+from scripts.config import figures_dir, input_dir, uq_results_path, uq_sensitivity_path, uq_sobol_path
+from scripts.node_registry import NodeRegistry
+
+MANIFEST_NAME = ".figures_manifest.json"
+BASE_INP = os.path.join(input_dir, "Inner_Harbor_Model_V24.inp")  # model whose street nodes are plotted
+
+_WORKER_VIZ = None  # the visualizer each pool worker renders from, set once by _init_worker
+
 
 class SWMMVisualizer:
-    def __init__(self, results_path, sensitivity_path, output_dir="figures"):
+    # Key nodes used for convergence plots
+    STABILITY_TARGETS = [
+        "max_depth_J748-S",
+        "max_depth_J576-S",
+        "max_depth_J640-S",
+        "max_depth_J799-S",
+    ]
+
+    # figure -> (plot method, input frames it reads, files it writes); see run_all
+    FIGURES = {
+        "max_depth_boxes": ("plot_max_depth_boxes", ("depth",), ("max_depth_distribution.svg",)),
+        "convergence": ("plot_convergence", ("stability",), ("convergence_bootstrap.svg",)),
+        "bootstrap_mean_ci": ("plot_bootstrap_mean_ci", ("depth",), ("bootstrap_mean_ci_all_nodes.svg",)),
+        "uncertainty_scatter": ("plot_uncertainty_scatter", ("depth",), ("uncertainty_scatter_mean_vs_cv.svg",)),
+        "cv_overall": ("plot_cv_overall_distribution", ("depth",), ("cv_overall_histogram.svg",)),
+        "sensitivity_heatmaps": ("plot_sensitivity_heatmaps", ("sensitivity",),
+                                 ("sensitivity_heatmap_max_depth.svg", "sensitivity_heatmap_max_volume.svg")),
+        "sobol_heatmaps": ("plot_sobol_heatmaps", ("sobol",),
+                           ("sobol_heatmap_S1_max_depth.svg", "sobol_heatmap_ST_max_depth.svg")),
+    }
+
+    def __init__(self, results_path, sensitivity_path, output_dir="figures", columns=None, sobol_path=None,
+                 inp_path=BASE_INP):
         self.output_dir = output_dir
+        self.registry = NodeRegistry.of(inp_path)
         os.makedirs(self.output_dir, exist_ok=True)
 
-        raw = pd.read_csv(results_path)
+        # Load only run status + node outputs (csv or parquet); `columns` narrows this further,
+        # e.g. columns=SWMMVisualizer.STABILITY_TARGETS for the convergence plot alone
+        available = table_columns(results_path)
+        if columns is None:
+            columns = [c for c in available if c.startswith("max_depth_") or c.startswith("max_volume_")]
+        raw = read_table(results_path, columns=["status"] + [c for c in columns if c in available])
 
         # check # successful runs
         n_total = len(raw)
@@ -23,10 +74,12 @@ class SWMMVisualizer:
         print(f"[System]   {n_ok}/{n_total} runs OK"
               + (f", {n_failed} failed runs excluded" if n_failed else ""))
 
-        # Force all output columns to numeric (belt-and-braces)
+        # Force text-parsed output columns to numeric (belt-and-braces, parquet is already typed)
         output_cols = [c for c in self.df.columns
                        if c.startswith("max_depth_") or c.startswith("max_volume_")]
-        self.df[output_cols] = self.df[output_cols].apply(pd.to_numeric, errors="coerce")
+        untyped = [c for c in output_cols if not pd.api.types.is_float_dtype(self.df[c])]
+        if untyped:
+            self.df[untyped] = self.df[untyped].apply(pd.to_numeric, errors="coerce")
 
         # METRIC CONVERSION (ft to m)
         FT_TO_M = 0.3048
@@ -36,27 +89,25 @@ class SWMMVisualizer:
             elif col.startswith("max_volume_"):
                 self.df[col] = self.df[col] * (FT_TO_M ** 3)
 
-        self.sens_df = pd.read_csv(sensitivity_path)
+        self.sens_df = read_table(sensitivity_path)
         self.sens_df["spearman_rho"] = pd.to_numeric(self.sens_df["spearman_rho"], errors="coerce")
         self.sens_df["p_value"]      = pd.to_numeric(self.sens_df["p_value"],      errors="coerce")
 
-        # Node column lists, surface storage (-S) nodes only, no outfalls
-        self.depth_cols = [
-            c for c in self.df.columns
-            if c.startswith("max_depth_") and "-S" in c and "Out" not in c
-        ]
-        self.volume_cols = [
-            c for c in self.df.columns
-            if c.startswith("max_volume_") and "-S" in c and "Out" not in c
-        ]
-
-        # Key nodes used for convergence plots
-        self.stability_targets = [
-            "max_depth_J748-S",
-            "max_depth_J576-S",
-            "max_depth_J640-S",
-            "max_depth_J799-S",
-        ]
+        # Sobol' indices from a Saltelli-mode run (uq_sobol.csv) or the surrogate (uq_surrogate_sobol.csv)
+        self.sobol_df = read_table(sobol_path) if sobol_path and os.path.exists(sobol_path) else None
+
+        # Node column lists, street (surface storage) nodes of the model only
+        self.depth_cols = list(self.df.columns[self._street_node_mask(self.df.columns, "max_depth")])
+        self.volume_cols = list(self.df.columns[self._street_node_mask(self.df.columns, "max_volume")])
+
+        self.stability_targets = list(self.STABILITY_TARGETS)
+
+    def _street_node_mask(self, names, metric):
+        """True for the '{metric}_{node}' names whose node is in the registry."""
+        names = pd.Series(names, dtype=object)
+        prefix = f"{metric}_"
+        nodes = names.str.slice(len(prefix))
+        return (names.str.startswith(prefix) & (self.registry.indexer(nodes) >= 0)).to_numpy()
 
     # ------------------------------------------------------------------
     # 1.  MAX DEPTH BOXPLOTS  (all surface nodes)
@@ -71,8 +122,20 @@ class SWMMVisualizer:
         melted["Node"] = melted["Node"].str.replace("max_depth_", "", regex=False)
 
         plt.figure(figsize=(18, 8))
-        sns.boxplot(data=melted, x="Node", y="Max Depth (m)",
-                    color="cornflowerblue", fliersize=1)
+        ax = sns.boxplot(data=melted, x="Node", y="Max Depth (m)",
+                         color="cornflowerblue", fliersize=1,
+                         flierprops={"gid": "flier"})
+        # the fliers are one marker line per node: merge them into a single rasterized layer,
+        # boxes, whiskers and text stay vector
+        fliers = [line for line in ax.lines if line.get_gid() == "flier"]
+        if fliers:
+            merged = ax.plot(np.concatenate([line.get_xdata() for line in fliers]),
+                             np.concatenate([line.get_ydata() for line in fliers]),
+                             rasterized=True)[0]
+            merged.update_from(fliers[0])
+            merged.set_gid(None)
+            for line in fliers:
+                line.remove()
         plt.xticks(rotation=90, fontsize=6)
         plt.title("Max Depth Uncertainty Distribution (Surface Storage Nodes)")
         plt.tight_layout()
@@ -110,15 +173,8 @@ class SWMMVisualizer:
             if n_runs < 2:
                 continue
 
-            # n_bootstrap shuffles → cumulative mean paths
-            boot_paths = np.zeros((n_bootstrap, n_runs))
-            for b in range(n_bootstrap):
-                shuffled       = rng.permutation(data)
-                boot_paths[b]  = np.cumsum(shuffled) / (np.arange(n_runs) + 1)
-
-            median_path = np.median(boot_paths, axis=0)
-            lower       = np.percentile(boot_paths,  5, axis=0)
-            upper       = np.percentile(boot_paths, 95, axis=0)
+            # n_bootstrap shuffles (one batched draw) → 5/50/95 % of the cumulative mean paths
+            lower, median_path, upper = convergence_envelope(data, n_bootstrap, rng)
             x           = np.arange(1, n_runs + 1)
             label       = node.replace("max_depth_", "")
             c           = colors[i]
@@ -167,35 +223,23 @@ class SWMMVisualizer:
         print(f"[Plotting] Bootstrap Mean CI — all surface nodes "
               f"(n_bootstrap={n_bootstrap}, CI={ci}%)...")
 
-        rng  = np.random.default_rng(seed)
-        half = (100.0 - ci) / 2.0   # e.g. 2.5 for 95 % CI
-
-        records = []
-        for col in self.depth_cols:
-            data = self.df[col].dropna().values
-            if len(data) < 2:
-                continue
-
-            # Bootstrap resample with replacement
-            boot_means = np.array([
-                rng.choice(data, size=len(data), replace=True).mean()
-                for _ in range(n_bootstrap)
-            ])
-
-            records.append({
-                "node":       col.replace("max_depth_", ""),
-                "obs_mean":   data.mean(),
-                "ci_low":     np.percentile(boot_means, half),
-                "ci_high":    np.percentile(boot_means, 100.0 - half),
-                "ci_width":   np.percentile(boot_means, 100.0 - half)
-                              - np.percentile(boot_means, half),
-            })
-
-        if not records:
+        # all nodes share one set of resample indices; NaN runs are dropped per node
+        cols = [c for c in self.depth_cols if self.df[c].count() >= 2]
+        if not cols:
             print("  [Warning] No data available — skipping.")
             return
 
-        stats = pd.DataFrame(records).sort_values("obs_mean", ascending=True)
+        obs_mean, ci_low, ci_high = bootstrap_ci(self.df[cols].to_numpy(dtype=np.float64),
+                                                 n_bootstrap=n_bootstrap, ci=ci, seed=seed)
+
+        records = pd.DataFrame({
+            "node":       [c.replace("max_depth_", "") for c in cols],
+            "obs_mean":   obs_mean,
+            "ci_low":     ci_low,
+            "ci_high":    ci_high,
+            "ci_width":   ci_high - ci_low,
+        })
+        stats = records.sort_values("obs_mean", ascending=True)
 
         n_nodes = len(stats)
         fig_h   = max(10, n_nodes * 0.18)
@@ -283,14 +327,10 @@ class SWMMVisualizer:
     # ------------------------------------------------------------------
     def plot_sensitivity_heatmaps(self):
         print("[Plotting] Sensitivity Heatmaps...")
-        metric_keys = {"max_depth": "Max Depth (m)"}
+        metric_keys = {"max_depth": "Max Depth (m)", "max_volume": "Max Volume (m³)"}
 
         for metric_key, metric_label in metric_keys.items():
-            mask = (
-                    self.sens_df["output"].str.contains(metric_key, regex=False)
-                    & self.sens_df["output"].str.contains("-S", regex=False)
-                    & ~self.sens_df["output"].str.contains("Out", regex=False)
-            )
+            mask = self._street_node_mask(self.sens_df["output"], metric_key)
             df_plot = self.sens_df[mask].copy().dropna(subset=["spearman_rho"])
 
             if df_plot.empty:
@@ -304,44 +344,177 @@ class SWMMVisualizer:
             pivot = df_plot.pivot(index="node", columns="parameter",
                                   values="spearman_rho").T
 
-            # Adjust figure size: wider now because nodes are on the bottom
-            fig_w = max(18, len(pivot.columns) * 0.15)
-            fig_h = max(6, len(pivot.index) * 0.4)
-
-            plt.figure(figsize=(fig_w, fig_h))
-            sns.heatmap(pivot.abs(), cmap="Blues", vmin=0, vmax=1,
-                        linewidths=0.3,
-                        cbar_kws={"label": "|Spearman ρ|"})
-
-            plt.title(f"Sensitivity Heatmap — {metric_label}")
-            plt.ylabel("Model Parameter")
-            plt.xlabel("Storage Node ID")
-            plt.xticks(rotation=90, fontsize=7)
-            plt.yticks(fontsize=9)
-
-            plt.tight_layout()
-            fname = f"sensitivity_heatmap_{metric_key}.svg"
-            plt.savefig(os.path.join(self.output_dir, fname), dpi=300)
-            plt.close()
-            print(f"  Saved → {fname}")
+            self._node_heatmap(pivot.abs(), "|Spearman ρ|",
+                               f"Sensitivity Heatmap — {metric_label}",
+                               f"sensitivity_heatmap_{metric_key}.svg")
+
+    def plot_sobol_heatmaps(self):
+        """First-order (S1) and total (ST) Sobol' index per parameter and node."""
+        if self.sobol_df is None:
+            print("[Plotting] No Sobol' indices loaded — skipping")
+            return
+        print("[Plotting] Sobol' Heatmaps...")
+
+        df_plot = self.sobol_df[self._street_node_mask(self.sobol_df["output"], "max_depth")].copy()
+        df_plot["node"] = df_plot["output"].str.replace("max_depth_", "", regex=False)
+
+        for index, label in (("S1", "First-order"), ("ST", "Total")):
+            if index not in df_plot.columns:
+                continue
+            pivot = df_plot.pivot(index="node", columns="parameter", values=index).T
+            # sampling error can push estimates slightly outside [0, 1]
+            self._node_heatmap(pivot.clip(0, 1), f"Sobol' {index}",
+                               f"{label} Sobol' Index — Max Depth (m)",
+                               f"sobol_heatmap_{index}_max_depth.svg")
+
+    def _node_heatmap(self, pivot, cbar_label, title, fname):
+        # parameters on Y, nodes on X; wider figure since nodes are on the bottom
+        fig_w = max(18, len(pivot.columns) * 0.15)
+        fig_h = max(6, len(pivot.index) * 0.4)
+
+        plt.figure(figsize=(fig_w, fig_h))
+        sns.heatmap(pivot, cmap="Blues", vmin=0, vmax=1,
+                    linewidths=0.3, rasterized=True,
+                    cbar_kws={"label": cbar_label})
+
+        plt.title(title)
+        plt.ylabel("Model Parameter")
+        plt.xlabel("Storage Node ID")
+        plt.xticks(rotation=90, fontsize=7)
+        plt.yticks(fontsize=9)
+
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, fname), dpi=300)
+        plt.close()
+        print(f"  Saved → {fname}")
+
     # ------------------------------------------------------------------
     # Run all plots
     # ------------------------------------------------------------------
-    def run_all(self):
-        self.plot_max_depth_boxes()
-        self.plot_convergence()
-        self.plot_bootstrap_mean_ci()
-        self.plot_uncertainty_scatter()
-        self.plot_cv_overall_distribution()
-        self.plot_sensitivity_heatmaps()
-        print(f"\n[Done] All plots saved to: {os.path.abspath(self.output_dir)}")
+    def _frame(self, name):
+        if name == "depth":
+            return self.df[self.depth_cols]
+        if name == "stability":
+            return self.df[[c for c in self.stability_targets if c in self.df.columns]]
+        if name == "sensitivity":
+            return self.sens_df
+        if name == "sobol":
+            return self.sobol_df
+        raise KeyError(name)
+
+    def fingerprint(self, figure, params=None):
+        """
+        Hash of everything a figure depends on: the input frames it reads (values, index and columns),
+        its keyword arguments and the source of its plot method and the helpers that method calls.
+        """
+        method, frames, _ = self.FIGURES[figure]
+        h = hashlib.sha256()
+        for name in frames:
+            df = self._frame(name)
+            h.update(name.encode())
+            if df is None:
+                h.update(b"<none>")
+                continue
+            h.update(json.dumps([str(c) for c in df.columns]).encode())
+            h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        source = inspect.getsource(getattr(type(self), method))
+        for helper in sorted(set(re.findall(r"self\.(_\w+)\(", source))):
+            if callable(getattr(type(self), helper, None)):
+                source += inspect.getsource(getattr(type(self), helper))
+        h.update(source.encode())
+        return h.hexdigest()
+
+    def run_all(self, workers=1, force=False, params=None):
+        """
+        Render every figure in FIGURES, skipping those whose fingerprint matches the manifest
+        in output_dir and whose files are still there (force=True renders everything).
+        With workers > 1 (0 = all cores) the figures are rendered in a process pool.
+        params: figure -> keyword arguments for its plot method, e.g. {"convergence": {"n_bootstrap": 100}}.
+        """
+        params = params or {}
+        manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        pending = {}
+        for figure in self.FIGURES:
+            key = self.fingerprint(figure, params.get(figure))
+            entry = manifest.get(figure, {})
+            unchanged = entry.get("fingerprint") == key and all(
+                os.path.exists(os.path.join(self.output_dir, f)) for f in entry.get("files", []))
+            if unchanged and not force:
+                print(f"[Plotting] {figure}: inputs and parameters unchanged — skipping")
+            else:
+                pending[figure] = key
+
+        workers = os.cpu_count() if workers == 0 else workers
+        workers = min(workers or 1, len(pending))
+        rendered = {}
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self,)) as pool:
+                futures = {pool.submit(_render_figure, self.FIGURES[figure][0], params.get(figure, {})): figure
+                           for figure in pending}
+                for future in as_completed(futures):
+                    figure = futures[future]
+                    try:
+                        future.result()
+                        rendered[figure] = pending[figure]
+                    except Exception as e:
+                        print(f"  [Error] {figure} failed: {e}")
+        else:
+            for figure, key in pending.items():
+                try:
+                    getattr(self, self.FIGURES[figure][0])(**params.get(figure, {}))
+                    rendered[figure] = key
+                except Exception as e:
+                    plt.close("all")
+                    print(f"  [Error] {figure} failed: {e}")
+
+        # record only the files a figure actually produced (e.g. no Sobol' heatmaps without uq_sobol.csv)
+        for figure, key in rendered.items():
+            files = [f for f in self.FIGURES[figure][2] if os.path.exists(os.path.join(self.output_dir, f))]
+            manifest[figure] = {"fingerprint": key, "files": files}
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+        print(f"\n[Done] {len(rendered)} rendered, {len(self.FIGURES) - len(pending)} unchanged; "
+              f"plots in: {os.path.abspath(self.output_dir)}")
+
+
+def _init_worker(viz):
+    global _WORKER_VIZ
+    _WORKER_VIZ = viz
+
+
+def _render_figure(method, kwargs):
+    getattr(_WORKER_VIZ, method)(**kwargs)
 
 
 # --- EXECUTION ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UQ figures from uq_results / uq_sensitivity / uq_sobol")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Figures rendered in parallel (0 = all cores, 1 = in this process)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every figure, even if its inputs and parameters are unchanged")
+    parser.add_argument("--output-dir", default=os.path.join(figures_dir, "UQ"))
+    parser.add_argument("--inp", default=BASE_INP, help="Model whose street (-S) nodes are plotted")
+    parser.add_argument("--format", default=None, choices=FORMATS,
+                        help="uq_results file format (default: whichever of .csv/.parquet exists, newest first)")
+    args = parser.parse_args()
+
     viz = SWMMVisualizer(
-        results_path="../outputdata/UQ/uq_results.csv",
-        sensitivity_path="../outputdata/UQ/uq_sensitivity.csv",
-        output_dir="../figures/UQ/",
+        results_path=existing_output(uq_results_path, args.format),
+        sensitivity_path=uq_sensitivity_path,
+        output_dir=args.output_dir,
+        sobol_path=uq_sobol_path,
+        inp_path=args.inp,
     )
-    viz.run_all()
\ No newline at end of file
+    viz.run_all(workers=args.workers, force=args.force)
@@ -1,19 +1,34 @@
 # By: Ava Spangler
 # Date: 8/12/2025
 # Description: This script runs SWMM simulations using pyswmm, processes the results into dataframes, and analyzes them.
-# note: To simulate different storm conditions, update selected_storm in the EXECUTION block with a storm name already existing in the inp.
-# Storm name MUST exist in .inp to run here.
+# note: To simulate different storm conditions, update selected_storm in the EXECUTION block (or pass --storm) with a storm name already existing in the inp.
+# Storm name MUST exist in .inp to run here. Use --sweep to run every scenario x storm pair in config.py in parallel.
+# --multipliers scales --storm by each depth multiplier and --design runs a config.design_storms entry; both are generated into the temp inp.
 
 # IMPORTS --------------------------------------------------------------------------------------------------------------
+import argparse
 import os
+import shutil
+import sys
+import numpy as np
 import pandas as pd
-import swmmio
-import pyswmm
-import datetime as dt
-from pyswmm import Simulation, Nodes, Links, Subcatchments, LidControls, LidGroups
-from scripts.config import scenarios, storms
+# run as a file (python scripts/BSEC_SWMM_analysis.py) only scripts/ is on sys.path; scripts.* imports need the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.config import scenarios, storms, design_storms, flood_depth_thresholds_m, output_dir
 from scripts.utils import clean_rpt_encoding, storm_timeseries
+from scripts.storms import variant_name, write_storm_inp
+from scripts.node_capture import METRICS, NodeSeriesBuffer, series_frame
+from scripts.sim_cache import SimulationCache
+from scripts.columnar import FORMATS, write_table
+from scripts.peak_metrics import peak_metrics, write_peak_metrics
+from scripts.flood_duration import flood_durations, write_flood_durations
+from scripts.swmm_out import SwmmOutput
+from scripts.profiling import TIMER, TimingLog, profiled, stage
+from scripts.node_metadata import node_neighborhoods
+from scripts.node_registry import NodeRegistry
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # DEFINITIONS ----------------------------------------------------------------------------------------------------------
 cfs_to_cms = 0.0283168
@@ -21,262 +36,251 @@ ft_to_m = 12*2.54*(1/100)
 inchperhour_to_cmpersec = (2.54)*(1/3600)
 
 ##### Run SWMM and save functions #####
-def list_street_nodes(model): #separate out above ground storage nodes from below ground junctions
-    nodes_df = model.nodes.dataframe
-    nodes_df = nodes_df.reset_index()
-    node_names = nodes_df['Name'].tolist()
-    street_node_names = [k for k in node_names if '-S' in k]
-    return street_node_names
-
-def run_pyswmm(inp_path, node_ids):
-    output_nodes = {node: {'depth': [], 'flow': [], 'volume': []} for node in node_ids}
-    time_stamps = []
-    with Simulation(inp_path) as sim:
-        nodes = {node_id: Nodes(sim)[node_id] for node_id in node_ids}
+def run_pyswmm(inp_path, node_ids, dtype=np.float64, layout='wide', spill_dir=None):
+    from pyswmm import Simulation, Nodes  # engine is imported on first run, not at module import
+    with stage('parse'):
+        sim = Simulation(inp_path)
+    with sim:
+        nodes = [Nodes(sim)[node_id] for node_id in node_ids]
         sim.step_advance(300) #lets python access sim during run (300 sec = 5min intervals)
 
-        for step in enumerate(sim):
-            time_stamps.append(sim.current_time)
-            for node_id, node in nodes.items():
-                output_nodes[node_id]['depth'].append(node.depth*ft_to_m) # ft to m
-                output_nodes[node_id]['flow'].append(node.total_inflow*cfs_to_cms) #m**3/s
-                output_nodes[node_id]['volume'].append(node.volume * cfs_to_cms) #m**3
-
-        node_data = {'timestamp': time_stamps}
-        for node_id in node_ids:
-            node_data[f'{node_id}_depth'] = output_nodes[node_id]['depth']
-            node_data[f'{node_id}_flow'] = output_nodes[node_id]['flow']
-            node_data[f'{node_id}_volume'] = output_nodes[node_id]['volume']
-
-        df_node_data = pd.DataFrame(node_data).copy()
-        numeric_cols = df_node_data.columns.drop('timestamp')
-        df_node_data[numeric_cols] = df_node_data[numeric_cols].apply(pd.to_numeric, errors='coerce')
-        return df_node_data
+        # preallocate (steps, nodes, depth/flow/volume); grows in chunks if the engine takes extra steps
+        n_steps = int((sim.end_time - sim.start_time).total_seconds() // 300) + 1
+        buffer = NodeSeriesBuffer(node_ids, n_steps=n_steps, dtype=dtype, spill_dir=spill_dir)
+
+        # engine time and node sampling interleave, so capture time is summed per step
+        capture_s, start = 0.0, time.perf_counter()
+        for step in sim:
+            t0 = time.perf_counter()
+            buffer.append(sim.current_time, [v for node in nodes for v in (node.depth, node.total_inflow, node.volume)])
+            capture_s += time.perf_counter() - t0
+        TIMER.add('step', time.perf_counter() - start - capture_s)
+        TIMER.add('capture', capture_s, calls=len(buffer.timestamps))
+
+    with stage('finish_series'):
+        buffer.finish(factors=(ft_to_m, cfs_to_cms, cfs_to_cms)) # ft to m, cfs to m**3/s, ft**3 to m**3
+        return buffer.to_frame(layout)
+
+def run_swmm_batch(inp_path, node_ids, dtype=np.float64, layout='wide'):
+    # run the model natively to completion, then bulk read node results from the binary .out file
+    # the .rpt/.out go to a private temp dir that is removed once the results are read
+    from pyswmm import Simulation
+    run_dir = tempfile.mkdtemp(prefix='swmm_batch_')
+    out_path = os.path.join(run_dir, 'run.out')
+    try:
+        with stage('parse'):
+            sim = Simulation(inp_path, reportfile=os.path.join(run_dir, 'run.rpt'), outputfile=out_path)
+        with sim, stage('step'):
+            end_time = sim.end_time
+            sim.execute()
+
+        with stage('read_out'), SwmmOutput(out_path) as out:
+            # the .out also reports the period at the end time, which step mode never samples: dropped so
+            # both modes return the same rows
+            time_stamps = [t for t in out.timestamps if t < end_time]
+            data = out.node_series(node_ids, ('depth', 'total_inflow', 'volume'), dtype=dtype)[:len(time_stamps)]
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    data *= np.array([ft_to_m, cfs_to_cms, cfs_to_cms], dtype=dtype) # ft to m, cfs to m**3/s, ft**3 to m**3
+    return series_frame(data, time_stamps, node_ids, layout=layout)
+
+run_modes = {'step': run_pyswmm, 'batch': run_swmm_batch}
+
+def run_scenario(scenario_name, inp_path, storm_name, node_ids, mode='step', use_cache=True, storm=None):
+    # point the raingage at the selected storm in a temp copy of the scenario inp, then run it
+    # storm: timeseries name already in the inp, or a storms.py spec dict generated into the copy (default storms[storm_name])
+    tmp_inp = os.path.join(
+        tempfile.gettempdir(),
+        f'Inner_Harbor_Model_V24_{scenario_name}_{storm_name}.inp')
+
+    storm = storms[storm_name] if storm is None else storm
+    with stage('storm_inp'):
+        if isinstance(storm, dict):
+            write_storm_inp(inp_path, storm_name, storm, tmp_inp)
+        else:
+            storm_timeseries(inp_path, storm, tmp_inp)
+
+    # skip the simulation if this exact inp was already run for the same nodes/outputs
+    with stage('cache_lookup'):
+        cache = SimulationCache(enabled=use_cache)
+        with open(tmp_inp, 'rb') as f:
+            key = cache.key(f.read(), {'mode': mode, 'nodes': list(node_ids), 'metrics': list(METRICS)})
+        cached = cache.get(key)
+    if cached is not None:
+        TIMER.count('cache_hits')
+        print(f"Using cached results for scenario: {scenario_name} with storm {storm_name}")
+        return series_frame(cached['data'], pd.to_datetime(cached['timestamps']).to_pydatetime().tolist(), node_ids)
+
+    TIMER.count('cache_misses')
+    df_nodes = run_modes[mode](tmp_inp, node_ids)
+    with stage('cache_store'):
+        cache.put(key, {
+            'data': df_nodes.drop(columns='timestamp').to_numpy().reshape(len(df_nodes), len(node_ids), len(METRICS)),
+            'timestamps': pd.to_datetime(df_nodes['timestamp']).to_numpy('datetime64[ns]'),
+        })
+    return df_nodes
+
+def run_scenario_timed(scenario_name, inp_path, storm_name, node_ids, mode='step', use_cache=True, storm=None):
+    # run_scenario plus its stage timings, so pool workers can hand them back to the parent
+    TIMER.start_run()
+    start = time.perf_counter()
+    try:
+        df_nodes = run_scenario(scenario_name, inp_path, storm_name, node_ids, mode=mode, use_cache=use_cache,
+                                storm=storm)
+    finally:
+        timings = {**TIMER.end_run(), 'pid': os.getpid(), 'wall_s': time.perf_counter() - start}
+    return df_nodes, timings
+
+def run_sweep(scenarios, storm_names, node_ids, workers=None, mode='step', use_cache=True, timing_log=None,
+              storm_defs=None):
+    # run every (scenario, storm) pair concurrently, returns {storm: {scenario: df_nodes}}
+    # storm_defs: storm name -> timeseries name or storms.py spec (default: config.storms)
+    storm_defs = storm_defs or storms
+    pairs = [(scenario_name, storm_name) for storm_name in storm_names for scenario_name in scenarios]
+    workers = workers or min(len(pairs), os.cpu_count() or 1)
+    results = {storm_name: {} for storm_name in storm_names}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_scenario_timed, scenario_name, scenarios[scenario_name], storm_name, node_ids,
+                               mode, use_cache, storm_defs[storm_name]):
+                       (scenario_name, storm_name) for scenario_name, storm_name in pairs}
+        for future in as_completed(futures):
+            scenario_name, storm_name = futures[future]
+            results[storm_name][scenario_name], timings = future.result()
+            TIMER.merge(timings)
+            if timing_log is not None:
+                timing_log.write(f'{scenario_name}|{storm_name}', timings, pid=timings['pid'],
+                                 scenario=scenario_name, storm=storm_name)
+            print(f"Finished scenario: {scenario_name} with storm {storm_name}")
+
+    # keep the config.py scenario order so outputs match a serial run
+    return {storm_name: {scenario_name: results[storm_name][scenario_name] for scenario_name in scenarios}
+            for storm_name in storm_names}
+
+def save_and_analyze(scenario_node_results, storm_name, fmt='csv', registry=None):
+    # registry: NodeRegistry supplying neighborhood / historic_stream (default: the Node_Neighborhoods.xlsx dict)
+    # Combine into multiindex dataframes
+    processed_nodes_df = pd.concat(scenario_node_results, names=['scenario'])
+    processed_nodes_df.index.set_names(['scenario', 'row'], inplace=True)
 
-# define node neighborhood tuple
-node_neighborhood_df = pd.read_excel(f'../inputdata/Node_Neighborhoods.xlsx')
-node_neighborhood = dict(zip(node_neighborhood_df['street_node_id'],zip(node_neighborhood_df['neighborhood'], node_neighborhood_df['historic_stream'])))
+    # Save raw simulation outputs
+    with stage('write_raw'):
+        if fmt == 'parquet':
+            # one typed, compressed dataset for all runs, partitioned storm=/scenario=
+            raw_df = processed_nodes_df.reset_index()
+            raw_df.insert(0, 'storm', storm_name)
+            raw_df['timestamp'] = pd.to_datetime(raw_df['timestamp'])
+            write_table(raw_df, os.path.join(output_dir, "simV24_AllNodes.parquet"), fmt, partition_cols=['storm', 'scenario'])
+        else:
+            processed_nodes_df.to_csv(os.path.join(output_dir, f"{storm_name}_simV24_AllNodes.csv"))
+
+    # Run analysis directly on simulation results (max depth + max volume in one pass)
+    node_neighborhood = registry if registry is not None else node_neighborhoods()
+    with stage('peak_metrics'):
+        write_peak_metrics(peak_metrics(processed_nodes_df, node_neighborhood), storm_name)
+    with stage('flood_durations'):
+        write_flood_durations(flood_durations(processed_nodes_df, node_neighborhood, flood_depth_thresholds_m),
+                              storm_name)
+    return processed_nodes_df
+
+# define node neighborhood tuple: street node -> (neighborhood, historic_stream)
+# loaded on first access (node_metadata caches the parsed workbook), so importing this module stays cheap
+def __getattr__(name):
+    if name == 'node_neighborhood':
+        return node_neighborhoods()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 ##### data analysis functions #####
+@TIMER.timed('find_max_depth')
 def find_max_depth(processed_df, node_neighborhood, storm_name):
-    # 1. Group and Pivot Logic
-    grouped_df = processed_df.groupby(level=0).max()
-    depth_cols = [col for col in grouped_df.columns if col.endswith('_depth')]
-    max_depth_df = grouped_df[depth_cols]
-
-    # Scenarios become columns, nodes become rows
-    max_depth_df = max_depth_df.reset_index()
-    max_depth_df = max_depth_df.set_index('scenario').T
-    max_depth_df = max_depth_df.reset_index().rename(columns={'index': 'node_name'})
-    max_depth_df = max_depth_df.reset_index(drop=True)
-
-    # Add metadata
-    max_depth_df['node_id'] = max_depth_df['node_name'].str.extract(r'([^_]+)')[0]
-    max_depth_df['neighborhood'] = max_depth_df['node_id'].map(lambda x: node_neighborhood[x][0])
-    max_depth_df['historic_stream'] = max_depth_df['node_id'].map(lambda x: node_neighborhood[x][1])
-
-    # ID columns
-    metadata_cols = ['node_name', 'node_id', 'neighborhood', 'historic_stream']
-    scenario_names = [col for col in max_depth_df.columns if col not in metadata_cols]
-
-    # evaluate max depths of all scenarios
-    peak_depth_rows = []
-    avg_depth_rows = []
-    for scenario in scenario_names:
-        max_val = max_depth_df[scenario].max()
-        max_node = max_depth_df.loc[max_depth_df[scenario].idxmax(), 'node_name']
-        peak_depth_rows.append({'scenario': scenario, 'node_name': max_node, 'peak_depth_m': max_val})
-
-        avg_val = max_depth_df[scenario].mean()
-        avg_depth_rows.append({'scenario': scenario, 'avg_depth_m': avg_val})
-
-    peak_depth_summary = pd.DataFrame(peak_depth_rows)
-    avg_depth_summary = pd.DataFrame(avg_depth_rows)
-
-    # compute relative change (Scenario - Base)
-    relative_change_in_depth = max_depth_df[scenario_names].copy()
-
-    if 'Base' in relative_change_in_depth.columns:
-        relative_change_in_depth = relative_change_in_depth.sub(max_depth_df['Base'], axis=0)
-
-    for col in metadata_cols:
-        relative_change_in_depth[col] = max_depth_df[col]
-
-    # summarize depth results
-    non_base_scenarios = [s for s in scenario_names if s != 'Base']
-
-    print("Scenarios in relative_change_in_depth:", relative_change_in_depth.columns.tolist())
-    print("Non-base scenarios:", non_base_scenarios)
-
-    rel_depth_rows = []
-    for scenario in non_base_scenarios:
-        avg_change = relative_change_in_depth[scenario].mean()
-
-        incr = relative_change_in_depth[scenario].max()
-        incr_idx = relative_change_in_depth[scenario].idxmax()
-        incr_node = relative_change_in_depth.loc[incr_idx, 'node_name']
-        base_depth_incr = max_depth_df.loc[incr_idx, 'Base']
-        pct_change_incr = (incr / base_depth_incr * 100) if base_depth_incr > 0 else float('inf')
-
-        abs_vals = relative_change_in_depth[scenario].abs()
-        idx_abs_max = abs_vals.idxmax()
-        max_val = relative_change_in_depth.loc[idx_abs_max, scenario]
-        max_node = relative_change_in_depth.loc[idx_abs_max, 'node_name']
-        base_depth_abs = max_depth_df.loc[idx_abs_max, 'Base']
-        pct_change_abs = (max_val / base_depth_abs * 100) if base_depth_abs > 0 else float('inf')
-
-        rel_depth_rows.append({
-            'scenario': scenario,
-            'avg_peak_change_m': avg_change, # change in average depth (flood reduction) at moment of peak flooding
-            'peak_abs_change_m': max_val, # single largest change in depth at moment of peak flooding, new scenario
-            'peak_abs_change_node': max_node, # location of single largest change in depth at moment of peak flooding
-            'base_depth_abs_m': base_depth_abs, # single largest change in depth at moment of peak flooding, base scenario
-            'pct_change_abs': pct_change_abs, # % change largest flood depth
-            'peak_increase_m': incr, # single largest deterioration (deeper flooding) in depth at moment of peak flooding
-            'peak_increase_node': incr_node, # location of deterioration
-            'base_depth_incr_m': base_depth_incr, # depths at deterioration location in base scenariio
-            'pct_change_incr': pct_change_incr, # % change in deterioration in depth at moment of peak flooding
-        })
-    rel_depth_summary = pd.DataFrame(rel_depth_rows)
-
-    # save
-    max_depth_df.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_MaxDepth.csv', index=False)
-    relative_change_in_depth.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_RelativeDepth.csv', index=False)
-    peak_depth_summary.merge(avg_depth_summary, on='scenario').to_csv(f'../outputdata/{storm_name}_V24_AllNodes_DepthSummary.csv', index=False)
-    rel_depth_summary.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_RelativeDepthSummary.csv', index=False)
-
-    return max_depth_df, relative_change_in_depth
+    tables = peak_metrics(processed_df, node_neighborhood, metrics=('depth',))
+    write_peak_metrics(tables, storm_name)
+    return tables['depth']['max'], tables['depth']['relative']
 
+@TIMER.timed('find_max_vol')
 def find_max_vol(processed_df, node_neighborhood, storm_name):
-    # 1. Group and Pivot Logic
-    grouped_df = processed_df.groupby(level=0).max()
-    vol_cols = [col for col in grouped_df.columns if col.endswith('_volume')]
-    max_vol_df = grouped_df[vol_cols]
-
-    # Scenarios become columns, nodes become rows
-    max_vol_df = max_vol_df.reset_index()
-    max_vol_df = max_vol_df.set_index('scenario').T
-    max_vol_df = max_vol_df.reset_index().rename(columns={'index': 'node_name'})
-    max_vol_df = max_vol_df.reset_index(drop=True)
-
-    # Add metadata
-    max_vol_df['node_id'] = max_vol_df['node_name'].str.extract(r'([^_]+)')[0]
-    max_vol_df['neighborhood'] = max_vol_df['node_id'].map(lambda x: node_neighborhood[x][0])
-    max_vol_df['historic_stream'] = max_vol_df['node_id'].map(lambda x: node_neighborhood[x][1])
-
-    # ID columns
-    metadata_cols = ['node_name', 'node_id', 'neighborhood', 'historic_stream']
-    scenario_names = [col for col in max_vol_df.columns if col not in metadata_cols]
-
-    # evaluate max volumes of all scenarios
-    peak_vol_rows = []
-    avg_vol_rows = []
-    for scenario in scenario_names:
-        max_val = max_vol_df[scenario].max()
-        max_node = max_vol_df.loc[max_vol_df[scenario].idxmax(), 'node_name']
-        peak_vol_rows.append({'scenario': scenario, 'node_name': max_node, 'peak_vol_m': max_val})
-
-        avg_val = max_vol_df[scenario].mean()
-        avg_vol_rows.append({'scenario': scenario, 'avg_vol_m': avg_val})
-
-    peak_vol_summary = pd.DataFrame(peak_vol_rows)
-    avg_vol_summary = pd.DataFrame(avg_vol_rows)
-
-    # compute relative change (Scenario - Base)
-    relative_change_in_vol = max_vol_df[scenario_names].copy()
-
-    if 'Base' in relative_change_in_vol.columns:
-        relative_change_in_vol = relative_change_in_vol.sub(max_vol_df['Base'], axis=0)
-
-    for col in metadata_cols:
-        relative_change_in_vol[col] = max_vol_df[col]
-
-    # summarize voluume results
-    non_base_scenarios = [s for s in scenario_names if s != 'Base']
-
-    print("Scenarios in relative_change_in_vol:", relative_change_in_vol.columns.tolist())
-    print("Non-base scenarios:", non_base_scenarios)
-
-    rel_vol_rows = []
-    for scenario in non_base_scenarios:
-        avg_change = relative_change_in_vol[scenario].mean()
-
-        incr = relative_change_in_vol[scenario].max()
-        incr_idx = relative_change_in_vol[scenario].idxmax()
-        incr_node = relative_change_in_vol.loc[incr_idx, 'node_name']
-        base_vol_incr = max_vol_df.loc[incr_idx, 'Base']
-        pct_change_incr = (incr / base_vol_incr * 100) if base_vol_incr > 0 else float('inf')
-
-        abs_vals = relative_change_in_vol[scenario].abs()
-        idx_abs_max = abs_vals.idxmax()
-        max_val = relative_change_in_vol.loc[idx_abs_max, scenario]
-        max_node = relative_change_in_vol.loc[idx_abs_max, 'node_name']
-        base_vol_abs = max_vol_df.loc[idx_abs_max, 'Base']
-        pct_change_abs = (max_val / base_vol_abs * 100) if base_vol_abs > 0 else float('inf')
-
-        rel_vol_rows.append({
-            'scenario': scenario,
-            'avg_peak_change_m': avg_change, # change in average vol (flood reduction) at moment of peak flooding
-            'peak_abs_change_m': max_val, # single largest change in vol at moment of peak flooding, new scenario
-            'peak_abs_change_node': max_node, # location of single largest change in vol at moment of peak flooding
-            'base_vol_abs_m': base_vol_abs, # single largest change in vol at moment of peak flooding, base scenario
-            'pct_change_abs': pct_change_abs, # % change largest flood vol
-            'peak_increase_m': incr, # single largest deterioration (deeper flooding) in vol at moment of peak flooding
-            'peak_increase_node': incr_node, # location of deterioration
-            'base_vol_incr_m': base_vol_incr, # vols at deterioration location in base scenariio
-            'pct_change_incr': pct_change_incr, # % change in deterioration in vol at moment of peak flooding
-        })
-    rel_vol_summary = pd.DataFrame(rel_vol_rows)
-
-    # save
-    max_vol_df.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_MaxVolume.csv', index=False)
-    relative_change_in_vol.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_RelativeVolume.csv', index=False)
-    peak_vol_summary.merge(avg_vol_summary, on='scenario').to_csv(f'../outputdata/{storm_name}_V24_AllNodes_VolumeSummary.csv', index=False)
-    rel_vol_summary.to_csv(f'../outputdata/{storm_name}_V24_AllNodes_RelativeVolumeSummary.csv', index=False)
-
-    return max_vol_df, relative_change_in_vol
+    tables = peak_metrics(processed_df, node_neighborhood, metrics=('volume',))
+    write_peak_metrics(tables, storm_name)
+    return tables['volume']['max'], tables['volume']['relative']
 
 ###### EXECUTION ##### ------------------------------------------------------------------------------------------------------------
 if __name__ == "__main__":
-    # Clean all rpt files
-    for name, inp_path in scenarios.items():
-        rpt_path = os.path.splitext(inp_path)[0] + '.rpt'
-        if os.path.isfile(rpt_path):
-            print(f"Cleaning report file: {rpt_path}")
-            clean_rpt_encoding(rpt_path)
-
-    # Find street node names
-    model_path = scenarios['Base']
-    model = swmmio.Model(model_path)
-    node_ids = list_street_nodes(model)
-    node_ids.remove('J509-S')  # exclude patterson park pond node - don't want to measure water level in pond
-
-    # Change storm execution
-    selected_storm = '6_27_23' # CHANGE to a storm name ALREADY in your inp
-    storm_ts = storms[selected_storm]
-
-    # Run simulations
-    scenario_node_results = {}
-
-    for scenario_name, inp_path in scenarios.items():
-        print(f"Running scenario: {scenario_name} with storm {selected_storm}")
-
-        tmp_inp = os.path.join(
-            tempfile.gettempdir(),
-            f'Inner_Harbor_Model_V24_{scenario_name}.inp')
-
-        storm_timeseries(inp_path, storm_ts, tmp_inp)
-
-        df_nodes = run_pyswmm(tmp_inp, node_ids)
-        scenario_node_results[scenario_name] = df_nodes
-
-    # Combine into multiindex dataframes
-    processed_nodes_df = pd.concat(scenario_node_results, names=['scenario'])
-    processed_nodes_df.index.set_names(['scenario', 'row'], inplace=True)
-
-    # Save raw simulation outputs
-    processed_nodes_df.to_csv(f"../outputdata/{selected_storm}_simV24_AllNodes.csv")
-
-    # Run analysis directly on simulation results
-    find_max_depth(processed_nodes_df, node_neighborhood, selected_storm)
-    find_max_vol(processed_nodes_df, node_neighborhood, selected_storm)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run SWMM adaptation scenarios and analyze street node flooding")
+    parser.add_argument("--storm", default='6_27_23', choices=list(storms),
+                        help="storm from config.storms to run (must already exist in the inp)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="run every scenario x storm pair from config.py in a process pool")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for --sweep (default: one per pair, capped at CPU count)")
+    parser.add_argument("--multipliers", type=float, nargs="+", default=None,
+                        help="depth multipliers for --storm; each scaled storm x scenario is generated and run in parallel")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="with --multipliers, also stretch the storm's time axis by this factor")
+    parser.add_argument("--shift-min", type=float, default=0.0,
+                        help="with --multipliers, also shift the storm by this many minutes")
+    parser.add_argument("--design", nargs="+", default=None, choices=list(design_storms),
+                        help="design storms from config.design_storms to generate and run in parallel")
+    parser.add_argument("--mode", default='step', choices=list(run_modes),
+                        help="step: sample nodes through pyswmm every 5 min; batch: run natively and read the .out file "
+                             "(same rows; values are SWMM's reported ones, so they can differ slightly)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always re-run SWMM instead of reusing cached results for identical inp files")
+    parser.add_argument("--format", default='csv', choices=FORMATS,
+                        help="raw simulation output format; parquet writes a storm/scenario partitioned dataset")
+    parser.add_argument("--profile", default=None,
+                        help="write cProfile stats of the whole run to this file (py-spy can attach to --sweep workers)")
+    args = parser.parse_args()
+
+    # per scenario x storm stage timings; the breakdown table is printed and saved at the end
+    with profiled(args.profile), TimingLog(os.path.join(output_dir, "simV24_timings.jsonl")) as timing_log:
+        # Clean all rpt files
+        for name, inp_path in scenarios.items():
+            rpt_path = os.path.splitext(inp_path)[0] + '.rpt'
+            if os.path.isfile(rpt_path):
+                print(f"Cleaning report file: {rpt_path}")
+                clean_rpt_encoding(rpt_path)
+
+        # Find street node names (integer-indexed registry with neighborhood codes and coordinates)
+        model_path = scenarios['Base']
+        registry = NodeRegistry.of(model_path, exclude=['J509-S'])  # exclude patterson park pond node - don't want to measure water level in pond
+        node_ids = registry.ids.tolist()
+
+        # Change storm execution
+        if args.multipliers or args.design:
+            # generated storms: scaled variants of --storm and/or design storms, all run as one parallel batch
+            storm_defs = {variant_name(args.storm, k, args.time_scale, args.shift_min):
+                              {'base': storms[args.storm], 'depth': k, 'duration': args.time_scale,
+                               'shift_min': args.shift_min}
+                          for k in args.multipliers or []}
+            storm_defs.update({name: design_storms[name] for name in args.design or []})
+            print(f"Running generated storms: {len(scenarios)} scenarios x {len(storm_defs)} storms")
+            sweep_results = run_sweep(scenarios, list(storm_defs), node_ids, workers=args.workers, mode=args.mode,
+                                      use_cache=not args.no_cache, timing_log=timing_log, storm_defs=storm_defs)
+            for storm_name, scenario_node_results in sweep_results.items():
+                save_and_analyze(scenario_node_results, storm_name, fmt=args.format, registry=registry)
+        elif args.sweep:
+            # Run all scenario x storm simulations concurrently, then analyze each storm
+            print(f"Running sweep: {len(scenarios)} scenarios x {len(storms)} storms")
+            sweep_results = run_sweep(scenarios, list(storms), node_ids, workers=args.workers, mode=args.mode,
+                                      use_cache=not args.no_cache, timing_log=timing_log)
+            for storm_name, scenario_node_results in sweep_results.items():
+                save_and_analyze(scenario_node_results, storm_name, fmt=args.format, registry=registry)
+        else:
+            selected_storm = args.storm # CHANGE to a storm name ALREADY in your inp
+
+            # Run simulations
+            scenario_node_results = {}
+
+            for scenario_name, inp_path in scenarios.items():
+                print(f"Running scenario: {scenario_name} with storm {selected_storm}")
+                scenario_node_results[scenario_name], timings = run_scenario_timed(
+                    scenario_name, inp_path, selected_storm, node_ids, mode=args.mode, use_cache=not args.no_cache)
+                TIMER.merge(timings)
+                timing_log.write(f'{scenario_name}|{selected_storm}', timings, pid=timings['pid'],
+                                 scenario=scenario_name, storm=selected_storm)
+
+            save_and_analyze(scenario_node_results, selected_storm, fmt=args.format, registry=registry)
+
+    TIMER.table().to_csv(os.path.join(output_dir, "simV24_timings.csv"), index=False)
+    print(TIMER.report("Timing"))
@@ -4,124 +4,114 @@
 # NOTE: if you want to run different scenarios, change the column headers scenario names in 'plot_cols'
 # IMPORTS --------------------------------------------------------------------------------------------------------------
 import pandas as pd
+import numpy as np
 import os
-import matplotlib as mpl
-import math
+import sys
 import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import matplotlib.colors as mcolors
+from matplotlib.collections import PolyCollection
+# run as a file (python scripts/BSEC_SWMM_plotter.py) only scripts/ is on sys.path; scripts.* imports need the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.columnar import is_parquet, read_table, table_columns
+from scripts.config import figures_dir, output_dir
 
 # DEFINITIONS ----------------------------------------------------------------------------------------------------------
 # can use BE_nodes to plot a subset of locations. BE_nodes is sequential, upstream to downstream.
 
-def depth_stackplot(relative_depth_df, name):
+# neighborhoods drawn in colour, all other nodes are light grey
+HIGHLIGHT_NEIGHBORHOODS = ['Broadway East', 'Dunbar-Broadway', 'Eager Park']
+
+# per metric: stripe colour, stripe height (in data units), y limits, y label and title
+STACKPLOT_STYLES = {
+    'depth': {'color': 'mediumpurple', 'bar_height': 0.0025, 'ylim': (-0.15, 0.05),
+              'ylabel': 'change in depth (m)', 'title': 'Depth of Flooding'},
+    'volume': {'color': 'yellowgreen', 'bar_height': 0.65, 'ylim': (-40, 10),
+               'ylabel': 'change in volume (m\u00b3)', 'title': 'volume of flooding'},
+}
+
+def stackplot(relative_df, name, metric='depth', plot_cols=('V', 'I', 'V&I'), out_dir=figures_dir,
+              formats=('png', 'svg'), bar_width=0.3, **style):
+    # one horizontal stripe per node and scenario, drawn as a single PolyCollection per scenario
+    style = {**STACKPLOT_STYLES[metric], **style}
     fig, ax = plt.subplots(figsize=(10, 4))
-    plot_cols = ['V', 'I', 'V&I']
+    plot_cols = list(plot_cols)
 
     # X positions for each scenario
-    x_positions = list(range(1, len(plot_cols) + 1))
-    bar_width = 0.3
-    bar_height = 0.0025
-
-    # plot only broadway east as color
-    unique_neighborhoods = sorted(relative_depth_df['neighborhood'].unique())
-    num_neigh = len(unique_neighborhoods)
-    colors = ['mediumpurple' if n == 'Broadway East' or n == 'Dunbar-Broadway' or n == 'Eager Park' else 'lightgrey' for
-              n in unique_neighborhoods]
-
-    for idx, scenario in enumerate(plot_cols):
-        depth_changes = relative_depth_df[scenario]
-        neighborhoods = relative_depth_df['neighborhood']
-
-        # Plot each change value as a horizontal stripe
-        for depth, neigh in zip(depth_changes, neighborhoods):
-            # Determine color for this specific neighborhood
-            color = 'mediumpurple' if neigh in ['Broadway East', 'Dunbar-Broadway', 'Eager Park'] else 'lightgrey'
-
-            rect = plt.Rectangle((x_positions[idx] - bar_width / 2, depth - bar_height / 2),
-                                 bar_width, bar_height,
-                                 facecolor=color, alpha=0.5, linewidth=1)
-            ax.add_patch(rect)
+    x_positions = np.arange(1, len(plot_cols) + 1)
+
+    # colour per node from the neighborhood column, computed once for every scenario
+    highlight = relative_df['neighborhood'].isin(HIGHLIGHT_NEIGHBORHOODS).to_numpy()
+    colors = np.where(highlight[:, None], mcolors.to_rgba(style['color'], 0.5),
+                      mcolors.to_rgba('lightgrey', 0.5))
+
+    half_w, half_h = bar_width / 2, style['bar_height'] / 2
+    for x, scenario in zip(x_positions, plot_cols):
+        changes = relative_df[scenario].to_numpy(dtype=float)
+        keep = ~np.isnan(changes)
+        y = changes[keep]
+
+        # (stripes, 4 corners, xy) rectangle outlines
+        verts = np.empty((len(y), 4, 2))
+        verts[:, [0, 3], 0] = x - half_w
+        verts[:, [1, 2], 0] = x + half_w
+        verts[:, :2, 1] = (y - half_h)[:, None]
+        verts[:, 2:, 1] = (y + half_h)[:, None]
+
+        # rasterized in vector output, so SVG size does not grow with the node count
+        ax.add_collection(PolyCollection(verts, facecolors=colors[keep], edgecolors='none', rasterized=True))
 
     # Add a horizontal line at y=0 for reference
     ax.axhline(y=0, color='grey', linestyle='dotted', linewidth=1, alpha=0.5, label='No change')
 
     # labels
     ax.set_xlabel('Scenario')
-    ax.set_ylabel('change in depth (m)')
-    ax.set_ylim(-0.15,0.05)
-    ax.set_title(f'{name} Storm: Depth of Flooding')
+    ax.set_ylabel(style['ylabel'])
+    ax.set_ylim(*style['ylim'])
+    ax.set_title(f"{name} Storm: {style['title']}")
     ax.set_xticks(x_positions)
     ax.set_xticklabels(plot_cols)
     ax.set_xlim(0.5, len(plot_cols) + 0.5)
 
     plt.tight_layout()
     #plt.show()
-    save_path = f'../plots/nodes/{name}_relative_stackplot_depth_V24.png'
-    svg_path = f'../plots/nodes/{name}_relative_stackplot_depth_V24.svg'
-    plt.savefig(save_path)
-    plt.savefig(svg_path)
+    os.makedirs(out_dir, exist_ok=True)
+    for fmt in formats:
+        # png keeps the default resolution; 300 dpi for the rasterized stripes inside vector files
+        fig.savefig(f'{out_dir}/{name}_relative_stackplot_{metric}_V24.{fmt}', dpi=None if fmt == 'png' else 300)
+    plt.close(fig)
 
-def volume_stackplot(relative_vol_df, name):
-    fig, ax = plt.subplots(figsize=(10, 4))
-    plot_cols = ['V', 'I', 'V&I']
+def depth_stackplot(relative_depth_df, name, plot_cols=('V', 'I', 'V&I')):
+    stackplot(relative_depth_df, name, 'depth', plot_cols)
 
-    # X positions for each scenario
-    x_positions = list(range(1, len(plot_cols) + 1))
-    bar_width = 0.3
-    bar_height = 0.65
-
-    # plot only broadway east as color
-    unique_neighborhoods = sorted(relative_vol_df['neighborhood'].unique())
-    num_neigh = len(unique_neighborhoods)
-    colors = ['mediumpurple' if n == 'Broadway East' or n == 'Dunbar-Broadway' or n == 'Eager Park' else 'lightgrey' for
-              n in unique_neighborhoods]
-
-    for idx, scenario in enumerate(plot_cols):
-        vol_changes = relative_volume_df[scenario]
-        neighborhoods = relative_volume_df['neighborhood']
-
-        # Plot each change value as a horizontal stripe
-        for vol, neigh in zip(vol_changes, neighborhoods):
-            # Determine color for this specific neighborhood
-            color = 'yellowgreen' if neigh in ['Broadway East', 'Dunbar-Broadway', 'Eager Park'] else 'lightgrey'
-
-            rect = plt.Rectangle((x_positions[idx] - bar_width / 2, vol - bar_height / 2),
-                                 bar_width, bar_height,
-                                 facecolor=color, alpha=0.5, linewidth=1)
-            ax.add_patch(rect)
+def volume_stackplot(relative_vol_df, name, plot_cols=('V', 'I', 'V&I')):
+    stackplot(relative_vol_df, name, 'volume', plot_cols)
 
-    # Add a horizontal line at y=0 for reference
-    ax.axhline(y=0, color='grey', linestyle='dotted', linewidth=1, alpha=0.5, label='No change')
+def load_node_series(storm_name, metric='depth', scenarios=None, path=os.path.join(output_dir, 'simV24_AllNodes.parquet')):
+    # raw simulation time series for one storm, reading only the {node}_{metric} columns
+    if not is_parquet(path) or not os.path.exists(path):
+        path = os.path.join(output_dir, f'{storm_name}_simV24_AllNodes.csv')
+    metric_cols = [c for c in table_columns(path) if c.endswith(f'_{metric}')]
 
-    # Customize the plot
-    ax.set_xlabel('Scenario')
-    ax.set_ylabel('change in volume (m\u00b3)')
-    ax.set_ylim(-40,10)
-    ax.set_title(f'{name} Storm: volume of flooding')
-    ax.set_xticks(x_positions)
-    ax.set_xticklabels(plot_cols)
-    ax.set_xlim(0.5, len(plot_cols) + 0.5)
+    if is_parquet(path):
+        filters = [('storm', '==', storm_name)]
+        if scenarios:
+            filters.append(('scenario', 'in', list(scenarios)))
+        return read_table(path, columns=['scenario', 'row', 'timestamp'] + metric_cols, filters=filters)
 
-    plt.tight_layout()
-    #plt.show()
-    save_path = f'../figures{name}_relative_stackplot_volume_V24.png'
-    svg_path = f'../figures/{name}_relative_stackplot_volume_V24.svg'
-    plt.savefig(save_path)
-    plt.savefig(svg_path)
+    series_df = read_table(path, columns=['scenario', 'row', 'timestamp'] + metric_cols)
+    return series_df[series_df['scenario'].isin(scenarios)] if scenarios else series_df
 
 # EXECUTION ------------------------------------------------------------------------------------------------------------
 if __name__ == "__main__":
-    # load dfs
+    # load dfs, only the columns the plots use (csv or parquet)
+    storm_name = '6_27_23'
+    plot_cols = ['V', 'I', 'V&I']
 
-    max_depth_df = pd.read_csv('../outputdata/6_27_23_V24_AllNodes_MaxDepth.csv')
-    relative_depth_df = pd.read_csv('../outputdata/6_27_23_V24_AllNodes_RelativeDepth.csv').drop(['Unnamed: 0'], axis=1)
-    relative_volume_df = pd.read_csv('../outputdata/6_27_23_V24_AllNodes_RelativeVolume.csv').drop(['Unnamed: 0'], axis=1)
-    max_volume_df = pd.read_csv( '../outputdata/6_27_23_V24_AllNodes_MaxVolume.csv').drop(['Unnamed: 0'], axis=1)
-    depth_ts_df = pd.read_csv('../outputdata/6_27_23_simV24_AllNodes.csv')
+    relative_depth_df = read_table(os.path.join(output_dir, f'{storm_name}_V24_AllNodes_RelativeDepth.csv'),
+                                   columns=plot_cols + ['neighborhood'])
+    relative_volume_df = read_table(os.path.join(output_dir, f'{storm_name}_V24_AllNodes_RelativeVolume.csv'),
+                                    columns=plot_cols + ['neighborhood'])
 
-    storm_name = '6_27_23'
     #execute, note 'relative' functions means the result is relative to base case
-    depth_stackplot(relative_depth_df, storm_name)
-    volume_stackplot(relative_volume_df, storm_name)
-    node_neighborhood_df = pd.read_excel('../inputdata/Node_Neighborhoods.xlsx')
-
+    depth_stackplot(relative_depth_df, storm_name, plot_cols)
+    volume_stackplot(relative_volume_df, storm_name, plot_cols)
@@ -0,0 +1,296 @@
+"""
+Benchmark suite for the simulation and analysis hot paths
+Per-stage wall time (best / median of repeats) and peak Python heap (tracemalloc)
+Real inputs (V24 models, uq_results.csv) plus synthetic scale-up of nodes, runs and time steps
+Results: outputdata/benchmarks/bench_<preset>_<timestamp>.json, compare two files with --compare
+"""
+
+import argparse
+import atexit
+import datetime as dt
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+if REPO_DIR not in sys.path:  # scripts.* imports resolve when run as a file
+    sys.path.insert(0, REPO_DIR)
+
+from scripts.config import output_dir, scenarios, uq_results_path
+
+BASE_INP = scenarios["Base"]
+RESULTS_DIR = os.path.join(output_dir, "benchmarks")
+
+# render_samples: apply_sample calls; runs / node_scale: UQ table size (real table resampled / tiled);
+# steps: time steps per scenario in the synthetic analysis frame; sim_models: models for run_pyswmm
+PRESETS = {
+    "small": {"render_samples": 50, "runs": 500, "node_scale": 1, "steps": 707, "n_bootstrap": 2000,
+              "sim_models": ["Base"], "repeat": 5, "sim_repeat": 1},
+    "large": {"render_samples": 1000, "runs": 5000, "node_scale": 10, "steps": 2880, "n_bootstrap": 2000,
+              "sim_models": list(scenarios), "repeat": 3, "sim_repeat": 2},
+}
+
+# name -> (setup(cfg) -> (callable, params), runs SWMM)
+STAGES = {}
+
+
+def stage(name, sim=False):
+    def register(setup):
+        STAGES[name] = (setup, sim)
+        return setup
+    return register
+
+
+# ---------------------------------------------------------------------------
+# INPUTS
+# ---------------------------------------------------------------------------
+
+def uq_table(runs, node_scale, seed=0):
+    """uq_results-like table: real runs resampled to `runs` rows, node columns tiled node_scale times."""
+    from scripts.BSEC_SWMM_UQ import PARAM_DEFS
+
+    real = pd.read_csv(uq_results_path)
+    real = real[real["status"] == "OK"]
+    params = [p["label"] for p in PARAM_DEFS]
+    depth = [c for c in real.columns if c.startswith("max_depth_")]
+
+    rng = np.random.default_rng(seed)
+    rows = np.arange(runs) if runs <= len(real) else rng.integers(0, len(real), runs)
+    X = real[params].to_numpy(dtype=np.float64)[rows % len(real)]
+    Y = real[depth].to_numpy(dtype=np.float64)[rows % len(real)]
+    if runs > len(real):  # jitter duplicated runs so ranks are not all tied
+        X = X * rng.uniform(0.99, 1.01, X.shape)
+        Y = Y * rng.uniform(0.99, 1.01, Y.shape)
+    Y = np.tile(Y, node_scale)
+    columns = [f"{c}_{k}" if k else c for k in range(node_scale) for c in depth]
+    return X, Y, params, columns
+
+
+def processed_frame(steps, node_scale, scenarios=("Base", "I", "V", "V&I"), seed=0):
+    """Stacked (scenario, row) frame shaped like save_and_analyze's, with synthetic storm-like depth series."""
+    from scripts.node_capture import METRICS, series_frame
+
+    rng = np.random.default_rng(seed)
+    n_nodes = 126 * node_scale
+    node_ids = [f"J{i}-S" for i in range(n_nodes)]
+    times = (pd.Timestamp("2023-06-27") + pd.to_timedelta(np.arange(steps) * 300, unit="s")).to_pydatetime().tolist()
+
+    # one hydrograph-shaped pulse per node, scaled per scenario
+    t = np.linspace(0, 1, steps)[:, None]
+    peak_at, width = rng.uniform(0.2, 0.6, n_nodes), rng.uniform(0.02, 0.1, n_nodes)
+    pulse = np.exp(-((t - peak_at) / width) ** 2)
+    frames = {}
+    for k, scenario in enumerate(scenarios):
+        data = np.empty((steps, n_nodes, len(METRICS)))
+        data[..., 0] = pulse * rng.uniform(0.0, 0.5, n_nodes) * (1 - 0.1 * k)
+        data[..., 1] = pulse * rng.uniform(0.0, 2.0, n_nodes)
+        data[..., 2] = pulse * rng.uniform(0.0, 100.0, n_nodes)
+        frames[scenario] = series_frame(data, times, node_ids)
+    df = pd.concat(frames, names=["scenario"])
+    df.index.set_names(["scenario", "row"], inplace=True)
+    neighborhoods = {n: (f"hood{i % 12}", f"stream{i % 5}") for i, n in enumerate(node_ids)}
+    return df, neighborhoods
+
+
+def street_nodes(inp_path):
+    from scripts.node_registry import street_node_ids
+
+    return [n for n in street_node_ids(inp_path) if n != "J509-S"]
+
+
+# ---------------------------------------------------------------------------
+# STAGES
+# ---------------------------------------------------------------------------
+
+@stage("apply_sample")
+def _apply_sample(cfg):
+    from scripts.BSEC_SWMM_UQ import ParamTemplate, apply_sample, build_lhs_samples
+
+    template = ParamTemplate(BASE_INP)
+    samples = build_lhs_samples(cfg["render_samples"]).to_dict("records")
+    return (lambda: [apply_sample(template, s) for s in samples]), {"samples": len(samples)}
+
+
+@stage("run_simulation", sim=True)
+def _run_simulation(cfg):
+    import scripts.BSEC_SWMM_UQ as uq
+    from swmm_api import SwmmInput
+
+    uq.SURFACE_NODES = [n for n in SwmmInput.read_file(BASE_INP).STORAGE.keys() if n.endswith("-S")]
+    uq.SIM_CACHE = None
+    template = uq.ParamTemplate(BASE_INP)
+    inp_bytes = uq.apply_sample(template, uq.build_lhs_samples(1).to_dict("records")[0])
+    return (lambda: uq.run_simulation(inp_bytes)), {"nodes": len(uq.SURFACE_NODES)}
+
+
+@stage("run_pyswmm", sim=True)
+def _run_pyswmm(cfg):
+    from scripts.BSEC_SWMM_analysis import run_pyswmm
+
+    # run copies, so the engine's .rpt/.out never touch inputdata/
+    tmp_dir = tempfile.mkdtemp(prefix="swmm_bench_")
+    atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+    models = {name: shutil.copy(scenarios[name], tmp_dir) for name in cfg["sim_models"]}
+    node_ids = street_nodes(BASE_INP)
+    return (lambda: [run_pyswmm(path, node_ids) for path in models.values()]), \
+        {"models": list(models), "nodes": len(node_ids)}
+
+
+@stage("peak_metrics")
+def _peak_metrics(cfg):
+    from scripts.peak_metrics import peak_metrics
+
+    df, neighborhoods = processed_frame(cfg["steps"], cfg["node_scale"])
+    return (lambda: peak_metrics(df, neighborhoods)), {"rows": len(df), "columns": df.shape[1]}
+
+
+@stage("flood_durations")
+def _flood_durations(cfg):
+    from scripts.flood_duration import flood_durations
+
+    df, neighborhoods = processed_frame(cfg["steps"], cfg["node_scale"])
+    return (lambda: flood_durations(df, neighborhoods)), {"rows": len(df), "columns": df.shape[1]}
+
+
+@stage("sensitivity")
+def _sensitivity(cfg):
+    from scripts.sensitivity import sensitivity_table, spearman_matrix
+
+    X, Y, params, outputs = uq_table(cfg["runs"], cfg["node_scale"])
+
+    def run():
+        rho, p_value, _ = spearman_matrix(X, Y)
+        return sensitivity_table(rho, p_value, params, outputs)
+    return run, {"runs": len(X), "outputs": Y.shape[1]}
+
+
+@stage("bootstrap_ci")
+def _bootstrap_ci(cfg):
+    from scripts.bootstrap import bootstrap_ci
+
+    _, Y, _, _ = uq_table(cfg["runs"], cfg["node_scale"])
+    return (lambda: bootstrap_ci(Y, n_bootstrap=cfg["n_bootstrap"])), \
+        {"runs": len(Y), "nodes": Y.shape[1], "n_bootstrap": cfg["n_bootstrap"]}
+
+
+# ---------------------------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------------------------
+
+def measure(fn, repeat):
+    """Wall times of `repeat` calls, then one more call under tracemalloc for the peak Python heap."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"best_s": min(times), "median_s": statistics.median(times), "times_s": times,
+            "peak_mb": peak / 1024 ** 2}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(preset, stages, skip_sim=False):
+    cfg = PRESETS[preset]
+    results = {
+        "meta": {
+            "preset": preset, "config": cfg, "commit": git_commit(),
+            "timestamp": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpu_count": os.cpu_count(),
+        },
+        "stages": {},
+    }
+    for name in stages:
+        setup, sim = STAGES[name]
+        if sim and skip_sim:
+            continue
+        print(f"[Bench] {name} ...", end=" ", flush=True)
+        try:
+            fn, params = setup(cfg)
+            result = measure(fn, cfg["sim_repeat"] if sim else cfg["repeat"])
+        except Exception as exc:
+            results["stages"][name] = {"error": repr(exc)}
+            print(f"ERROR: {exc}")
+            continue
+        results["stages"][name] = {**result, "params": params}
+        print(f"best {result['best_s']:.4f} s, median {result['median_s']:.4f} s, peak {result['peak_mb']:.1f} MB")
+
+    # includes the SWMM engine's C allocations, which tracemalloc does not see
+    results["meta"]["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def compare(old, new, tolerance):
+    """Print best-time ratios new/old per stage; returns the stages slower than `tolerance`."""
+    regressions = []
+    if old["meta"]["preset"] != new["meta"]["preset"]:
+        print(f"[Bench] Warning: comparing preset '{new['meta']['preset']}' against '{old['meta']['preset']}'")
+    print(f"{'stage':<18} {'old best (s)':>12} {'new best (s)':>12} {'ratio':>7} {'peak MB old/new':>16}")
+    for name, stats in new["stages"].items():
+        before = old["stages"].get(name)
+        if "error" in stats or not before or "error" in before:
+            continue
+        ratio = stats["best_s"] / before["best_s"] if before["best_s"] > 0 else np.inf
+        flag = "  <-- slower" if ratio > tolerance else ""
+        print(f"{name:<18} {before['best_s']:>12.4f} {stats['best_s']:>12.4f} {ratio:>7.2f} "
+              f"{before['peak_mb']:>7.1f}/{stats['peak_mb']:<8.1f}{flag}")
+        if ratio > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the simulation and analysis hot paths")
+    parser.add_argument("--preset", default="small", choices=list(PRESETS), help="input sizes")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES),
+                        help="stages to run (default: all)")
+    parser.add_argument("--skip-sim", action="store_true", help="skip the stages that run SWMM")
+    parser.add_argument("--out", help="results file (default: outputdata/benchmarks/bench_<preset>_<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.10,
+                        help="with --compare, exit 1 if a stage's best time grows by more than this factor")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.preset, args.stages, skip_sim=args.skip_sim)
+
+    out = args.out or os.path.join(RESULTS_DIR,
+                                   f"bench_{args.preset}_{dt.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[Bench] Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), results, args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Vectorized bootstrap kernels for the UQ figures
+Resample means for every node from one shared index array, chunked to bound memory
+Convergence envelopes from batched run-order permutations
+"""
+
+import numpy as np
+
+
+def _nan_groups(data):
+    # columns with the same missing runs share resample indices (normally a single group)
+    valid = ~np.isnan(data)
+    patterns, group = np.unique(valid.T, axis=0, return_inverse=True)
+    return [(rows, np.flatnonzero(group.ravel() == g)) for g, rows in enumerate(patterns)]
+
+
+def resample_counts(n, n_bootstrap, rng, chunk_size=256):
+    """
+    Yield (start, counts) with counts[(chunk, n)] = how often each of n runs appears in resamples
+    start..start+chunk; a statistic that is a mean over runs is then counts @ values / n.
+    """
+    for start in range(0, n_bootstrap, chunk_size):
+        size = min(chunk_size, n_bootstrap - start)
+        idx = rng.integers(0, n, size=(size, n))
+        flat = (idx + (np.arange(size) * n)[:, None]).ravel()
+        yield start, np.bincount(flat, minlength=size * n).reshape(size, n).astype(np.float64)
+
+
+def bootstrap_means(data, n_bootstrap=2000, seed=42, chunk_size=256):
+    """
+    (n_bootstrap, nodes) means of resamples with replacement of each column of data (runs, nodes),
+    NaN runs dropped per column. Each resample is drawn once as run indices, turned into a
+    (chunk, runs) count matrix and applied to every node with one matrix product.
+    Results depend only on seed, not on chunk_size.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data[:, None]
+    rng = np.random.default_rng(seed)
+    means = np.full((n_bootstrap, data.shape[1]), np.nan)
+
+    for rows, cols in _nan_groups(data):
+        values = data[rows][:, cols]
+        n = len(values)
+        if n == 0:
+            continue
+        for start, counts in resample_counts(n, n_bootstrap, rng, chunk_size):
+            means[start:start + len(counts), cols] = counts @ values / n
+    return means
+
+
+def bootstrap_ci(data, n_bootstrap=2000, ci=95.0, seed=42, chunk_size=256):
+    """Observed mean and lower/upper percentile bounds of the bootstrapped mean, one value per column."""
+    data = np.asarray(data, dtype=np.float64)
+    half = (100.0 - ci) / 2.0
+    boot = bootstrap_means(data, n_bootstrap, seed, chunk_size)
+    low, high = np.percentile(boot, [half, 100.0 - half], axis=0)
+    return np.nanmean(data.reshape(len(data), -1), axis=0), low, high
+
+
+def cumulative_mean_paths(data, n_perm=50, rng=None):
+    """(n_perm, runs) running means of data under n_perm random run orders, drawn as one batch."""
+    rng = rng if rng is not None else np.random.default_rng()
+    data = np.asarray(data, dtype=np.float64)
+    shuffled = rng.permuted(np.broadcast_to(data, (n_perm, len(data))), axis=1)
+    return np.cumsum(shuffled, axis=1) / np.arange(1, len(data) + 1)
+
+
+def convergence_envelope(data, n_perm=50, rng=None, percentiles=(5, 50, 95)):
+    """Percentiles of the running mean across n_perm run orders, one row per percentile."""
+    return np.percentile(cumulative_mean_paths(data, n_perm, rng), percentiles, axis=0)
@@ -0,0 +1,72 @@
+"""
+Columnar storage for simulation output and UQ results
+Parquet (pyarrow, zstd) alongside the original CSV format
+Readers load only the requested columns / partitions
+"""
+
+import os
+
+import pandas as pd
+
+FORMATS = ("csv", "parquet")
+
+
+def output_path(path: str, fmt: str) -> str:
+    """Swap the extension of a .csv/.parquet path to match fmt."""
+    return os.path.splitext(path)[0] + (".parquet" if fmt == "parquet" else ".csv")
+
+
+def existing_output(path: str, fmt: str = None) -> str:
+    """
+    output_path(path, fmt), or with fmt None whichever of the .csv/.parquet files exists
+    (the newer one if both do; path itself if neither does).
+    """
+    if fmt:
+        return output_path(path, fmt)
+    found = [p for p in (output_path(path, f) for f in FORMATS) if os.path.exists(p)]
+    return max(found, key=os.path.getmtime) if found else path
+
+
+def is_parquet(path: str) -> bool:
+    return path.endswith(".parquet") or os.path.isdir(path)
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str = "csv", partition_cols=None):
+    """
+    Write df as CSV or Parquet. With partition_cols, Parquet output is a hive-partitioned
+    dataset directory (e.g. storm=6_27_23/scenario=Base/); rewriting a partition replaces it.
+    """
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        if partition_cols:
+            df.to_parquet(path, partition_cols=partition_cols, compression="zstd", index=False,
+                          existing_data_behavior="delete_matching")
+        else:
+            df.to_parquet(path, compression="zstd", index=False)
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+
+
+def table_columns(path: str) -> list[str]:
+    """Column names without reading any data."""
+    if is_parquet(path):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, partitioning="hive").schema.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_table(path: str, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Load only `columns` (all if None). `filters` are pyarrow row filters on Parquet
+    partitions, e.g. [("storm", "==", "6_27_23")]; they are not supported for CSV.
+    """
+    if is_parquet(path):
+        df = pd.read_parquet(path, columns=columns, filters=filters)
+        # hive partition keys come back as categoricals
+        for col in df.select_dtypes("category").columns:
+            df[col] = df[col].astype(str)
+        return df
+    if filters:
+        raise ValueError("Row filters need a Parquet dataset")
+    return pd.read_csv(path, usecols=columns)
@@ -1,12 +1,25 @@
 # By: Ava Spangler
 # Date: 7/16/25
 # Description: This code provides paths for Baltimore_SWMM_analysis.py to reference
+import os
+
+# directories resolved from this file, so every script reads and writes the same place from any working directory
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+input_dir = os.path.join(repo_dir, 'inputdata')
+output_dir = os.path.join(repo_dir, 'outputdata')
+uq_output_dir = os.path.join(output_dir, 'UQ')
+figures_dir = os.path.join(repo_dir, 'figures')
+
+# UQ tables written by BSEC_SWMM_UQ.py and read by BSEC_SWMM_UQ_plotter.py / surrogate.py
+uq_results_path = os.path.join(uq_output_dir, 'uq_results.csv')
+uq_sensitivity_path = os.path.join(uq_output_dir, 'uq_sensitivity.csv')
+uq_sobol_path = os.path.join(uq_output_dir, 'uq_sobol.csv')
 
 scenarios = {
-    'Base': r"../inputdata/Inner_Harbor_Model_V24.inp",
-    'V': r"../inputdata//Inner_Harbor_Model_V24_vacants.inp",
-    'I': r"../inputdata/Inner_Harbor_Model_V24_inlets.inp",
-    'V&I': r"../inputdata/Inner_Harbor_Model_V24_inlets+vacants.inp"
+    'Base': os.path.join(input_dir, "Inner_Harbor_Model_V24.inp"),
+    'V': os.path.join(input_dir, "Inner_Harbor_Model_V24_vacants.inp"),
+    'I': os.path.join(input_dir, "Inner_Harbor_Model_V24_inlets.inp"),
+    'V&I': os.path.join(input_dir, "Inner_Harbor_Model_V24_inlets+vacants.inp")
 }
 
 storms = {
@@ -15,6 +28,16 @@ storms = {
     '0.5x_fullstorm_6_27_23': '6/27/23_fullstorm_x0.5depth'
 }
 
+# storms generated on the fly (see storms.py) instead of read from the inp; run with --design <name>
+# the in-file 6/27/23_fullstorm_x2depth equals {'base': '6/27/2023', 'depth': 2, 'duration': 2}
+design_storms = {
+    'SCS_TypeII_5in_24hr': {'design': 'scs_type2', 'depth': 5.0, 'duration_h': 24, 'dt_min': 6},
+}
+
+# depth (m) a street node must exceed to count as flooded in the duration analysis;
+# each threshold writes *_FloodDuration_{threshold}m.csv etc.; the shipped unsuffixed files are not regenerated
+flood_depth_thresholds_m = [0.01]
+
 rpts = {
     'Base': r"/inputdata/Inner_Harbor_Model_V24.rpt",
     'I': r"/inputdata/Inner_Harbor_Model_V24_inlets.rpt",
@@ -0,0 +1,131 @@
+"""
+Flood duration / exceedance engine
+Time above depth thresholds, first/last wet time and longest wet spell per node and scenario
+Run-length logic runs once over the whole (time, node) depth array for all scenarios
+Writes *_FloodDuration_{threshold}m.csv and *_AvgFloodDurationReduction_{threshold}m.csv in the schema of the
+shipped *_FloodDuration.csv / *_AvgFloodDurationReduction.csv, which these thresholds do not reproduce, so those
+files are never overwritten
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.config import output_dir
+from scripts.peak_metrics import node_labels, stack_scenarios
+
+
+def _step_minutes(timestamps, starts):
+    """Minutes each row stands for: time to the next row of the same scenario (last row repeats the step before it)."""
+    t = pd.to_datetime(np.asarray(timestamps)).values.astype("datetime64[s]").astype(np.int64)
+    dt = np.empty(len(t), dtype=np.float64)
+    dt[:-1] = np.diff(t) / 60.0
+    ends = np.append(starts[1:], len(t)) - 1
+    for start, end in zip(starts, ends):
+        dt[end] = dt[end - 1] if end > start else 0.0
+    return dt
+
+
+def exceedance_arrays(depth, dt, starts, threshold):
+    """
+    Run-length statistics of depth > threshold for a (rows, nodes) array of contiguous scenario blocks.
+    Returns (scenario, node) arrays: minutes wet, first / last wet row (-1 if never wet),
+    longest continuous wet spell in minutes and number of separate wet events.
+    """
+    n_rows = len(depth)
+    wet = depth > threshold  # NaN depth counts as dry
+    wet_dt = wet * dt[:, None]
+    duration = np.add.reduceat(wet_dt, starts, axis=0)
+
+    rows = np.arange(n_rows)[:, None]
+    first = np.minimum.reduceat(np.where(wet, rows, n_rows), starts, axis=0)
+    last = np.maximum.reduceat(np.where(wet, rows, -1), starts, axis=0)
+    first[first == n_rows] = -1
+
+    # a wet event starts on a wet row whose previous row (in the same scenario) is dry
+    prev_wet = np.zeros_like(wet)
+    prev_wet[1:] = wet[:-1]
+    prev_wet[starts] = False
+    events = np.add.reduceat(wet & ~prev_wet, starts, axis=0)
+
+    # current spell length = wet minutes so far - wet minutes at the last dry row (or scenario start);
+    # cum never decreases, so the scenario start is a floor on the last dry row
+    cum = np.cumsum(wet_dt, axis=0)
+    last_reset = np.maximum.accumulate(np.where(wet, -np.inf, cum), axis=0)
+    block_start = np.zeros((len(starts), depth.shape[1]))
+    block_start[1:] = cum[starts[1:] - 1]
+    block_offset = np.repeat(block_start, np.diff(np.append(starts, n_rows)), axis=0)
+    spell = cum - np.maximum(last_reset, block_offset)
+    longest = np.maximum.reduceat(spell, starts, axis=0)
+
+    return duration, first, last, longest, events
+
+
+def flood_durations(processed_df, node_neighborhood, thresholds=(0.01,)):
+    """
+    Flood duration tables for each depth threshold (m).
+    Returns {threshold: {'duration', 'reduction', 'timing'}} DataFrames; 'duration' and 'reduction'
+    follow the original FloodDuration / AvgFloodDurationReduction schemas, 'timing' is one row per
+    (node, scenario) with first/last wet time, longest spell and event count.
+    """
+    depth, starts, scenario_names, node_ids, order = stack_scenarios(processed_df, ("depth",))
+    timestamps = processed_df["timestamp"].to_numpy()[order]
+    dt = _step_minutes(timestamps, starts)
+    times = pd.to_datetime(timestamps)
+
+    # original files list nodes in node_id order
+    node_order = np.argsort(np.array(node_ids, dtype=object), kind="stable")
+    node_ids = [node_ids[i] for i in node_order]
+    depth = depth[:, node_order]
+    neighborhood, historic_stream = node_labels(node_neighborhood, node_ids)
+
+    has_base = "Base" in scenario_names
+    non_base = [i for i, s in enumerate(scenario_names) if s != "Base"] if has_base else []
+    node_names = np.array(node_ids, dtype=object)
+
+    tables = {}
+    for threshold in thresholds:
+        duration, first, last, longest, events = exceedance_arrays(depth, dt, starts, threshold)
+
+        duration_df = pd.DataFrame({"node_id": node_names,
+                                    **{s: duration[i] for i, s in enumerate(scenario_names)},
+                                    "neighborhood": neighborhood,
+                                    "historic_stream": historic_stream})
+
+        # positive reduction = scenario floods for less time than Base
+        rows = np.array(non_base, dtype=np.intp)
+        reduction = duration[scenario_names.index("Base")][None] - duration[rows] if has_base \
+            else np.empty((0, len(node_ids)))
+        peak_node = np.argmax(reduction, axis=1) if len(rows) else np.empty(0, dtype=np.intp)
+        reduction_df = pd.DataFrame({
+            "scenario": [scenario_names[i] for i in non_base],
+            "node_name": node_names[peak_node],
+            "peak_duration_reduction_min": reduction[np.arange(len(rows)), peak_node],
+            "avg_duration_reduction_min": reduction.mean(axis=1),
+        })
+
+        n_scen, n_nodes = duration.shape
+        first_time = times[np.clip(first, 0, None).ravel()].where(first.ravel() >= 0)
+        last_time = times[np.clip(last, 0, None).ravel()].where(last.ravel() >= 0)
+        timing_df = pd.DataFrame({
+            "node_id": np.tile(node_names, n_scen),
+            "scenario": np.repeat(np.array(scenario_names, dtype=object), n_nodes),
+            "threshold_m": threshold,
+            "duration_min": duration.ravel(),
+            "first_wet": first_time,
+            "last_wet": last_time,
+            "longest_wet_spell_min": longest.ravel(),
+            "wet_events": events.ravel(),
+        })
+
+        tables[threshold] = {"duration": duration_df, "reduction": reduction_df, "timing": timing_df}
+    return tables
+
+
+def write_flood_durations(tables, storm_name, out_dir=output_dir):
+    # every threshold gets a _{threshold}m suffix, the shipped unsuffixed files come from another method
+    for threshold, t in tables.items():
+        suffix = f"_{threshold:g}m"
+        prefix = f"{out_dir}/{storm_name}_V24_AllNodes"
+        t["duration"].to_csv(f"{prefix}_FloodDuration{suffix}.csv", index=False)
+        t["reduction"].to_csv(f"{prefix}_AvgFloodDurationReduction{suffix}.csv", index=False)
+        t["timing"].to_csv(f"{prefix}_FloodTiming{suffix}.csv", index=False)
@@ -0,0 +1,213 @@
+"""
+Indexed SWMM .inp section access
+Byte offsets of every [SECTION] are found once per file and cached in a sidecar (<inp>.sections.json),
+invalidated when the file's size, mtime or sha256 change
+Patched copies are written from the untouched byte ranges plus the rewritten sections only
+Used by utils.storm_timeseries and BSEC_SWMM_UQ.ParamTemplate
+"""
+
+import hashlib
+import json
+import os
+import re
+
+INDEX_FORMAT = 1
+SIDECAR_SUFFIX = ".sections.json"
+
+_HEADER = re.compile(rb"(?m)^[ \t]*\[([^\]\r\n]+)\][^\n]*(?:\n|$)")
+_MEMO: dict[str, "InpIndex"] = {}  # absolute path -> index, for repeated calls in one process
+
+
+def _scan(data: bytes) -> list[list]:
+    """[name, start, body_start, end] per section in file order; text before the first header is section None."""
+    sections = []
+    for match in _HEADER.finditer(data):
+        if sections:
+            sections[-1][3] = match.start()
+        elif match.start() > 0:
+            sections.append([None, 0, 0, match.start()])
+        sections.append([match.group(1).strip().upper().decode("ascii", errors="replace"),
+                         match.start(), match.end(), len(data)])
+    if not sections and data:
+        sections.append([None, 0, 0, len(data)])
+    return sections
+
+
+class InpIndex:
+    """
+    Section layout of one .inp file: name -> (start, body_start, end) byte offsets.
+
+    start is the header line, body_start the first byte after it and end the next header
+    (blank lines and comments before a header belong to the section above it).
+    Bodies are read with one seek each; the rest of the file is only ever copied.
+    """
+
+    def __init__(self, path: str, sidecar: bool = True):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        self._sections = None
+
+        sidecar_path = self.path + SIDECAR_SUFFIX
+        if sidecar:
+            self._sections = self._load_sidecar(sidecar_path)
+        if self._sections is None:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            self.sha256 = hashlib.sha256(data).hexdigest()
+            self._sections = _scan(data)
+            if sidecar:
+                self._save_sidecar(sidecar_path)
+
+        self.names = [s[0] for s in self._sections if s[0] is not None]
+        self._by_name = {s[0]: s for s in self._sections if s[0] is not None}
+
+    @classmethod
+    def of(cls, path: str) -> "InpIndex":
+        """Index for path, reused while the file's size and mtime are unchanged."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        index = _MEMO.get(key)
+        if index is None or index._stat != (stat.st_size, stat.st_mtime_ns):
+            index = _MEMO[key] = cls(key)
+        return index
+
+    def _load_sidecar(self, sidecar_path: str):
+        try:
+            with open(sidecar_path, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("format") != INDEX_FORMAT or cached.get("size") != self._stat[0]:
+            return None
+        if cached.get("mtime_ns") != self._stat[1]:
+            # touched but maybe not changed (e.g. a fresh checkout): fall back to the content hash
+            with open(self.path, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() != cached.get("sha256"):
+                    return None
+        self.sha256 = cached["sha256"]
+        return cached["sections"]
+
+    def _save_sidecar(self, sidecar_path: str):
+        record = {"format": INDEX_FORMAT, "size": self._stat[0], "mtime_ns": self._stat[1],
+                  "sha256": self.sha256, "sections": self._sections}
+        tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, sidecar_path)
+        except OSError:  # read-only input directory: the in-process index still works
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self._by_name
+
+    def span(self, name: str) -> tuple[int, int, int]:
+        _, start, body_start, end = self._by_name[name.upper()]
+        return start, body_start, end
+
+    def read_section(self, name: str, header: bool = False) -> bytes:
+        """Body of one section (with its header line if header=True)."""
+        start, body_start, end = self.span(name)
+        with open(self.path, "rb") as f:
+            f.seek(start if header else body_start)
+            return f.read(end - (start if header else body_start))
+
+    def blocks(self):
+        """(name, header + body bytes) for every section in file order, name None for any preamble."""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        return [(name, data[start:end]) for name, start, _, end in self._sections]
+
+    def _pieces(self, replacements: dict):
+        """
+        Output as (offset, length) ranges of the source and new section bytes, adjacent untouched
+        sections merged into one range. replacements: name -> new body bytes or fn(old body) -> bytes.
+        """
+        replacements = {k.upper(): v for k, v in replacements.items()}
+        missing = set(replacements) - set(self._by_name)
+        if missing:
+            raise KeyError(f"Sections not in {self.path}: {sorted(missing)}")
+
+        pieces, copy_from = [], 0
+        with open(self.path, "rb") as f:
+            for name, start, body_start, end in self._sections:
+                if name not in replacements:
+                    continue
+                new = replacements[name]
+                if callable(new):
+                    f.seek(body_start)
+                    new = new(f.read(end - body_start))
+                pieces.append((copy_from, body_start - copy_from))  # untouched bytes + this header
+                pieces.append(new)
+                copy_from = end
+        pieces.append((copy_from, self._stat[0] - copy_from))
+        return pieces
+
+    def render(self, replacements: dict) -> bytes:
+        """Whole patched file as bytes."""
+        out = []
+        with open(self.path, "rb") as f:
+            for piece in self._pieces(replacements):
+                if isinstance(piece, tuple):
+                    f.seek(piece[0])
+                    out.append(f.read(piece[1]))
+                else:
+                    out.append(piece)
+        return b"".join(out)
+
+    def patch(self, out_path: str, replacements: dict):
+        """Write the patched file to out_path, copying untouched byte ranges straight from the source."""
+        pieces = self._pieces(replacements)
+        with open(self.path, "rb") as src, open(out_path, "wb") as dst:
+            for piece in pieces:
+                if isinstance(piece, tuple):
+                    src.seek(piece[0])
+                    dst.write(src.read(piece[1]))
+                else:
+                    dst.write(piece)
+
+
+def _data_lines(body: bytes):
+    # (line, data part without comment, token spans) per line; comments and blank lines have no spans
+    for line in body.splitlines(keepends=True):
+        data = line.split(b";", 1)[0]
+        yield line, [m.span() for m in re.finditer(rb"\S+", data)]
+
+
+def set_column(body: bytes, col: int, value, names=None) -> bytes:
+    """
+    Replace token column col (negative counts from the last data token) on every data line,
+    or only on lines whose first token is in names. Column layout and comments are kept.
+    """
+    value = str(value).encode()
+    names = None if names is None else {str(n).encode() for n in names}
+    out = []
+    for line, spans in _data_lines(body):
+        if spans and len(spans) > (col if col >= 0 else -col - 1) \
+                and (names is None or line[spans[0][0]:spans[0][1]] in names):
+            start, stop = spans[col]
+            line = line[:start] + value + line[stop:]
+        out.append(line)
+    return b"".join(out)
+
+
+def set_options(body: bytes, options: dict) -> bytes:
+    """[OPTIONS]-style 'KEY value' body with the given keys set; missing keys are added at the end."""
+    pending = {str(k).upper(): str(v) for k, v in options.items()}
+    newline = b"\r\n" if b"\r\n" in body else b"\n"  # added lines follow the file's line endings
+    lines = []
+    for line, spans in _data_lines(body):
+        key = line[spans[0][0]:spans[0][1]].decode(errors="replace").upper() if spans else None
+        if key in pending:
+            ending = line[len(line.rstrip(b"\r\n")):]
+            line = f"{line[:spans[0][1]].decode(errors='replace'):<21}{pending.pop(key)}".encode() + ending
+        lines.append(line)
+    insert_at = len(lines)
+    while insert_at > 0 and not lines[insert_at - 1].strip():
+        insert_at -= 1
+    added = [f"{k:<21}{v}".encode() + newline for k, v in pending.items()]
+    if added and insert_at > 0 and not lines[insert_at - 1].endswith(b"\n"):
+        lines[insert_at - 1] += newline
+    return b"".join(lines[:insert_at] + added + lines[insert_at:])
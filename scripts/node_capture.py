@@ -0,0 +1,121 @@
+"""
+Node time-series capture
+Preallocated (steps, nodes, metrics) buffer for SWMM node results
+Used by run_pyswmm in BSEC_SWMM_analysis.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+METRICS = ("depth", "flow", "volume")
+
+
+class NodeSeriesBuffer:
+    """
+    Contiguous float array of shape (steps, nodes, metrics) filled one step at a time.
+
+    Raw engine values are stored as-is and unit conversion is applied once in
+    finish(). If n_steps is unknown (or exceeded) the buffer grows by chunk_steps.
+    With spill_dir set, only one chunk is held in memory: full chunks are written
+    to .npy files and stitched into a single memory-mapped array at the end.
+    """
+
+    def __init__(self, node_ids, n_steps=None, metrics=METRICS, dtype=np.float64,
+                 chunk_steps=288, spill_dir=None):
+        self.node_ids = list(node_ids)
+        self.metrics = tuple(metrics)
+        self.dtype = np.dtype(dtype)
+        self.chunk_steps = chunk_steps
+        self.spill_dir = spill_dir
+        self.timestamps = []
+
+        self._n_steps = 0
+        self._spilled = []
+        capacity = chunk_steps if (n_steps is None or spill_dir) else n_steps
+        self._data = np.empty((capacity, len(self.node_ids), len(self.metrics)), dtype=self.dtype)
+        self._filled = 0  # rows used in self._data
+        self._finished = False
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def append(self, timestamp, values):
+        # values: flat node-major sequence (node1 metrics, node2 metrics, ...) or (nodes, metrics) array
+        if self._filled == len(self._data):
+            self._make_room()
+        self._data[self._filled].flat = values
+        self._filled += 1
+        self._n_steps += 1
+        self.timestamps.append(timestamp)
+
+    def _make_room(self):
+        if self.spill_dir:
+            path = os.path.join(self.spill_dir, f"chunk_{len(self._spilled):05d}.npy")
+            np.save(path, self._data)
+            self._spilled.append(path)
+            self._filled = 0
+        else:
+            grown = np.empty((len(self._data) + self.chunk_steps,) + self._data.shape[1:], dtype=self.dtype)
+            grown[:self._filled] = self._data[:self._filled]
+            self._data = grown
+
+    def finish(self, factors=None):
+        """Trimmed (steps, nodes, metrics) array, scaled in place by one factor per metric."""
+        if self._finished:
+            return self._data
+        if self._spilled:
+            path = os.path.join(self.spill_dir, "node_series.npy")
+            data = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype,
+                                             shape=(self._n_steps,) + self._data.shape[1:])
+            pos = 0
+            for chunk_path in self._spilled:
+                chunk = np.load(chunk_path, mmap_mode="r")
+                data[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+                os.remove(chunk_path)
+            data[pos:] = self._data[:self._filled]
+            self._spilled = []
+        else:
+            data = self._data[:self._filled]
+
+        if factors is not None:
+            data *= np.asarray(factors, dtype=self.dtype)
+        self._data = data
+        self._filled = len(data)
+        self._finished = True
+        return data
+
+    def to_frame(self, layout="wide"):
+        return series_frame(self._data[:self._filled], self.timestamps, self.node_ids, self.metrics, layout)
+
+
+def series_frame(data, timestamps, node_ids, metrics=METRICS, layout="wide"):
+    """
+    DataFrame view over a (steps, nodes, metrics) array without copying the values.
+
+    wide:       'timestamp' + '{node}_{metric}' columns (the layout find_max_depth/find_max_vol read)
+    multiindex: timestamp index, (node, metric) column MultiIndex
+    tidy:       one row per (timestamp, node) with one column per metric
+    """
+    n_steps, n_nodes, n_metrics = data.shape
+
+    if layout == "wide":
+        columns = [f"{node}_{metric}" for node in node_ids for metric in metrics]
+        df = pd.DataFrame(data.reshape(n_steps, n_nodes * n_metrics), columns=columns, copy=False)
+        df.insert(0, "timestamp", timestamps)
+        return df
+
+    if layout == "multiindex":
+        columns = pd.MultiIndex.from_product([node_ids, metrics], names=["node", "metric"])
+        index = pd.Index(timestamps, name="timestamp")
+        return pd.DataFrame(data.reshape(n_steps, n_nodes * n_metrics), index=index, columns=columns, copy=False)
+
+    if layout == "tidy":
+        df = pd.DataFrame(data.reshape(n_steps * n_nodes, n_metrics), columns=list(metrics), copy=False)
+        df.insert(0, "node", pd.Categorical.from_codes(np.tile(np.arange(n_nodes), n_steps), categories=node_ids))
+        df.insert(0, "timestamp", np.repeat(np.asarray(timestamps), n_nodes))
+        return df
+
+    raise ValueError(f"Unknown layout '{layout}', expected 'wide', 'multiindex' or 'tidy'")
@@ -0,0 +1,97 @@
+"""
+Node metadata tables
+Node_Neighborhoods.xlsx / Node_Coords.xlsx parsed once and cached as an .npz next to the workbook (<xlsx>.cache.npz),
+invalidated when the workbook's size, mtime or sha256 change
+Paths come from config.input_dir, so the tables load from any working directory
+Used by BSEC_SWMM_analysis.py (save_and_analyze, node_neighborhood) and node_registry.py
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.config import input_dir
+
+CACHE_FORMAT = 1
+CACHE_SUFFIX = ".cache.npz"
+
+NEIGHBORHOODS_PATH = os.path.join(input_dir, "Node_Neighborhoods.xlsx")
+COORDS_PATH = os.path.join(input_dir, "Node_Coords.xlsx")
+
+_MEMO: dict[str, tuple] = {}  # absolute path -> ((size, mtime_ns), frame), for repeated calls in one process
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_cache(path: str, stat: tuple):
+    try:
+        with np.load(path + CACHE_SUFFIX, allow_pickle=False) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if meta.get("format") != CACHE_FORMAT or meta.get("size") != stat[0]:
+                return None
+            if meta.get("mtime_ns") != stat[1] and _sha256(path) != meta.get("sha256"):
+                return None
+            columns = {}
+            for i, name in enumerate(meta["columns"]):
+                values = archive[f"c{i}"]
+                if values.dtype.kind == "U":  # text column: back to object, empty cells back to NaN
+                    values = values.astype(object)
+                    values[archive[f"na{i}"]] = np.nan
+                columns[name] = values
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(columns)
+
+
+def _save_cache(path: str, stat: tuple, df: pd.DataFrame):
+    arrays = {}
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        if column.dtype == object:
+            arrays[f"na{i}"] = column.isna().to_numpy()
+            arrays[f"c{i}"] = column.fillna("").astype(str).to_numpy(dtype=str)
+        else:
+            arrays[f"c{i}"] = column.to_numpy()
+    meta = {"format": CACHE_FORMAT, "size": stat[0], "mtime_ns": stat[1], "sha256": _sha256(path),
+            "columns": [str(c) for c in df.columns]}
+
+    tmp_path = f"{path}{CACHE_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path + CACHE_SUFFIX)
+    except OSError:  # read-only input directory: the parsed table is still returned
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def read_workbook(path: str) -> pd.DataFrame:
+    """First sheet of an .xlsx as a DataFrame, from the .npz cache while the workbook is unchanged."""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    stat = (st.st_size, st.st_mtime_ns)
+    memo = _MEMO.get(key)
+    if memo is None or memo[0] != stat:
+        df = _load_cache(key, stat)
+        if df is None:
+            df = pd.read_excel(key)
+            _save_cache(key, stat, df)
+        memo = _MEMO[key] = (stat, df)
+    return memo[1].copy()
+
+
+def node_neighborhoods(path: str = NEIGHBORHOODS_PATH) -> dict:
+    """street node id -> (neighborhood, historic_stream)."""
+    df = read_workbook(path)
+    return dict(zip(df["street_node_id"], zip(df["neighborhood"], df["historic_stream"])))
+
+
+def node_coords(path: str = COORDS_PATH) -> pd.DataFrame:
+    """node_id, x, y per node, in the workbook's projected coordinates."""
+    return read_workbook(path)
@@ -0,0 +1,195 @@
+"""
+Street node registry
+Integer index per street (-S) node of a model, neighborhood / historic_stream as categorical codes
+and a KD-tree over Node_Coords.xlsx for nearest / radius queries
+Result arrays with nodes on the last axis are aggregated per group with one sort + reduceat
+Used by BSEC_SWMM_analysis.py (street node ids, neighborhood metadata for peak_metrics / flood_durations),
+BSEC_SWMM_UQ_plotter.py (which result columns are street nodes) and benchmarks.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.inp_index import InpIndex
+from scripts.node_metadata import COORDS_PATH, NEIGHBORHOODS_PATH, node_coords, read_workbook
+
+NODE_SECTIONS = ("JUNCTIONS", "OUTFALLS", "DIVIDERS", "STORAGE")  # swmmio's model.nodes order
+GROUPS = ("neighborhood", "historic_stream")
+AGGREGATIONS = ("count", "sum", "mean", "max", "min")
+
+_MEMO: dict[tuple, tuple] = {}  # (absolute inp path, excluded nodes) -> ((size, mtime_ns), registry)
+
+
+def street_node_ids(inp_path: str) -> list[str]:
+    """Street (surface storage, '-S') node names of a model, in the order swmmio's model.nodes lists them."""
+    index = InpIndex.of(inp_path)
+    names = []
+    for section in NODE_SECTIONS:
+        if section not in index:
+            continue
+        for line in index.read_section(section).decode("utf-8", errors="replace").splitlines():
+            parts = line.split(";", 1)[0].split()
+            if parts and "-S" in parts[0]:
+                names.append(parts[0])
+    return names
+
+
+class NodeRegistry:
+    """
+    Street nodes 0..n-1 with their metadata as arrays.
+
+    codes[group] holds the category code of every node (-1 = node not in the workbook) and
+    categories[group] the labels; xy is (n, 2) with NaN for nodes without coordinates.
+    Result arrays are indexed by node on their last axis, in registry order unless node_ids is given.
+    """
+
+    def __init__(self, node_ids, metadata: pd.DataFrame | None = None, xy: pd.DataFrame | None = None):
+        self.ids = np.array(list(node_ids), dtype=object)
+        self._index = pd.Index(self.ids)
+        if not self._index.is_unique:
+            raise ValueError("Node ids must be unique")
+
+        self.codes, self.categories = {}, {}
+        for group in GROUPS:
+            labels = metadata[group].reindex(self.ids) if metadata is not None \
+                else pd.Series(np.nan, index=self.ids, dtype=object)
+            categorical = pd.Categorical(labels)
+            self.codes[group] = categorical.codes.astype(np.int64)
+            self.categories[group] = categorical.categories
+
+        self.xy = xy[["x", "y"]].reindex(self.ids).to_numpy(dtype=np.float64) if xy is not None \
+            else np.full((len(self.ids), 2), np.nan)
+        self._located = np.flatnonzero(~np.isnan(self.xy).any(axis=1))
+        self._tree = None
+        self._groupings = {}
+
+    @classmethod
+    def from_inp(cls, inp_path: str, exclude=(), neighborhoods_path: str = NEIGHBORHOODS_PATH,
+                 coords_path: str = COORDS_PATH) -> "NodeRegistry":
+        """
+        Street nodes of inp_path minus exclude, with Node_Neighborhoods.xlsx metadata and Node_Coords.xlsx positions.
+        Node_Coords node_id n is the junction Jn under street node Jn-S.
+        """
+        excluded = set(exclude)
+        node_ids = [n for n in street_node_ids(inp_path) if n not in excluded]
+        metadata = read_workbook(neighborhoods_path).set_index("street_node_id")
+        coords = node_coords(coords_path)
+        xy = coords.set_index("J" + coords["node_id"].astype(str) + "-S")
+        return cls(node_ids, metadata, xy)
+
+    @classmethod
+    def of(cls, inp_path: str, exclude=()) -> "NodeRegistry":
+        """Registry for inp_path, reused while the file's size and mtime are unchanged."""
+        key = (os.path.abspath(inp_path), tuple(sorted(exclude)))
+        stat = os.stat(key[0])
+        memo = _MEMO.get(key)
+        if memo is None or memo[0] != (stat.st_size, stat.st_mtime_ns):
+            memo = _MEMO[key] = ((stat.st_size, stat.st_mtime_ns), cls.from_inp(inp_path, exclude))
+        return memo[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._index
+
+    def indexer(self, node_ids) -> np.ndarray:
+        """Registry index of each node id, -1 for ids not in the registry."""
+        return self._index.get_indexer(list(node_ids))
+
+    def labels(self, group: str, node_ids=None) -> np.ndarray:
+        """Group label per node as an object array, NaN where the node has no metadata."""
+        codes = self._codes(group, node_ids)
+        return pd.Categorical.from_codes(codes, self.categories[group]).to_numpy(dtype=object)
+
+    def _codes(self, group: str, node_ids=None) -> np.ndarray:
+        codes = self.codes[group]
+        if node_ids is None:
+            return codes
+        idx = self.indexer(node_ids)
+        return np.where(idx >= 0, codes[idx], -1)
+
+    # ------------------------------------------------------------------
+    # GROUP-BY AGGREGATION
+    # ------------------------------------------------------------------
+    def _grouping(self, group: str, node_ids=None):
+        # (node order sorted by code, start of each code's block, codes present), unlabelled nodes dropped;
+        # kept per group for arrays in registry order
+        if node_ids is None and group in self._groupings:
+            return self._groupings[group]
+        codes = self._codes(group, node_ids)
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        present, starts = np.unique(codes[order], return_index=True)
+        if node_ids is None:
+            self._groupings[group] = (order, starts, present)
+        return order, starts, present
+
+    def aggregate(self, values, by: str = "neighborhood", how: str = "mean", node_ids=None):
+        """
+        NaN-skipping count / sum / mean / max / min of a (nodes,) or (rows, nodes) array per group.
+        Returns a Series (1-D input) or a DataFrame with one column per group (2-D input).
+        """
+        if how not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{how}', expected one of {AGGREGATIONS}")
+        values = np.asarray(values, dtype=np.float64)
+        n_nodes = len(self) if node_ids is None else len(node_ids)
+        if values.ndim not in (1, 2) or values.shape[-1] != n_nodes:
+            raise ValueError(f"Expected a (nodes,) or (rows, nodes) array with {n_nodes} nodes, got {values.shape}")
+
+        order, starts, present = self._grouping(by, node_ids)
+        labels = self.categories[by][present]
+        if not len(order):
+            result = np.empty(values.shape[:-1] + (0,))
+        else:
+            v = values[..., order]
+            missing = np.isnan(v)
+            if how in ("max", "min"):
+                result = (np.fmax if how == "max" else np.fmin).reduceat(v, starts, axis=-1)
+            else:
+                count = np.add.reduceat(~missing, starts, axis=-1)
+                if how == "count":
+                    result = count
+                else:
+                    total = np.add.reduceat(np.where(missing, 0.0, v), starts, axis=-1)
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        result = total if how == "sum" else total / count
+
+        if values.ndim == 1:
+            return pd.Series(result, index=labels, name=how)
+        return pd.DataFrame(result, columns=labels)
+
+    # ------------------------------------------------------------------
+    # SPATIAL QUERIES (nodes without coordinates are never returned)
+    # ------------------------------------------------------------------
+    @property
+    def tree(self):
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(self.xy[self._located])
+        return self._tree
+
+    def nearest(self, xy, k: int = 1):
+        """(distance, registry index) of the k nearest located nodes to each query point."""
+        distance, hit = self.tree.query(np.asarray(xy, dtype=np.float64), k=k)
+        valid = hit < len(self._located)  # k larger than the located nodes pads with n / inf
+        return distance, np.where(valid, self._located[np.minimum(hit, len(self._located) - 1)], -1)
+
+    def within(self, xy, radius: float):
+        """Registry indices of the located nodes within radius of a point (array) or of each point (list of arrays)."""
+        xy = np.asarray(xy, dtype=np.float64)
+        hits = self.tree.query_ball_point(xy, radius)
+        if xy.ndim == 1:
+            return np.sort(self._located[np.asarray(hits, dtype=np.intp)])
+        return [np.sort(self._located[np.asarray(h, dtype=np.intp)]) for h in hits]
+
+    def neighbors(self, node_id: str, radius: float) -> list[str]:
+        """Ids of the other nodes within radius of node_id (empty if node_id has no coordinates)."""
+        i = self.indexer([node_id])[0]
+        if i < 0:
+            raise KeyError(node_id)
+        if np.isnan(self.xy[i]).any():
+            return []
+        return [n for n in self.ids[self.within(self.xy[i], radius)] if n != node_id]
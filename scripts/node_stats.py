@@ -0,0 +1,81 @@
+"""
+Bulk node statistics extraction
+Every requested SWMM node statistic for all surface nodes in one pass after a run, into a preallocated array
+Values stay in the model's units (US models: ft, ft3, s, cfs); SWMMVisualizer converts depth / volume to metric
+Used by run_simulation in BSEC_SWMM_UQ.py
+"""
+
+import numpy as np
+from swmm.toolkit import solver
+from swmm.toolkit.shared_enum import ObjectType
+
+# result column prefix -> (stats struct, field); storage fields are only defined for storage nodes
+NODE_STATS = {
+    "max_depth": ("node", "maxDepth"),
+    "max_volume": ("storage", "maxVol"),
+    "flooding_volume": ("node", "volFlooded"),
+    "flooding_duration": ("node", "timeFlooded"),
+    "peak_inflow": ("node", "maxInflow"),
+}
+METRICS = tuple(NODE_STATS)
+
+_GETTERS = {"node": solver.node_get_stats, "storage": solver.storage_get_stats}
+
+
+def stat_columns(node_ids, metrics=METRICS) -> list[str]:
+    """'{metric}_{node}' column names, metric-major (all max_depth columns first, as in uq_results.csv)."""
+    return [f"{metric}_{node}" for metric in metrics for node in node_ids]
+
+
+class NodeStatsExtractor:
+    """
+    Reads the engine's end-of-run statistics for a fixed node list.
+
+    Node indices are resolved once per open project (bind), each struct is read once
+    per node, and the values are written into one reused (metrics, nodes) float array.
+    A node the engine cannot resolve or read gets NaN for every metric.
+    """
+
+    def __init__(self, node_ids, metrics=METRICS):
+        self.node_ids = list(node_ids)
+        self.metrics = tuple(metrics)
+        self.columns = stat_columns(self.node_ids, self.metrics)
+        self._fields = {kind: [(m, field) for m, metric in enumerate(self.metrics)
+                               for k, field in [NODE_STATS[metric]] if k == kind]
+                        for kind in _GETTERS}
+        self._values = np.empty((len(self.metrics), len(self.node_ids)), dtype=np.float64)
+        self._index = None
+
+    def bind(self):
+        """Look up the engine index of every node in the currently open project."""
+        index = np.full(len(self.node_ids), -1, dtype=np.int64)
+        for i, node in enumerate(self.node_ids):
+            try:
+                index[i] = solver.project_get_index(ObjectType.NODE.value, node)
+            except Exception:
+                pass
+        self._index = index
+        return self
+
+    def extract(self) -> np.ndarray:
+        """(metrics, nodes) statistics of the run that just finished (call before the project is ended)."""
+        if self._index is None:
+            self.bind()
+        values = self._values
+        values.fill(np.nan)
+        for i, idx in enumerate(self._index.tolist()):
+            if idx < 0:
+                continue
+            for kind, fields in self._fields.items():
+                if not fields:
+                    continue
+                try:
+                    stats = _GETTERS[kind](idx)
+                except Exception:
+                    continue
+                for m, field in fields:
+                    values[m, i] = getattr(stats, field)
+        return values
+
+    def as_row(self, values: np.ndarray) -> dict:
+        return dict(zip(self.columns, values.ravel().tolist()))
@@ -0,0 +1,172 @@
+"""
+Peak metric engine
+Max depth / max volume per node and scenario, change vs. Base and peak/avg summaries
+All metrics and scenarios are reduced in one vectorized pass over a (scenario, time, node, metric) layout
+Writes the same CSVs as the original find_max_depth / find_max_vol
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.config import output_dir
+
+# output file stems and summary column names for each metric
+METRIC_SPECS = {
+    "depth": {
+        "max_file": "MaxDepth", "rel_file": "RelativeDepth",
+        "summary_file": "DepthSummary", "rel_summary_file": "RelativeDepthSummary",
+        "peak_col": "peak_depth_m", "avg_col": "avg_depth_m",
+        "base_abs_col": "base_depth_abs_m", "base_incr_col": "base_depth_incr_m",
+    },
+    "volume": {
+        "max_file": "MaxVolume", "rel_file": "RelativeVolume",
+        "summary_file": "VolumeSummary", "rel_summary_file": "RelativeVolumeSummary",
+        "peak_col": "peak_vol_m", "avg_col": "avg_vol_m",
+        "base_abs_col": "base_vol_abs_m", "base_incr_col": "base_vol_incr_m",
+    },
+}
+
+def stack_scenarios(processed_df, metrics=("depth", "volume")):
+    """
+    Rows of a stacked (scenario, row) x '{node}_{metric}' frame grouped into contiguous scenario blocks.
+    Returns (values[rows, node * metric], block start rows, scenario names sorted like groupby,
+    node ids, row order applied to processed_df).
+    """
+    scenario_codes, scenario_names = pd.factorize(processed_df.index.get_level_values(0), sort=True)
+
+    suffix = f"_{metrics[0]}"
+    node_ids = [c[:-len(suffix)] for c in processed_df.columns if c.endswith(suffix)]
+    col_pos = processed_df.columns.get_indexer([f"{node}_{metric}" for node in node_ids for metric in metrics])
+    if (col_pos < 0).any():
+        raise KeyError("Every node needs a column for each metric")
+
+    values = processed_df.iloc[:, col_pos].to_numpy(dtype=np.float64)
+    order = np.argsort(scenario_codes, kind="stable")
+    if not (order == np.arange(len(order))).all():
+        values = values[order]
+    starts = np.searchsorted(scenario_codes[order], np.arange(len(scenario_names)))
+    return values, starts, list(scenario_names), node_ids, order
+
+
+def peak_array(processed_df, metrics=("depth", "volume")):
+    """
+    Per-scenario maxima of a stacked (scenario, row) x '{node}_{metric}' frame.
+    Returns (peaks[scenario, node, metric], scenario names sorted like groupby, node ids).
+    """
+    values, starts, scenario_names, node_ids, _ = stack_scenarios(processed_df, metrics)
+
+    # NaN-skipping max over each scenario's rows, like groupby(level=0).max()
+    peaks = np.fmax.reduceat(values, starts, axis=0)
+    return peaks.reshape(len(scenario_names), len(node_ids), len(metrics)), scenario_names, node_ids
+
+
+def node_labels(node_neighborhood, node_ids):
+    """
+    (neighborhood, historic_stream) object arrays for node_ids, NaN for nodes without metadata.
+    node_neighborhood is a {node: (neighborhood, historic_stream)} dict or a node_registry.NodeRegistry.
+    """
+    if isinstance(node_neighborhood, dict):
+        meta = pd.DataFrame.from_dict(node_neighborhood, orient="index").reindex(node_ids)
+        return meta[0].to_numpy(), meta[1].to_numpy()
+    return (node_neighborhood.labels("neighborhood", node_ids),
+            node_neighborhood.labels("historic_stream", node_ids))
+
+
+def _argmax(values, axis):
+    return np.argmax(np.where(np.isnan(values), -np.inf, values), axis=axis)
+
+
+def _node_mean(values):
+    # mean over nodes with nodes as the contiguous axis, so the summation order matches pandas' Series.mean
+    return np.nanmean(np.ascontiguousarray(np.moveaxis(values, 1, -1)), axis=-1)
+
+
+def _pct_change(change, base):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base > 0, change / base * 100, np.inf)
+
+
+def peak_metrics(processed_df, node_neighborhood, metrics=("depth", "volume")):
+    """
+    All peak tables for all metrics at once.
+    Returns {metric: {'max', 'relative', 'summary', 'relative_summary'}} DataFrames.
+    """
+    peaks, scenario_names, node_ids = peak_array(processed_df, metrics)
+    _, n_nodes, n_metrics = peaks.shape
+
+    neighborhood, historic_stream = node_labels(node_neighborhood, node_ids)
+    node_idx = np.arange(n_nodes)
+
+    # per-scenario peak location and mean, (scenario, metric)
+    peak_node = _argmax(peaks, axis=1)
+    peak_val = np.take_along_axis(peaks, peak_node[:, None, :], axis=1)[:, 0, :]
+    avg_val = _node_mean(peaks)
+
+    has_base = "Base" in scenario_names
+    base = peaks[scenario_names.index("Base")] if has_base else np.zeros((n_nodes, n_metrics))
+    relative = peaks - base[None] if has_base else peaks
+
+    # largest increase and largest absolute change vs. Base, (scenario, metric)
+    incr_node = _argmax(relative, axis=1)
+    abs_node = _argmax(np.abs(relative), axis=1)
+    incr_val = np.take_along_axis(relative, incr_node[:, None, :], axis=1)[:, 0, :]
+    abs_val = np.take_along_axis(relative, abs_node[:, None, :], axis=1)[:, 0, :]
+    base_incr = base[incr_node, np.arange(n_metrics)[None, :]]
+    base_abs = base[abs_node, np.arange(n_metrics)[None, :]]
+    avg_change = _node_mean(relative)
+    pct_incr = _pct_change(incr_val, base_incr)
+    pct_abs = _pct_change(abs_val, base_abs)
+
+    non_base = [i for i, s in enumerate(scenario_names) if s != "Base"] if has_base else []
+    tables = {}
+    for m, metric in enumerate(metrics):
+        spec = METRIC_SPECS[metric]
+        node_names = np.array([f"{node}_{metric}" for node in node_ids], dtype=object)
+
+        metadata = {
+            "node_name": node_names,
+            "node_id": np.array([name.split("_")[0] for name in node_names], dtype=object),
+            "neighborhood": neighborhood,
+            "historic_stream": historic_stream,
+        }
+        max_df = pd.DataFrame({"node_name": node_names,
+                               **{s: peaks[i, :, m] for i, s in enumerate(scenario_names)},
+                               **{k: v for k, v in metadata.items() if k != "node_name"}},
+                              index=node_idx)
+        relative_df = pd.DataFrame({**{s: relative[i, :, m] for i, s in enumerate(scenario_names)}, **metadata},
+                                   index=node_idx)
+
+        summary = pd.DataFrame({
+            "scenario": scenario_names,
+            "node_name": node_names[peak_node[:, m]],
+            spec["peak_col"]: peak_val[:, m],
+            spec["avg_col"]: avg_val[:, m],
+        })
+
+        rows = np.array(non_base, dtype=np.intp)
+        relative_summary = pd.DataFrame({
+            "scenario": [scenario_names[i] for i in non_base],
+            "avg_peak_change_m": avg_change[rows, m],  # change in average peak (flood reduction)
+            "peak_abs_change_m": abs_val[rows, m],  # single largest change at moment of peak flooding
+            "peak_abs_change_node": node_names[abs_node[rows, m]],
+            spec["base_abs_col"]: base_abs[rows, m],  # base scenario value at that location
+            "pct_change_abs": pct_abs[rows, m],
+            "peak_increase_m": incr_val[rows, m],  # single largest deterioration (deeper flooding)
+            "peak_increase_node": node_names[incr_node[rows, m]],
+            spec["base_incr_col"]: base_incr[rows, m],
+            "pct_change_incr": pct_incr[rows, m],
+        })
+
+        tables[metric] = {"max": max_df, "relative": relative_df,
+                          "summary": summary, "relative_summary": relative_summary}
+    return tables
+
+
+def write_peak_metrics(tables, storm_name, out_dir=output_dir):
+    for metric, t in tables.items():
+        spec = METRIC_SPECS[metric]
+        prefix = f"{out_dir}/{storm_name}_V24_AllNodes"
+        t["max"].to_csv(f"{prefix}_{spec['max_file']}.csv", index=False)
+        t["relative"].to_csv(f"{prefix}_{spec['rel_file']}.csv", index=False)
+        t["summary"].to_csv(f"{prefix}_{spec['summary_file']}.csv", index=False)
+        t["relative_summary"].to_csv(f"{prefix}_{spec['rel_summary_file']}.csv", index=False)
@@ -0,0 +1,171 @@
+"""
+Per-stage timing instrumentation
+Context-manager / decorator stage timers and counters with a per-run log and an end-of-campaign breakdown
+Optional cProfile capture of a whole script or of each worker process
+Used by BSEC_SWMM_UQ.py (run_uq, run_simulation) and BSEC_SWMM_analysis.py (run_pyswmm, analysis)
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+
+class StageTimer:
+    """
+    Wall time and call count per named stage, plus free-form counters.
+
+    Between start_run() and end_run() stage times and counters go to the current run only;
+    end_run() hands them back as a dict that the caller logs and merge()s into the totals.
+    This keeps serial runs and runs timed in worker processes on the same path.
+    Outside a run they are added to the totals directly.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._run = None
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        if self._run is not None:
+            self._run["stages"][name] = self._run["stages"].get(name, 0.0) + seconds
+            self._run["calls"][name] = self._run["calls"].get(name, 0) + calls
+        else:
+            self.totals[name] += seconds
+            self.calls[name] += calls
+
+    def count(self, name: str, n: int = 1):
+        if self._run is not None:
+            self._run["counters"][name] = self._run["counters"].get(name, 0) + n
+        else:
+            self.counters[name] += n
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name: str | None = None):
+        """Decorator timing every call of a function as stage `name` (default: the function name)."""
+        def decorate(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def start_run(self):
+        self._run = {"stages": {}, "calls": {}, "counters": {}}
+
+    def end_run(self) -> dict:
+        run, self._run = self._run or {"stages": {}, "calls": {}, "counters": {}}, None
+        return run
+
+    def merge(self, run: dict):
+        for name, seconds in run.get("stages", {}).items():
+            self.totals[name] += seconds
+            self.calls[name] += run.get("calls", {}).get(name, 1)
+        for name, n in run.get("counters", {}).items():
+            self.counters[name] += n
+
+    def reset(self):
+        self.totals.clear()
+        self.calls.clear()
+        self.counters.clear()
+        self._run = None
+
+    def table(self) -> pd.DataFrame:
+        """One row per stage, slowest first: calls, total / mean seconds and share of the summed stage time."""
+        total = sum(self.totals.values())
+        df = pd.DataFrame({
+            "stage": list(self.totals),
+            "calls": [self.calls[name] for name in self.totals],
+            "total_s": list(self.totals.values()),
+        })
+        df["mean_s"] = df["total_s"] / df["calls"].clip(lower=1)
+        df["share_pct"] = df["total_s"] / total * 100 if total > 0 else 0.0
+        return df.sort_values("total_s", ascending=False, ignore_index=True)
+
+    def report(self, title: str = "Timing") -> str:
+        df = self.table()
+        lines = [f"[{title}] {'stage':<20} {'calls':>7} {'total (s)':>10} {'mean (s)':>10} {'share':>7}"]
+        for row in df.itertuples(index=False):
+            lines.append(f"[{title}] {row.stage:<20} {row.calls:>7d} {row.total_s:>10.3f} "
+                         f"{row.mean_s:>10.4f} {row.share_pct:>6.1f}%")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"[{title}] {name:<20} {n:>7d}")
+        return "\n".join(lines)
+
+
+# one timer per process; worker processes hand their per-run timings back to the parent
+TIMER = StageTimer()
+stage = TIMER.stage
+timed = TIMER.timed
+count = TIMER.count
+
+
+class TimingLog:
+    """JSONL log with one record per run: run id, extra fields, the run's wall time and its stage times / counters."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w")
+
+    def write(self, run_id, run: dict, **fields):
+        record = {"run_id": run_id, **fields, "wall_s": run.get("wall_s"), "stages_s": run.get("stages", {}),
+                  "counters": run.get("counters", {})}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextlib.contextmanager
+def profiled(path: str | None):
+    """cProfile everything inside the block and dump the stats to `path` (no-op for None)."""
+    if not path:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"[Profile] cProfile stats written to {path} (view with python -m pstats or snakeviz)")
+
+
+def start_worker_profile(path: str | None):
+    """Profile the rest of a worker process; stats go to `{path}.{pid}` when the process exits."""
+    if not path:
+        return None
+    from multiprocessing.util import Finalize
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def dump():
+        profiler.disable()
+        profiler.dump_stats(f"{path}.{os.getpid()}")
+    Finalize(None, dump, exitpriority=30)
+    return profiler
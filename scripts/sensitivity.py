@@ -0,0 +1,109 @@
+"""
+Spearman rank sensitivity in matrix form
+Every parameter and output column is ranked once and the full parameter x output rho / p-value
+matrix comes from one matrix product per NaN pattern
+StreamingSpearman accumulates UQ runs as they finish so sensitivity can be refreshed mid-campaign
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata, t as student_t
+
+
+def _standardized_ranks(a):
+    """Average-tie ranks of each column, centered and scaled to unit norm (NaN for constant columns)."""
+    r = rankdata(a, axis=0)
+    r -= r.mean(axis=0)
+    norm = np.sqrt((r * r).sum(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return r / np.where(norm > 0, norm, np.nan)
+
+
+def _fill(rho, n_obs, x, y, p_idx, o_idx):
+    # rank correlation of x (rows, params) against y (rows, outputs), written into the p_idx x o_idx block
+    n = len(x)
+    n_obs[np.ix_(p_idx, o_idx)] = n
+    if n <= 2:
+        return
+    block = _standardized_ranks(x).T @ _standardized_ranks(y)
+    rho[np.ix_(p_idx, o_idx)] = np.clip(block, -1.0, 1.0)
+
+
+def spearman_matrix(x, y):
+    """
+    Spearman rho and two-sided p-value for every column of x (runs, params) against every
+    column of y (runs, outputs), each pair using only the runs where both values are present.
+    Matches scipy.stats.spearmanr on the dropna'd pair. Returns (rho, p_value, n_obs), all (params, outputs);
+    rho is NaN where a pair has <= 2 runs or a constant column.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_params, n_outputs = x.shape[1], y.shape[1]
+    rho = np.full((n_params, n_outputs), np.nan)
+    n_obs = np.zeros((n_params, n_outputs), dtype=np.int64)
+
+    # outputs sharing the same missing runs are ranked together (normally a single group)
+    patterns, group = np.unique(~np.isnan(y).T, axis=0, return_inverse=True)
+    for g, rows in enumerate(patterns):
+        o_idx = np.flatnonzero(group.ravel() == g)
+        xg, yg = x[rows], y[rows][:, o_idx]
+
+        x_nan = np.isnan(xg)
+        clean = np.flatnonzero(~x_nan.any(axis=0))
+        if len(clean):
+            _fill(rho, n_obs, xg[:, clean], yg, clean, o_idx)
+        for p in np.flatnonzero(x_nan.any(axis=0)):
+            keep = ~x_nan[:, p]
+            _fill(rho, n_obs, xg[keep][:, [p]], yg[keep], [p], o_idx)
+
+    dof = n_obs - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stat = rho * np.sqrt((dof / ((rho + 1.0) * (1.0 - rho))).clip(0))
+    p_value = np.where(np.isnan(rho), np.nan, 2 * student_t.sf(np.abs(t_stat), np.maximum(dof, 1)))
+    return rho, p_value, n_obs
+
+
+def sensitivity_table(rho, p_value, param_cols, output_cols, decimals=4):
+    """Long (parameter, output, spearman_rho, p_value) table sorted by output, then |rho| descending."""
+    p_idx, o_idx = np.nonzero(~np.isnan(rho))  # parameter-major, the order ties keep after sorting
+    sens_df = pd.DataFrame({
+        "parameter": np.asarray(param_cols, dtype=object)[p_idx],
+        "output": np.asarray(output_cols, dtype=object)[o_idx],
+        "spearman_rho": np.round(rho[p_idx, o_idx], decimals),
+        "p_value": np.round(p_value[p_idx, o_idx], decimals),
+    })
+    sens_df["abs_rho"] = sens_df["spearman_rho"].abs()
+    return sens_df.sort_values(["output", "abs_rho"], ascending=[True, False]).drop(columns="abs_rho")
+
+
+class StreamingSpearman:
+    """
+    Growing (runs, params) / (runs, outputs) arrays fed one UQ result at a time.
+
+    update() only copies the new run into preallocated storage; ranks depend on every run,
+    so they are recomputed (one sort per column) when result() is called.
+    """
+
+    def __init__(self, param_cols, output_cols, capacity=256):
+        self.param_cols = list(param_cols)
+        self.output_cols = list(output_cols)
+        self._x = np.empty((capacity, len(self.param_cols)))
+        self._y = np.empty((capacity, len(self.output_cols)))
+        self.n_runs = 0
+
+    def update(self, row: dict):
+        if row.get("status", "OK") != "OK":
+            return
+        if self.n_runs == len(self._x):
+            self._x = np.concatenate([self._x, np.empty_like(self._x)])
+            self._y = np.concatenate([self._y, np.empty_like(self._y)])
+        self._x[self.n_runs] = [row.get(c, np.nan) for c in self.param_cols]
+        self._y[self.n_runs] = [np.nan if row.get(c) is None else row[c] for c in self.output_cols]
+        self.n_runs += 1
+
+    def matrices(self):
+        return spearman_matrix(self._x[:self.n_runs], self._y[:self.n_runs])
+
+    def result(self) -> pd.DataFrame:
+        rho, p_value, _ = self.matrices()
+        return sensitivity_table(rho, p_value, self.param_cols, self.output_cols)
@@ -0,0 +1,119 @@
+"""
+Content-addressed cache for SWMM simulation results
+Key: sha256 of the effective .inp bytes + engine version + requested outputs
+Entries: compressed .npz archives, evicted least-recently-used once the cache exceeds its size budget
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+
+CACHE_FORMAT = 1
+DEFAULT_CACHE_DIR = os.environ.get("BSEC_SWMM_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "bsec_swmm"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("BSEC_SWMM_CACHE_MAX_MB", 2048)) * 1024 ** 2)
+RESCAN_EVERY = 64  # puts between directory scans, to pick up entries other processes wrote or evicted
+
+
+def engine_version() -> str:
+    versions = []
+    for package in ("pyswmm", "swmm-toolkit"):
+        try:
+            versions.append(f"{package}=={version(package)}")
+        except PackageNotFoundError:
+            versions.append(f"{package}==unknown")
+    return ";".join(versions)
+
+
+class SimulationCache:
+    """
+    On-disk store of simulation outputs, one .npz per distinct (inp, engine, outputs) key.
+
+    get() refreshes an entry's mtime, so mtime order is recency order for eviction.
+    Writes go through a temp file + os.replace, so concurrent workers never see partial entries.
+    put() keeps a running total of the cache size and only scans the directory when that total
+    crosses max_bytes or every RESCAN_EVERY puts.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._size = None  # bytes on disk as of the last scan plus this process's puts since
+        self._puts = 0
+        if enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, inp_bytes: bytes, outputs: dict) -> str:
+        h = hashlib.sha256(inp_bytes)
+        h.update(engine_version().encode())
+        h.update(json.dumps({"format": CACHE_FORMAT, **outputs}, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> dict[str, np.ndarray] | None:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key: str, arrays: dict[str, np.ndarray]):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+                written = f.tell()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        self._puts += 1
+        if self._size is None or self._puts % RESCAN_EVERY == 0:
+            self.evict()
+        else:
+            self._size += written - replaced
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache fits max_bytes; resets the running total."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
@@ -0,0 +1,176 @@
+"""
+Storm generator
+Scaled / time-shifted variants of a [TIMESERIES] storm already in the .inp, and SCS Type II / Chicago design storms
+Hyetographs are built in memory and written into the temp .inp together with the [RAINGAGES] rewrite
+Used by run_scenario in BSEC_SWMM_analysis.py (--multipliers, --design)
+
+A storm spec is a plain dict:
+    {"base": "6/27/2023", "depth": 1.5, "duration": 1.0, "shift_min": 0}
+    {"design": "scs_type2", "depth": 5.0, "duration_h": 24, "dt_min": 6}
+    {"design": "chicago", "a": ..., "b": ..., "c": ..., "duration_min": 120, "r": 0.4, "dt_min": 5}
+"""
+
+import datetime as dt
+import re
+import warnings
+
+import numpy as np
+
+from scripts.inp_index import InpIndex, set_column
+
+# NRCS (TR-55) Type II 24 h mass curve: hour -> fraction of the 24 h depth
+SCS_TYPE2 = np.array([
+    [0.0, 0.000], [2.0, 0.022], [4.0, 0.048], [6.0, 0.080], [7.0, 0.098], [8.0, 0.120],
+    [8.5, 0.133], [9.0, 0.147], [9.5, 0.163], [9.75, 0.172], [10.0, 0.181], [10.5, 0.204],
+    [11.0, 0.235], [11.5, 0.283], [11.75, 0.357], [12.0, 0.663], [12.5, 0.735], [13.0, 0.772],
+    [13.5, 0.799], [14.0, 0.820], [16.0, 0.880], [20.0, 0.952], [24.0, 1.000],
+])
+
+
+# ---------------------------------------------------------------------------
+# [TIMESERIES] parsing and formatting
+# ---------------------------------------------------------------------------
+
+def _minutes(clock: str) -> float:
+    # 'H:MM' (hours may exceed 24) or decimal hours
+    if ":" in clock:
+        h, m = clock.split(":")[:2]
+        return int(h) * 60 + float(m)
+    return float(clock) * 60
+
+
+def read_timeseries(index: InpIndex, name: str) -> tuple[np.ndarray, np.ndarray]:
+    """(minutes from the first entry, values) of one inline [TIMESERIES] entry."""
+    body = index.read_section("TIMESERIES").decode("utf-8", errors="replace")
+    times, values, day0 = [], [], None
+    for line in body.splitlines():
+        parts = line.split(";", 1)[0].split()
+        if len(parts) < 3 or parts[0] != name:
+            continue
+        if parts[1].upper() == "FILE":
+            raise ValueError(f"Timeseries '{name}' is read from an external file")
+        offset = 0.0
+        if len(parts) >= 4:  # Name Date Time Value
+            day = dt.datetime.strptime(parts[1], "%m/%d/%Y")
+            day0 = day0 or day
+            offset = (day - day0).total_seconds() / 60
+        times.append(offset + _minutes(parts[-2]))
+        values.append(float(parts[-1]))
+    if not times:
+        raise KeyError(f"Timeseries '{name}' not found in {index.path}")
+    return np.array(times), np.array(values)
+
+
+def format_timeseries(name: str, times_min: np.ndarray, values: np.ndarray) -> bytes:
+    """[TIMESERIES] lines in the model's 'Name  H:MM  Value' layout, followed by a blank line."""
+    hours, minutes = np.divmod(np.rint(times_min).astype(np.int64), 60)
+    lines = [f"{name:<28}{f'{h}:{m:02d}':<11}{v:<10.5g}\n" for h, m, v in zip(hours, minutes, values)]
+    return ("".join(lines) + "\n").encode()
+
+
+# ---------------------------------------------------------------------------
+# HYETOGRAPHS
+# ---------------------------------------------------------------------------
+
+def scaled(times_min, values, depth=1.0, duration=1.0, shift_min=0.0):
+    """
+    Base storm with values x depth and the time axis stretched by duration and shifted by shift_min.
+    For CUMULATIVE / VOLUME gages the total depth scales by depth only; for INTENSITY gages
+    a duration stretch also adds depth.
+    """
+    return np.asarray(times_min) * duration + shift_min, np.asarray(values) * depth
+
+
+def scs_type2(depth, duration_h=24.0, dt_min=6.0):
+    """Cumulative SCS Type II hyetograph (depth in model rain units) on a dt_min grid."""
+    times = np.arange(0.0, duration_h * 60 + dt_min / 2, dt_min)
+    fraction = np.interp(times / 60 * 24 / duration_h, SCS_TYPE2[:, 0], SCS_TYPE2[:, 1])
+    return times, depth * fraction
+
+
+def chicago(a, b, c, duration_min, r=0.4, dt_min=5.0):
+    """
+    Cumulative Chicago (Keifer & Chu) hyetograph for the IDF curve i = a / (t + b)^c (i per hour, t in minutes).
+    The window of length T around the peak holds the IDF depth a T / (T + b)^c / 60, split r before the
+    peak and 1 - r after it.
+    """
+    r = float(np.clip(r, 1e-6, 1 - 1e-6))
+    times = np.arange(0.0, duration_min + dt_min / 2, dt_min)
+    t_peak = r * duration_min
+
+    def idf_depth(window):
+        return a * window / (window + b) ** c / 60
+
+    total_before = r * idf_depth(duration_min)
+    before = total_before - r * idf_depth(np.clip(t_peak - times, 0, None) / r)
+    after = total_before + (1 - r) * idf_depth(np.clip(times - t_peak, 0, None) / (1 - r))
+    return times, np.where(times <= t_peak, before, after)
+
+
+DESIGNS = {"scs_type2": scs_type2, "chicago": chicago}
+
+
+def storm_series(index: InpIndex, spec: dict) -> tuple[np.ndarray, np.ndarray]:
+    """(minutes, values) for a storm spec, see the module docstring."""
+    spec = dict(spec)
+    if "base" in spec:
+        times, values = read_timeseries(index, spec.pop("base"))
+        return scaled(times, values, **spec)
+    design = spec.pop("design")
+    if design not in DESIGNS:
+        raise ValueError(f"Unknown design storm '{design}', expected one of {list(DESIGNS)}")
+    return DESIGNS[design](**spec)
+
+
+def variant_name(base: str, depth=1.0, duration=1.0, shift_min=0.0) -> str:
+    name = f"{base}_x{depth:g}depth"
+    if duration != 1.0:
+        name += f"_x{duration:g}time"
+    if shift_min:
+        name += f"_{shift_min:+g}min"
+    return name
+
+
+# ---------------------------------------------------------------------------
+# INP WRITING
+# ---------------------------------------------------------------------------
+
+def _simulation_minutes(options: bytes) -> float | None:
+    text = options.decode("utf-8", errors="replace")
+    found = dict(re.findall(r"(?m)^\s*(START_DATE|START_TIME|END_DATE|END_TIME)\s+(\S+)", text))
+    try:
+        start = dt.datetime.strptime(f"{found['START_DATE']} {found['START_TIME']}", "%m/%d/%Y %H:%M:%S")
+        end = dt.datetime.strptime(f"{found['END_DATE']} {found['END_TIME']}", "%m/%d/%Y %H:%M:%S")
+    except (KeyError, ValueError):
+        return None
+    return (end - start).total_seconds() / 60
+
+
+def write_storm_inp(inp_path: str, storm_name: str, spec: dict, out_path: str):
+    """
+    Copy of inp_path with the generated storm appended to [TIMESERIES] and every raingage pointed at it.
+    Design storms also set the gages to CUMULATIVE at the design time step.
+    """
+    index = InpIndex.of(inp_path)
+    times, values = storm_series(index, spec)
+
+    sim_minutes = _simulation_minutes(index.read_section("OPTIONS")) if "OPTIONS" in index else None
+    if sim_minutes is not None and times[-1] > sim_minutes:
+        warnings.warn(f"Storm '{storm_name}' ends {times[-1]:.0f} min after the start, "
+                      f"but the simulation only runs {sim_minutes:.0f} min")
+
+    def add_series(body):
+        # after the last entry, separated by a blank line like the storms already in the model
+        insert_at = len(body.rstrip(b"\r\n")) + 1 if body.strip() else 0
+        rest = body[insert_at:].lstrip(b"\r\n")
+        return body[:insert_at] + b"\n" + format_timeseries(storm_name, times, values) + rest
+
+    def point_gages(body):
+        body = set_column(body, -1, storm_name)
+        if "design" in spec:
+            dt_min = int(round(times[1] - times[0]))
+            body = set_column(body, 1, "CUMULATIVE")
+            body = set_column(body, 2, f"{dt_min // 60}:{dt_min % 60:02d}")
+        return body
+
+    index.patch(out_path, {"TIMESERIES": add_series, "RAINGAGES": point_gages})
@@ -0,0 +1,194 @@
+"""
+Surrogate models (emulators) for peak surface-node depth
+Polynomial chaos (Legendre basis, least squares) or Gaussian process, fitted on finished UQ runs
+Per-node cross-validated error, millisecond predictions and Sobol' indices from the PCE coefficients
+Outputs: uq_surrogate_cv.csv, uq_surrogate_sobol.csv, uq_surrogate_pce.npz
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from numpy.polynomial import legendre
+
+# run as a file (python scripts/surrogate.py) only scripts/ is on sys.path; scripts.* imports need the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.columnar import FORMATS, existing_output, read_table, table_columns
+from scripts.config import uq_output_dir, uq_results_path
+
+CV_PATH = os.path.join(uq_output_dir, "uq_surrogate_cv.csv")
+SOBOL_PATH = os.path.join(uq_output_dir, "uq_surrogate_sobol.csv")
+MODEL_PATH = os.path.join(uq_output_dir, "uq_surrogate_pce.npz")
+
+
+def load_training_data(results_path, param_labels, output_prefix="max_depth_"):
+    """(X, Y, output columns) from the OK runs of a uq_results file; runs with any missing value are dropped."""
+    available = table_columns(results_path)
+    outputs = [c for c in available if c.startswith(output_prefix)]
+    df = read_table(results_path, columns=["status"] + list(param_labels) + outputs)
+    df = df[df["status"] == "OK"].drop(columns="status").apply(pd.to_numeric, errors="coerce").dropna()
+    return df[list(param_labels)].to_numpy(dtype=np.float64), df[outputs].to_numpy(dtype=np.float64), outputs
+
+
+def total_degree_indices(n_params, degree):
+    """Multi-indices (terms, params) with total degree <= degree, constant term first."""
+    terms = [alpha for alpha in itertools.product(range(degree + 1), repeat=n_params) if sum(alpha) <= degree]
+    return np.array(sorted(terms, key=lambda a: (sum(a), tuple(-v for v in a))), dtype=np.int64)
+
+
+class PCESurrogate:
+    """
+    Multi-output polynomial chaos expansion for uniformly distributed inputs.
+
+    Inputs are mapped from [low, high] to [-1, 1] and expanded in orthonormal Legendre
+    polynomials; one least-squares solve fits every output column. Because the basis is
+    orthonormal under the input distribution, the output mean, variance and Sobol' indices
+    follow directly from the coefficients.
+    """
+
+    def __init__(self, lows, highs, degree=2):
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.degree = degree
+        self.indices = total_degree_indices(len(self.lows), degree)
+        self.coef = None  # (terms, outputs)
+
+    def _basis(self, X):
+        z = 2.0 * (np.asarray(X, dtype=np.float64) - self.lows) / (self.highs - self.lows) - 1.0
+        # (samples, params, degree + 1) table of normalized P_k(z), then one product per term
+        poly = np.stack([legendre.legval(z, np.eye(self.degree + 1)[k]) * np.sqrt(2 * k + 1)
+                         for k in range(self.degree + 1)], axis=-1)
+        cols = poly[:, np.arange(len(self.lows))[None, :], self.indices]  # (samples, terms, params)
+        return cols.prod(axis=-1)
+
+    def fit(self, X, Y):
+        self.coef, *_ = np.linalg.lstsq(self._basis(X), np.asarray(Y, dtype=np.float64), rcond=None)
+        return self
+
+    def predict(self, X):
+        X = np.atleast_2d(X)
+        return self._basis(X) @ self.coef
+
+    def mean(self):
+        return self.coef[0]
+
+    def variance(self):
+        return (self.coef[1:] ** 2).sum(axis=0)
+
+    def sobol_indices(self):
+        """First-order and total Sobol' indices, each (params, outputs); NaN where the output has no variance."""
+        sq = self.coef[1:] ** 2
+        involved = self.indices[1:] > 0  # (terms, params)
+        only = involved & (involved.sum(axis=1, keepdims=True) == 1)
+        var = sq.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s1 = np.where(var > 0, only.T.astype(np.float64) @ sq / var, np.nan)
+            st = np.where(var > 0, involved.T.astype(np.float64) @ sq / var, np.nan)
+        return s1, st
+
+    def save(self, path, output_names=None):
+        np.savez_compressed(path, lows=self.lows, highs=self.highs, degree=self.degree, coef=self.coef,
+                            outputs=np.array(output_names if output_names is not None else [], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            model = cls(archive["lows"], archive["highs"], int(archive["degree"]))
+            model.coef = archive["coef"]
+            model.output_names = archive["outputs"].tolist()
+        return model
+
+
+class GPSurrogate:
+    """
+    Multi-output Gaussian process (scikit-learn, optional dependency) with one anisotropic RBF
+    kernel shared by all outputs. Slower to fit than the PCE but does not assume a polynomial response.
+    """
+
+    def __init__(self, lows, highs, random_state=0):
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import RBF, ConstantKernel, WhiteKernel
+
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        kernel = ConstantKernel(1.0) * RBF(length_scale=np.ones(len(self.lows))) + WhiteKernel(1e-3)
+        self.gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=random_state)
+
+    def _scale(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.lows) / (self.highs - self.lows)
+
+    def fit(self, X, Y):
+        self.gp.fit(self._scale(X), np.asarray(Y, dtype=np.float64))
+        return self
+
+    def predict(self, X):
+        pred = self.gp.predict(self._scale(np.atleast_2d(X)))
+        return pred.reshape(len(pred), -1)
+
+
+def cross_validate(make_model, X, Y, k=5, seed=42):
+    """
+    k-fold out-of-sample predictions for every run. Returns per-output RMSE, MAE and
+    Q2 (1 - PRESS / total sum of squares), the predictive counterpart of R2.
+    """
+    folds = np.array_split(np.random.default_rng(seed).permutation(len(X)), k)
+    pred = np.empty_like(Y, dtype=np.float64)
+    for test in folds:
+        train = np.setdiff1d(np.arange(len(X)), test)
+        pred[test] = make_model().fit(X[train], Y[train]).predict(X[test])
+
+    err = pred - Y
+    ss_tot = ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q2 = np.where(ss_tot > 0, 1.0 - (err ** 2).sum(axis=0) / ss_tot, np.nan)
+    return {"rmse": np.sqrt((err ** 2).mean(axis=0)), "mae": np.abs(err).mean(axis=0), "q2": q2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a surrogate for peak surface depth on finished UQ runs")
+    parser.add_argument("--results", default=None,
+                        help="uq_results .csv or .parquet (default: the UQ output in --format)")
+    parser.add_argument("--format", default=None, choices=FORMATS,
+                        help="format of the default --results (default: whichever exists, newest first)")
+    parser.add_argument("--model", default="pce", choices=("pce", "gp"), help="surrogate type")
+    parser.add_argument("--degree", type=int, default=2, help="PCE total polynomial degree")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--seed", type=int, default=42, help="fold assignment seed")
+    args = parser.parse_args()
+
+    from scripts.BSEC_SWMM_UQ import PARAM_DEFS
+
+    labels = [p["label"] for p in PARAM_DEFS]
+    lows = [p["low"] for p in PARAM_DEFS]
+    highs = [p["high"] for p in PARAM_DEFS]
+    X, Y, outputs = load_training_data(args.results or existing_output(uq_results_path, args.format), labels)
+    print(f"[Surrogate] {len(X)} runs, {len(outputs)} outputs, model={args.model}")
+
+    if args.model == "pce":
+        make_model = lambda: PCESurrogate(lows, highs, degree=args.degree)
+    else:
+        make_model = lambda: GPSurrogate(lows, highs, random_state=args.seed)
+
+    cv = cross_validate(make_model, X, Y, k=args.folds, seed=args.seed)
+    os.makedirs(os.path.dirname(CV_PATH), exist_ok=True)
+    pd.DataFrame({"output": outputs, **cv}).to_csv(CV_PATH, index=False)
+    print(f"[Surrogate] CV median Q2 {np.nanmedian(cv['q2']):.4f}, worst {np.nanmin(cv['q2']):.4f}")
+
+    if args.model == "pce":
+        model = make_model().fit(X, Y)
+        model.save(MODEL_PATH, outputs)
+        s1, st = model.sobol_indices()
+        pd.DataFrame({
+            "parameter": np.repeat(labels, len(outputs)),
+            "output": np.tile(outputs, len(labels)),
+            "S1": s1.ravel(),
+            "ST": st.ravel(),
+        }).to_csv(SOBOL_PATH, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+SWMM binary output (.out) reader
+Memory-maps the results section so node time series are read in bulk
+Layout follows the EPA SWMM 5 output file format (header, IDs, properties, results, epilog)
+"""
+
+import numpy as np
+import pandas as pd
+
+MAGIC = 516114522
+
+# reported node variables, in file order (pollutant concentrations follow)
+NODE_VARS = {"depth": 0, "head": 1, "volume": 2, "lateral_inflow": 3, "total_inflow": 4, "flooding": 5}
+
+SWMM_EPOCH = pd.Timestamp("1899-12-30")
+
+
+class SwmmOutput:
+    """
+    Read-only view of a SWMM .out file.
+
+    Values are in the model's own units (ft, ft3, cfs for US models), exactly as
+    written by the engine. The results section is exposed as a packed structured
+    memmap with one record per reporting period.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = np.fromfile(f, dtype="<i4", count=7)
+            f.seek(-6 * 4, 2)
+            id_pos, input_pos, output_pos, n_periods, error_code, magic = np.fromfile(f, dtype="<i4", count=6)
+
+            if head[0] != MAGIC or magic != MAGIC:
+                raise ValueError(f"{path} is not a SWMM output file")
+            if error_code:
+                raise RuntimeError(f"SWMM reported error {error_code} in {path}")
+
+            self.version, self.flow_units = int(head[1]), int(head[2])
+            n_subcatch, n_nodes, n_links, n_polluts = (int(v) for v in head[3:7])
+
+            # object IDs: subcatchments, nodes, links, pollutants
+            f.seek(id_pos)
+            names = []
+            for count in (n_subcatch, n_nodes, n_links, n_polluts):
+                group = []
+                for _ in range(count):
+                    length = int(np.fromfile(f, dtype="<i4", count=1)[0])
+                    group.append(f.read(length).decode("utf-8", errors="replace"))
+                names.append(group)
+            self.subcatch_ids, self.node_ids, self.link_ids, self.pollutant_ids = names
+
+            # skip the input property tables to reach the reported variable counts
+            f.seek(input_pos)
+            for count in (n_subcatch, n_nodes, n_links):
+                n_props = int(np.fromfile(f, dtype="<i4", count=1)[0])
+                f.seek(4 * (n_props + count * n_props), 1)
+
+            n_vars = []
+            for _ in range(4):  # subcatch, node, link, system
+                n = int(np.fromfile(f, dtype="<i4", count=1)[0])
+                f.seek(4 * n, 1)
+                n_vars.append(n)
+            self.start_date = float(np.fromfile(f, dtype="<f8", count=1)[0])
+            self.report_step = int(np.fromfile(f, dtype="<i4", count=1)[0])
+
+        n_sub_vars, n_node_vars, n_link_vars, n_sys_vars = n_vars
+        record = np.dtype([
+            ("date", "<f8"),
+            ("subcatch", "<f4", (n_subcatch, n_sub_vars)),
+            ("node", "<f4", (n_nodes, n_node_vars)),
+            ("link", "<f4", (n_links, n_link_vars)),
+            ("system", "<f4", (n_sys_vars,)),
+        ])
+        self.n_periods = int(n_periods)
+        self._results = np.memmap(path, dtype=record, mode="r", offset=int(output_pos), shape=(self.n_periods,))
+        self._node_index = {name: i for i, name in enumerate(self.node_ids)}
+
+    @property
+    def timestamps(self):
+        days = np.asarray(self._results["date"], dtype=np.float64)
+        return (SWMM_EPOCH + pd.to_timedelta(np.round(days * 86400.0), unit="s")).to_pydatetime().tolist()
+
+    def node_series(self, node_ids, variables=("depth", "total_inflow", "volume"), dtype=np.float64):
+        """(periods, nodes, variables) array for the requested nodes, in the requested order."""
+        missing = [n for n in node_ids if n not in self._node_index]
+        if missing:
+            raise KeyError(f"Nodes not reported in {self.path}: {missing[:5]}")
+
+        node_idx = np.array([self._node_index[n] for n in node_ids], dtype=np.intp)
+        var_idx = np.array([NODE_VARS[v] for v in variables], dtype=np.intp)
+        block = self._results["node"]  # (periods, all nodes, all vars) view into the memmap
+        return block[:, node_idx[:, None], var_idx[None, :]].astype(dtype)
+
+    def close(self):
+        mm = getattr(self._results, "_mmap", None)
+        self._results = None
+        if mm is not None:
+            mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
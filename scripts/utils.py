@@ -1,7 +1,8 @@
 # By: Ava Spangler
 # Date: 7/16/25
 # Description: This code has utility functions, like one to clean utf-8 encoding that pcswmm messes up sometimes.
-from config import rpts
+from scripts.config import rpts
+from scripts.inp_index import InpIndex, set_column
 import os
 
 def clean_rpt_encoding(rpt_path, inplace=True):
@@ -27,31 +28,12 @@ def clean_rpt_encoding(rpt_path, inplace=True):
 
 def storm_timeseries(inp_path, storm_timeseries, out_path):
     #Modify the named raingage timeseries reference in a SWMM .inp file.
-
-    with open(inp_path, 'r') as f:
-        lines = f.readlines()
-
-    in_raingages = False
-    new_lines = []
-
-    for line in lines:
-        if line.strip().startswith('[RAINGAGES]'):
-            in_raingages = True
-            new_lines.append(line)
-            continue
-
-        if in_raingages:
-            if line.strip().startswith('['):
-                in_raingages = False
-
-            elif line.strip() and not line.strip().startswith(';'):
-                parts = line.split()
-                # Typical format:
-                # Name  Format  Interval  SCF  Source  Timeseries
-                parts[-1] = storm_timeseries
-                line = ' '.join(parts) + '\n'
-
-        new_lines.append(line)
-
-    with open(out_path, 'w') as f:
-        f.writelines(new_lines)
+    #Only the [RAINGAGES] section is read and rewritten, every other section is copied byte for byte.
+    index = InpIndex.of(inp_path)
+    if 'RAINGAGES' not in index:
+        index.patch(out_path, {})
+        return
+
+    # Typical format:
+    # Name  Format  Interval  SCF  Source  Timeseries
+    index.patch(out_path, {'RAINGAGES': lambda body: set_column(body, -1, storm_timeseries)})
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# scripts.* imports need the repo root on sys.path, as in the entry scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+"""bootstrap_ci against a per-resample loop and scipy.stats.bootstrap."""
+
+import numpy as np
+import pytest
+from scipy.stats import bootstrap
+
+from scripts.bootstrap import bootstrap_ci
+
+
+@pytest.fixture
+def runs():
+    rng = np.random.default_rng(0)
+    x = rng.random((60, 4))
+    y = np.column_stack([x[:, 0] + 0.1 * rng.random(60), -x[:, 1] ** 3, rng.random(60), np.round(x[:, 2], 1)])
+    return y
+
+
+def test_bootstrap_ci_matches_resample_loop(runs):
+    # one resample at a time, its run indices shared by every node
+    y = runs
+    n_bootstrap = 300
+    mean, low, high = bootstrap_ci(y, n_bootstrap=n_bootstrap, seed=42, chunk_size=64)
+
+    rng = np.random.default_rng(42)
+    boot = np.array([y[rng.integers(0, len(y), size=len(y))].mean(axis=0) for _ in range(n_bootstrap)])
+    np.testing.assert_allclose(mean, y.mean(axis=0))
+    np.testing.assert_allclose(low, np.percentile(boot, 2.5, axis=0))
+    np.testing.assert_allclose(high, np.percentile(boot, 97.5, axis=0))
+
+
+def test_bootstrap_ci_agrees_with_scipy(runs):
+    y = runs
+    _, low, high = bootstrap_ci(y, n_bootstrap=4000, seed=1)
+    for j in range(y.shape[1]):
+        want = bootstrap((y[:, j],), np.mean, n_resamples=4000, method="percentile",
+                         random_state=np.random.default_rng(2)).confidence_interval
+        width = want.high - want.low
+        assert abs(low[j] - want.low) < 0.05 * width
+        assert abs(high[j] - want.high) < 0.05 * width
+
+
+def test_bootstrap_ci_independent_of_chunk_size(runs):
+    y = runs
+    np.testing.assert_array_equal(bootstrap_ci(y, n_bootstrap=200, chunk_size=7)[1],
+                                  bootstrap_ci(y, n_bootstrap=200, chunk_size=256)[1])
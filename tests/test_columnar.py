@@ -0,0 +1,28 @@
+"""Resolving UQ output paths across the .csv / .parquet formats."""
+
+import os
+
+import pandas as pd
+
+from scripts.columnar import existing_output, output_path, read_table, write_table
+
+
+def test_existing_output_prefers_explicit_format(tmp_path):
+    path = str(tmp_path / "uq_results.csv")
+    assert existing_output(path, "parquet") == output_path(path, "parquet")
+    assert existing_output(path, "csv") == path
+
+
+def test_existing_output_falls_back_to_whichever_exists(tmp_path):
+    path = str(tmp_path / "uq_results.csv")
+    assert existing_output(path) == path  # neither written yet
+    df = pd.DataFrame({"run_id": [0, 1], "status": ["ok", "ok"]})
+
+    write_table(df, output_path(path, "parquet"), "parquet")
+    found = existing_output(path)
+    assert found.endswith(".parquet")
+    pd.testing.assert_frame_equal(read_table(found), df)
+
+    write_table(df, path, "csv")
+    os.utime(output_path(path, "parquet"), (0, 0))
+    assert existing_output(path) == path  # newer of the two
@@ -0,0 +1,63 @@
+"""exceedance_arrays run-length statistics against a row-by-row loop."""
+
+import numpy as np
+import pytest
+
+from scripts.flood_duration import exceedance_arrays
+
+
+def reference(depth, dt, starts, threshold):
+    # one scenario block and node at a time, walking the rows
+    ends = np.append(starts[1:], len(depth))
+    shape = (len(starts), depth.shape[1])
+    duration, longest = np.zeros(shape), np.zeros(shape)
+    first, last, events = np.full(shape, -1), np.full(shape, -1), np.zeros(shape, dtype=int)
+    for s, (start, end) in enumerate(zip(starts, ends)):
+        for j in range(depth.shape[1]):
+            spell, was_wet = 0.0, False
+            for i in range(start, end):
+                wet = depth[i, j] > threshold
+                if wet:
+                    duration[s, j] += dt[i]
+                    spell += dt[i]
+                    longest[s, j] = max(longest[s, j], spell)
+                    last[s, j] = i
+                    if first[s, j] < 0:
+                        first[s, j] = i
+                    events[s, j] += not was_wet
+                else:
+                    spell = 0.0
+                was_wet = wet
+    return duration, first, last, longest, events
+
+
+def test_spells_still_running_at_block_end():
+    depth = np.ones((8, 1))
+    duration, first, last, longest, events = exceedance_arrays(depth, np.full(8, 5.0), np.array([0, 4]), 0.01)
+    np.testing.assert_array_equal(longest.ravel(), [20.0, 20.0])
+    np.testing.assert_array_equal(duration.ravel(), [20.0, 20.0])
+    np.testing.assert_array_equal(events.ravel(), [1, 1])
+    np.testing.assert_array_equal(first.ravel(), [0, 4])
+    np.testing.assert_array_equal(last.ravel(), [3, 7])
+
+
+def test_spell_does_not_carry_over_into_next_block():
+    # block 0 ends wet, block 1 starts wet: two separate 10 min spells, not one of 20
+    depth = np.array([[0.0], [0.0], [1.0], [1.0], [1.0], [1.0], [0.0]])
+    _, _, _, longest, events = exceedance_arrays(depth, np.full(7, 5.0), np.array([0, 4]), 0.01)
+    np.testing.assert_array_equal(longest.ravel(), [10.0, 10.0])
+    np.testing.assert_array_equal(events.ravel(), [1, 1])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_row_loop(seed):
+    rng = np.random.default_rng(seed)
+    depth = rng.random((60, 7)) * (rng.random((60, 7)) < 0.7)
+    depth[rng.random((60, 7)) < 0.05] = np.nan  # NaN depth counts as dry
+    depth[-5:, :3] = 1.0  # several nodes still flooded at the end of every block
+    depth[[14, 29, 44], :3] = 1.0
+    starts = np.array([0, 15, 30, 45])
+    dt = rng.choice([1.0, 5.0], size=60)
+
+    for got, want in zip(exceedance_arrays(depth, dt, starts, 0.3), reference(depth, dt, starts, 0.3)):
+        np.testing.assert_allclose(got, want)
@@ -0,0 +1,104 @@
+"""InpIndex section offsets, patched copies and the column / option rewriters."""
+
+import pytest
+
+from scripts.inp_index import SIDECAR_SUFFIX, InpIndex, set_column, set_options
+
+MODEL = (
+    b"; preamble comment\n"
+    b"[TITLE]\n"
+    b"test model\n"
+    b"\n"
+    b"[OPTIONS]\n"
+    b";;Option             Value\n"
+    b"FLOW_UNITS           CFS\n"
+    b"ROUTING_STEP         0:00:30   ; comment\n"
+    b"\n"
+    b"[RAINGAGES]\n"
+    b";;Name  Format    Interval SCF  Source\n"
+    b"Gage1   INTENSITY 0:05     1.0  TIMESERIES Storm1   ; gage comment\n"
+    b"Gage2   INTENSITY 0:05     1.0  TIMESERIES Storm1\n"
+    b"\n"
+    b"[TIMESERIES]\n"
+    b"Storm1  0:00  0.0\n"
+    b"Storm1  0:05  1.5\n"
+)
+
+
+@pytest.fixture
+def inp(tmp_path):
+    path = tmp_path / "model.inp"
+    path.write_bytes(MODEL)
+    return path
+
+
+def test_sections_and_bodies(inp):
+    index = InpIndex(str(inp))
+    assert index.names == ["TITLE", "OPTIONS", "RAINGAGES", "TIMESERIES"]
+    assert "raingages" in index
+    assert index.read_section("TIMESERIES") == b"Storm1  0:00  0.0\nStorm1  0:05  1.5\n"
+    assert index.read_section("TITLE", header=True) == b"[TITLE]\ntest model\n\n"
+    assert b"".join(block for _, block in index.blocks()) == MODEL
+
+
+def test_sidecar_is_reused_and_invalidated(inp):
+    InpIndex(str(inp))
+    assert (inp.parent / ("model.inp" + SIDECAR_SUFFIX)).exists()
+    assert InpIndex(str(inp)).names == ["TITLE", "OPTIONS", "RAINGAGES", "TIMESERIES"]
+
+    inp.write_bytes(MODEL.replace(b"[TITLE]\ntest model\n", b"[TITLE]\nrenamed model, longer\n"))
+    index = InpIndex.of(str(inp))
+    assert index.read_section("TITLE") == b"renamed model, longer\n\n"
+
+
+def test_patch_rewrites_only_the_given_sections(inp, tmp_path):
+    index = InpIndex(str(inp))
+    out = tmp_path / "patched.inp"
+    index.patch(str(out), {"TITLE": b"patched\n\n", "timeseries": lambda body: body + b"Storm1  0:10  0.5\n"})
+
+    expected = MODEL.replace(b"test model\n", b"patched\n") + b"Storm1  0:10  0.5\n"
+    assert out.read_bytes() == expected
+    assert index.render({"TITLE": b"patched\n\n", "TIMESERIES": lambda body: body + b"Storm1  0:10  0.5\n"}) \
+        == expected
+    assert index.render({}) == MODEL
+
+
+def test_patch_unknown_section_raises(inp, tmp_path):
+    with pytest.raises(KeyError):
+        InpIndex(str(inp)).patch(str(tmp_path / "out.inp"), {"CONDUITS": b""})
+
+
+def test_set_column_keeps_layout_and_comments(inp):
+    body = InpIndex(str(inp)).read_section("RAINGAGES")
+    lines = set_column(body, -1, "Design").splitlines()
+    assert lines[0] == b";;Name  Format    Interval SCF  Source"
+    assert lines[1] == b"Gage1   INTENSITY 0:05     1.0  TIMESERIES Design   ; gage comment"
+    assert lines[2] == b"Gage2   INTENSITY 0:05     1.0  TIMESERIES Design"
+
+    only_gage2 = set_column(body, 1, "CUMULATIVE", names=["Gage2"]).splitlines()
+    assert only_gage2[1] == body.splitlines()[1]
+    assert only_gage2[2] == b"Gage2   CUMULATIVE 0:05     1.0  TIMESERIES Storm1"
+
+
+def test_set_column_skips_short_lines():
+    body = b"A 1 2\nB 1\n\n"
+    assert set_column(body, 2, "x") == b"A 1 x\nB 1\n\n"
+    assert set_column(body, -3, "x") == b"x 1 2\nB 1\n\n"
+
+
+def test_set_options_sets_and_adds_keys():
+    body = b";;Option Value\nFLOW_UNITS           CFS\nROUTING_STEP         0:00:30\n\n"
+    out = set_options(body, {"routing_step": 5, "REPORT_STEP": "0:05:00"})
+    assert out == (b";;Option Value\nFLOW_UNITS           CFS\nROUTING_STEP         5\n"
+                   b"REPORT_STEP          0:05:00\n\n")
+
+
+def test_set_options_keeps_crlf_line_endings():
+    body = b"FLOW_UNITS           CFS\r\nROUTING_STEP         0:00:30\r\n\r\n"
+    out = set_options(body, {"ROUTING_STEP": 5, "REPORT_STEP": "0:05:00"})
+    assert out == b"FLOW_UNITS           CFS\r\nROUTING_STEP         5\r\nREPORT_STEP          0:05:00\r\n\r\n"
+    assert all(line.endswith(b"\r\n") for line in out.splitlines(keepends=True))
+
+
+def test_set_options_without_final_newline():
+    assert set_options(b"FLOW_UNITS CFS", {"ROUTING_STEP": 5}) == b"FLOW_UNITS CFS\nROUTING_STEP         5\n"
@@ -0,0 +1,53 @@
+"""Campaign journal: resume after a crash that tore the last record."""
+
+import json
+
+from scripts.BSEC_SWMM_UQ import append_journal, load_journal, open_journal
+
+KEY = {"inp_sha256": "abc", "n_samples": 4, "seed": 42}
+
+
+def _row(run_id, status="OK"):
+    return {"run_id": run_id, "status": status, "max_depth_J1-S": 0.1 * run_id}
+
+
+def _write(path, run_ids, key=KEY):
+    with open_journal(path) as journal:
+        for run_id in run_ids:
+            append_journal(journal, key, _row(run_id))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "uq.journal.jsonl")
+    _write(path, [0, 1, 2])
+    assert load_journal(path, KEY) == {i: _row(i) for i in range(3)}
+
+
+def test_missing_journal_is_empty(tmp_path):
+    assert load_journal(str(tmp_path / "none.jsonl"), KEY) == {}
+
+
+def test_torn_last_line_is_ignored_and_resume_appends_cleanly(tmp_path):
+    path = str(tmp_path / "uq.journal.jsonl")
+    _write(path, [0, 1])
+    torn = json.dumps({**KEY, "run_id": 2, "row": _row(2)})
+    with open(path, "ab") as f:
+        f.write(torn[:len(torn) // 2].encode())  # crash mid-write
+
+    assert load_journal(path, KEY) == {0: _row(0), 1: _row(1)}
+
+    # the resumed campaign re-runs 2 and finishes 3; both land on their own lines
+    _write(path, [2, 3])
+    assert load_journal(path, KEY) == {i: _row(i) for i in range(4)}
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 5 and lines[2] == torn[:len(torn) // 2]
+
+
+def test_other_campaigns_and_latest_rows(tmp_path):
+    path = str(tmp_path / "uq.journal.jsonl")
+    _write(path, [0, 1], key={**KEY, "seed": 7})
+    _write(path, [0])
+    with open_journal(path) as journal:
+        append_journal(journal, KEY, _row(0, status="ERROR: retried"))
+    assert load_journal(path, KEY) == {0: _row(0, status="ERROR: retried")}
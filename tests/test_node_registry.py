@@ -0,0 +1,91 @@
+"""NodeRegistry group-by aggregation and spatial queries against pandas / brute force."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.node_registry import AGGREGATIONS, NodeRegistry
+
+NODES = [f"J{i}-S" for i in range(12)]
+
+
+@pytest.fixture
+def registry():
+    rng = np.random.default_rng(0)
+    metadata = pd.DataFrame({
+        "neighborhood": rng.choice(["Canton", "Fells Point", "Highlandtown"], size=len(NODES)).astype(object),
+        "historic_stream": rng.choice(["Harris Creek", "Jones Falls"], size=len(NODES)).astype(object),
+    }, index=NODES)
+    metadata.loc["J3-S", "neighborhood"] = np.nan  # node without metadata is left out of every group
+    metadata = metadata.drop(index="J7-S")
+    xy = pd.DataFrame(rng.random((len(NODES), 2)) * 100, columns=["x", "y"], index=NODES).drop(index="J5-S")
+    return NodeRegistry(NODES, metadata, xy)
+
+
+def _groupby(registry, values, by, how, node_ids=None):
+    labels = pd.Series(registry.labels(by, node_ids))
+    frame = pd.DataFrame(np.atleast_2d(values).T)
+    grouped = getattr(frame.groupby(labels.to_numpy(), dropna=True), how)()
+    return grouped.T
+
+
+@pytest.mark.parametrize("how", AGGREGATIONS)
+@pytest.mark.parametrize("by", ["neighborhood", "historic_stream"])
+def test_aggregate_matches_groupby(registry, by, how):
+    rng = np.random.default_rng(1)
+    values = rng.random((5, len(NODES)))
+    values[rng.random(values.shape) < 0.2] = np.nan
+
+    got = registry.aggregate(values, by=by, how=how)
+    want = _groupby(registry, values, by, how)
+    np.testing.assert_allclose(got.to_numpy(dtype=float), want.to_numpy(dtype=float))
+    assert got.columns.tolist() == want.columns.tolist()
+
+    row = registry.aggregate(values[0], by=by, how=how)
+    np.testing.assert_allclose(row.to_numpy(dtype=float), want.iloc[0].to_numpy(dtype=float))
+
+
+def test_aggregate_with_node_ids(registry):
+    node_ids = ["J9-S", "J0-S", "J99-S", "J4-S"]  # J99-S is unknown and dropped
+    values = np.array([1.0, 2.0, 50.0, 4.0])
+    got = registry.aggregate(values, how="sum", node_ids=node_ids)
+    want = _groupby(registry, values, "neighborhood", "sum", node_ids).iloc[0]
+    np.testing.assert_allclose(got.to_numpy(), want.to_numpy())
+    assert got.sum() == 7.0
+
+
+def test_aggregate_rejects_bad_input(registry):
+    with pytest.raises(ValueError):
+        registry.aggregate(np.ones(len(NODES)), how="median")
+    with pytest.raises(ValueError):
+        registry.aggregate(np.ones(len(NODES) - 1))
+
+
+def test_indexer_and_labels(registry):
+    np.testing.assert_array_equal(registry.indexer(["J2-S", "nope"]), [2, -1])
+    labels = registry.labels("neighborhood")
+    assert pd.isna(labels[3]) and pd.isna(labels[7])
+    with pytest.raises(ValueError):
+        NodeRegistry(["J1-S", "J1-S"])
+
+
+def test_spatial_queries_match_brute_force(registry):
+    located = ~np.isnan(registry.xy).any(axis=1)
+    assert not located[5]
+    points = np.array([[10.0, 10.0], [50.0, 80.0]])
+    dist = np.linalg.norm(registry.xy[None] - points[:, None], axis=-1)
+    dist[:, ~located] = np.inf
+
+    d, idx = registry.nearest(points, k=3)
+    np.testing.assert_array_equal(idx, np.argsort(dist, axis=1)[:, :3])
+    np.testing.assert_allclose(d, np.sort(dist, axis=1)[:, :3])
+
+    hits = registry.within(points, 30.0)
+    for p in range(len(points)):
+        np.testing.assert_array_equal(hits[p], np.flatnonzero(dist[p] <= 30.0))
+
+    i = 0
+    expected = [NODES[j] for j in np.flatnonzero(np.linalg.norm(registry.xy - registry.xy[i], axis=1) <= 40.0)
+                if j != i]
+    assert registry.neighbors(NODES[i], 40.0) == expected
+    assert registry.neighbors("J5-S", 40.0) == []
@@ -0,0 +1,88 @@
+"""ParamTemplate renders the same model the original SwmmInput-based apply_sample wrote."""
+
+import os
+
+import numpy as np
+import pytest
+from swmm_api import SwmmInput
+
+from scripts.BSEC_SWMM_UQ import PARAM_DEFS, ParamTemplate, build_lhs_samples
+from scripts.config import input_dir
+
+BASE_INP = os.path.join(input_dir, "Inner_Harbor_Model_V24.inp")
+SAMPLED_SECTIONS = ("SUBCATCHMENTS", "SUBAREAS", "INFILTRATION")
+
+# swmm_api cannot date the model's clock-time rain series; irrelevant to the sampled sections
+pytestmark = pytest.mark.filterwarnings("ignore:Could not convert Data for Timeseries")
+
+
+def _resolve(pdef, sampled, base_val):
+    return base_val * sampled if pdef["mode"] == "multiplier" else sampled
+
+
+def reference_apply_sample(base_inp, sample):
+    # apply_sample as it was before ParamTemplate, one SwmmInput copy edited object by object
+    inp = base_inp.copy()
+    param_lookup = {p["param"]: (p, sample[p["label"]]) for p in PARAM_DEFS}
+    for name in list(inp.SUBCATCHMENTS.keys()):
+        sc = inp.SUBCATCHMENTS[name]
+        sc.width = max(_resolve(*param_lookup["width"], sc.width), 0.1)
+        sc.imperviousness = min(max(_resolve(*param_lookup["imperv"], sc.imperviousness), 0.0), 100.0)
+        sc.slope = max(_resolve(*param_lookup["slope"], sc.slope), 0.0001)
+        if name in inp.SUBAREAS:
+            sa = inp.SUBAREAS[name]
+            sa.n_perv = max(_resolve(*param_lookup["N_perv"], sa.n_perv), 0.01)
+            sa.n_imperv = max(_resolve(*param_lookup["N_imperv"], sa.n_imperv), 0.01)
+            sa.storage_imperv = max(_resolve(*param_lookup["dstore_imperv"], sa.storage_imperv), 0.0)
+            sa.storage_perv = max(_resolve(*param_lookup["dstore_perv"], sa.storage_perv), 0.0)
+        if name in inp.INFILTRATION:
+            inf = inp.INFILTRATION[name]
+            inf.moisture_deficit_init = min(max(_resolve(*param_lookup["imd"], inf.moisture_deficit_init), 0.0), 1.0)
+    return inp
+
+
+def _objects(section):
+    return {name: obj.to_dict_() for name, obj in section.items()}
+
+
+@pytest.fixture(scope="module")
+def base_inp():
+    return SwmmInput.read_file(BASE_INP)
+
+
+@pytest.fixture(scope="module")
+def template():
+    return ParamTemplate(BASE_INP)
+
+
+@pytest.mark.parametrize("run_id", range(4))
+def test_render_matches_apply_sample(base_inp, template, run_id):
+    sample = build_lhs_samples(4, seed=7).iloc[run_id].to_dict()
+    expected = reference_apply_sample(base_inp, sample)
+    rendered = SwmmInput.read_text(template.render(sample).decode("utf-8", errors="surrogateescape"))
+
+    for section in SAMPLED_SECTIONS:
+        want, got = _objects(expected[section]), _objects(rendered[section])
+        assert list(got) == list(want)
+        for name in want:
+            for field, value in want[name].items():
+                if isinstance(value, float):
+                    np.testing.assert_allclose(got[name][field], value, rtol=1e-12, equal_nan=True,
+                                               err_msg=f"{section} {name}.{field}")
+                else:
+                    assert got[name][field] == value, f"{section} {name}.{field}"
+
+    # every other section comes through untouched ([REPORT] is rewritten for UQ runs)
+    for section in expected:
+        if section not in SAMPLED_SECTIONS and section != "REPORT":
+            assert rendered[section].to_inp_lines() == expected[section].to_inp_lines(), section
+
+
+def test_clamps_to_param_targets(base_inp, template):
+    sample = {p["label"]: p["high"] for p in PARAM_DEFS}
+    sample.update({"%Imperv": 1e6, "n_imperv": -1.0, "IMD": 5.0})
+    rendered = SwmmInput.read_text(template.render(sample).decode("utf-8", errors="surrogateescape"))
+
+    assert all(sc.imperviousness == 100.0 for sc in rendered.SUBCATCHMENTS.values())
+    assert all(sa.n_imperv == 0.01 for sa in rendered.SUBAREAS.values())
+    assert all(inf.moisture_deficit_init == 1.0 for inf in rendered.INFILTRATION.values())
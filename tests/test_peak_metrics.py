@@ -0,0 +1,85 @@
+"""peak_metrics against the groupby / idxmax tables of the original find_max_depth / find_max_vol."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.peak_metrics import peak_metrics
+
+NODES = ["J1-S", "J2-S", "J10-S", "J7-S", "J3-S"]
+NEIGHBORHOODS = {n: (f"hood{i % 2}", f"stream{i % 3}") for i, n in enumerate(NODES)}
+
+
+@pytest.fixture
+def processed_df():
+    # stacked (scenario, row) frame as save_and_analyze builds it, scenarios not in sorted order
+    rng = np.random.default_rng(0)
+    frames = {}
+    for k, scenario in enumerate(["V", "Base", "I", "V&I"]):
+        data = {"timestamp": pd.date_range("2023-06-27", periods=30, freq="5min")}
+        for node in NODES:
+            data[f"{node}_depth"] = rng.random(30) * (1 + 0.1 * k)
+            data[f"{node}_flow"] = rng.random(30)
+            data[f"{node}_volume"] = rng.random(30) * 100
+        frames[scenario] = pd.DataFrame(data)
+    df = pd.concat(frames, names=["scenario"])
+    df.index.set_names(["scenario", "row"], inplace=True)
+    df.iloc[3, 1] = np.nan  # a missing sample is skipped, as groupby.max() does
+    return df
+
+
+def reference(processed_df, metric):
+    grouped = processed_df.groupby(level=0).max()
+    max_df = grouped[[c for c in grouped.columns if c.endswith(f"_{metric}")]].T
+    max_df = max_df.reset_index().rename(columns={"index": "node_name"})
+    max_df.columns.name = None
+    max_df["node_id"] = max_df["node_name"].str.extract(r"([^_]+)")[0]
+    scenarios = [c for c in max_df.columns if c not in ("node_name", "node_id")]
+    relative = max_df[scenarios].sub(max_df["Base"], axis=0)
+
+    rows = []
+    for scenario in [s for s in scenarios if s != "Base"]:
+        incr_idx = relative[scenario].idxmax()
+        abs_idx = relative[scenario].abs().idxmax()
+        rows.append({"scenario": scenario, "avg_peak_change_m": relative[scenario].mean(),
+                     "peak_abs_change_m": relative.loc[abs_idx, scenario],
+                     "peak_abs_change_node": max_df.loc[abs_idx, "node_name"],
+                     "peak_increase_m": relative.loc[incr_idx, scenario],
+                     "peak_increase_node": max_df.loc[incr_idx, "node_name"]})
+    summary = pd.DataFrame({"scenario": scenarios,
+                            "node_name": [max_df.loc[max_df[s].idxmax(), "node_name"] for s in scenarios],
+                            "peak": [max_df[s].max() for s in scenarios],
+                            "avg": [max_df[s].mean() for s in scenarios]})
+    return max_df, relative, summary, pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("metric", ["depth", "volume"])
+def test_matches_groupby_tables(processed_df, metric):
+    tables = peak_metrics(processed_df, NEIGHBORHOODS)[metric]
+    max_df, relative, summary, relative_summary = reference(processed_df, metric)
+    scenarios = ["Base", "I", "V", "V&I"]
+
+    pd.testing.assert_frame_equal(tables["max"][["node_name", *scenarios, "node_id"]],
+                                  max_df[["node_name", *scenarios, "node_id"]], check_dtype=False)
+    pd.testing.assert_frame_equal(tables["relative"][scenarios], relative[scenarios], check_dtype=False)
+    assert tables["max"]["neighborhood"].tolist() == [NEIGHBORHOODS[n][0] for n in max_df["node_id"]]
+
+    got = tables["summary"]
+    assert got["scenario"].tolist() == scenarios
+    assert got["node_name"].tolist() == summary["node_name"].tolist()
+    np.testing.assert_allclose(got.iloc[:, 2], summary["peak"])
+    np.testing.assert_allclose(got.iloc[:, 3], summary["avg"])
+
+    got = tables["relative_summary"]
+    for col in relative_summary.columns:
+        if pd.api.types.is_numeric_dtype(relative_summary[col]):
+            np.testing.assert_allclose(got[col], relative_summary[col], err_msg=col)
+        else:
+            assert got[col].tolist() == relative_summary[col].tolist(), col
+
+
+def test_base_is_not_in_relative_summary(processed_df):
+    tables = peak_metrics(processed_df, NEIGHBORHOODS, metrics=("depth",))
+    assert set(tables) == {"depth"}
+    assert tables["depth"]["relative_summary"]["scenario"].tolist() == ["I", "V", "V&I"]
+    assert (tables["depth"]["relative"]["Base"] == 0).all()
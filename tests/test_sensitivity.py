@@ -0,0 +1,54 @@
+"""spearman_matrix against per-pair scipy.stats.spearmanr."""
+
+import numpy as np
+import pytest
+from scipy.stats import spearmanr
+
+from scripts.sensitivity import spearman_matrix
+
+
+@pytest.fixture
+def runs():
+    rng = np.random.default_rng(0)
+    x = rng.random((60, 4))
+    y = np.column_stack([x[:, 0] + 0.1 * rng.random(60), -x[:, 1] ** 3, rng.random(60), np.round(x[:, 2], 1)])
+    return x, y
+
+
+def _scipy_matrix(x, y):
+    rho = np.full((x.shape[1], y.shape[1]), np.nan)
+    p_value = np.full_like(rho, np.nan)
+    for i in range(x.shape[1]):
+        for j in range(y.shape[1]):
+            keep = ~np.isnan(x[:, i]) & ~np.isnan(y[:, j])
+            rho[i, j], p_value[i, j] = spearmanr(x[keep, i], y[keep, j])
+    return rho, p_value
+
+
+def test_spearman_matches_scipy(runs):
+    x, y = runs
+    rho, p_value, n_obs = spearman_matrix(x, y)
+    want_rho, want_p = _scipy_matrix(x, y)
+    np.testing.assert_allclose(rho, want_rho, atol=1e-12)
+    np.testing.assert_allclose(p_value, want_p, rtol=1e-9, atol=1e-15)
+    assert (n_obs == len(x)).all()
+
+
+def test_spearman_matches_scipy_with_missing_runs(runs):
+    x, y = runs
+    x, y = x.copy(), y.copy()
+    y[[3, 17], 0] = np.nan  # failed runs in one output
+    y[40:, 3] = np.nan
+    x[5, 2] = np.nan
+    rho, p_value, n_obs = spearman_matrix(x, y)
+    want_rho, want_p = _scipy_matrix(x, y)
+    np.testing.assert_allclose(rho, want_rho, atol=1e-12)
+    np.testing.assert_allclose(p_value, want_p, rtol=1e-9, atol=1e-15)
+    assert n_obs[0, 0] == 58 and n_obs[2, 0] == 57 and n_obs[0, 3] == 40
+
+
+def test_spearman_constant_column_is_nan(runs):
+    x, y = runs
+    y = np.column_stack([y, np.ones(len(y))])
+    rho, p_value, _ = spearman_matrix(x, y)
+    assert np.isnan(rho[:, -1]).all() and np.isnan(p_value[:, -1]).all()
@@ -0,0 +1,72 @@
+"""Saltelli first-order and Jansen total-effect indices on the Ishigami function."""
+
+import numpy as np
+import pytest
+
+from scripts.sobol import saltelli_design, sobol_indices, sobol_table
+
+A, B = 7.0, 0.1
+
+
+def ishigami(x):
+    x = -np.pi + 2 * np.pi * x  # unit cube -> [-pi, pi]^3
+    return np.sin(x[:, 0]) + A * np.sin(x[:, 1]) ** 2 + B * x[:, 2] ** 4 * np.sin(x[:, 0])
+
+
+def ishigami_indices():
+    v1 = 0.5 * (1 + B * np.pi ** 4 / 5) ** 2
+    v2 = A ** 2 / 8
+    v13 = B ** 2 * np.pi ** 8 * (1 / 18 - 1 / 50)
+    var = v1 + v2 + v13
+    return np.array([v1, v2, 0.0]) / var, np.array([v1 + v13, v2, v13]) / var
+
+
+@pytest.fixture(scope="module")
+def design():
+    n_base = 2 ** 13
+    return n_base, saltelli_design(n_base, 3, seed=1)
+
+
+def test_design_blocks(design):
+    n_base, x = design
+    assert x.shape == (n_base * 5, 3)
+    a, b, ab = x[:n_base], x[n_base:2 * n_base], x[2 * n_base:].reshape(3, n_base, 3)
+    for i in range(3):
+        np.testing.assert_array_equal(ab[i][:, i], b[:, i])
+        np.testing.assert_array_equal(np.delete(ab[i], i, axis=1), np.delete(a, i, axis=1))
+
+
+def test_ishigami_indices(design):
+    n_base, x = design
+    y = ishigami(x)[:, None]
+    indices = sobol_indices(y, n_base, 3, n_bootstrap=200, seed=0)
+    s1, st = ishigami_indices()
+
+    np.testing.assert_allclose(indices["S1"][:, 0], s1, atol=0.03)
+    np.testing.assert_allclose(indices["ST"][:, 0], st, atol=0.03)
+    assert indices["n_base_used"] == n_base
+    for k in ("S1", "ST"):
+        assert (indices[f"{k}_low"] <= indices[k]).all() and (indices[k] <= indices[f"{k}_high"]).all()
+
+
+def test_failed_runs_drop_their_base_row(design):
+    n_base, x = design
+    y = np.column_stack([ishigami(x), ishigami(x)])
+    y[2 * n_base + 5, 1] = np.nan  # AB_1 run of base row 5 failed
+    indices = sobol_indices(y, n_base, 3, n_bootstrap=50)
+    assert indices["n_base_used"] == n_base - 1
+    assert np.isfinite(indices["S1"]).all()
+
+
+def test_wrong_run_count_raises(design):
+    n_base, x = design
+    with pytest.raises(ValueError):
+        sobol_indices(ishigami(x)[:-1, None], n_base, 3)
+
+
+def test_table_is_parameter_major(design):
+    n_base, x = design
+    y = np.column_stack([ishigami(x), -ishigami(x)])
+    table = sobol_table(sobol_indices(y, n_base, 3, n_bootstrap=20), ["x1", "x2", "x3"], ["f", "g"])
+    assert table["parameter"].tolist() == ["x1", "x1", "x2", "x2", "x3", "x3"]
+    assert table["output"].tolist() == ["f", "g"] * 3
@@ -0,0 +1,46 @@
+"""Design hyetograph totals and shapes."""
+
+import numpy as np
+import pytest
+
+from scripts.storms import chicago, scaled, scs_type2
+
+
+@pytest.mark.parametrize("duration_h, dt_min", [(24, 6), (24, 15), (6, 5)])
+def test_scs_type2_total_and_shape(duration_h, dt_min):
+    times, cumulative = scs_type2(5.0, duration_h=duration_h, dt_min=dt_min)
+    assert times[0] == 0 and times[-1] == duration_h * 60
+    np.testing.assert_allclose(np.diff(times), dt_min)
+    assert cumulative[0] == 0
+    assert cumulative[-1] == pytest.approx(5.0)
+    assert (np.diff(cumulative) >= 0).all()
+    # Type II: the steepest step sits just before the midpoint of the storm
+    peak = times[1:][np.argmax(np.diff(cumulative))]
+    assert abs(peak - duration_h * 30) <= max(dt_min, duration_h * 60 / 48)
+
+
+@pytest.mark.parametrize("r", [0.3, 0.4, 0.5])
+def test_chicago_total_matches_idf(r):
+    a, b, c, duration = 1500.0, 12.0, 0.8, 120.0
+    times, cumulative = chicago(a, b, c, duration, r=r, dt_min=5.0)
+    assert cumulative[0] == pytest.approx(0.0, abs=1e-12)
+    assert cumulative[-1] == pytest.approx(a * duration / (duration + b) ** c / 60)
+    assert (np.diff(cumulative) >= -1e-12).all()
+    # most intense step around the peak at r * duration
+    peak = times[1:][np.argmax(np.diff(cumulative))]
+    assert abs(peak - r * duration) <= 5.0
+
+
+def test_chicago_windows_around_peak_hold_idf_depth():
+    a, b, c, duration, r = 1500.0, 12.0, 0.8, 120.0, 0.4
+    times, cumulative = chicago(a, b, c, duration, r=r, dt_min=1.0)
+    t_peak = r * duration
+    for window in (10.0, 30.0, 60.0):
+        lo, hi = np.searchsorted(times, [t_peak - r * window, t_peak + (1 - r) * window])
+        assert cumulative[hi] - cumulative[lo] == pytest.approx(a * window / (window + b) ** c / 60, rel=1e-9)
+
+
+def test_scaled():
+    times, values = scaled([0, 60, 120], [0.0, 1.0, 0.5], depth=2.0, duration=1.5, shift_min=30)
+    np.testing.assert_allclose(times, [30, 120, 210])
+    np.testing.assert_allclose(values, [0.0, 2.0, 1.0])